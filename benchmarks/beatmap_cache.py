@@ -0,0 +1,25 @@
+"""
+Loading a large beatmap from its `.osu` against from `Beatmap.save_cache`.
+Run from anywhere: `python benchmarks/beatmap_cache.py`.
+"""
+import os
+import tempfile
+from common import best_of
+from synthetic import make_osu
+from borgor.beatmap import Beatmap
+
+content = make_osu(100_000)
+with tempfile.TemporaryDirectory() as directory:
+    osu_path = os.path.join(directory, 'beatmap.osu')
+    cache_path = os.path.join(directory, 'beatmap.bbc')
+    with open(osu_path, 'wb') as f:
+        f.write(content)
+
+    Beatmap(content, columnar = True).save_cache(cache_path)
+    print(f'.osu   {os.path.getsize(osu_path) / 1e6:6.2f} MB')
+    print(f'cache  {os.path.getsize(cache_path) / 1e6:6.2f} MB')
+
+    print(f'from_file            {best_of(lambda: Beatmap.from_file(osu_path)):8.1f} ms')
+    print(f'from_file, columnar  {best_of(lambda: Beatmap.from_file(osu_path, columnar = True)):8.1f} ms')
+    print(f'load_cache           {best_of(lambda: Beatmap.load_cache(cache_path)):8.1f} ms')
+    print(f'load_cache, mmap     {best_of(lambda: Beatmap.load_cache(cache_path, mmap = True)):8.1f} ms')
@@ -0,0 +1,17 @@
+"""
+Parsing every section of large beatmaps against only the sections asked for.
+Run from anywhere: `python benchmarks/beatmap_parse.py`.
+"""
+from common import best_of
+from synthetic import make_osu
+from borgor.beatmap import Beatmap
+
+for count in (2_000, 20_000, 100_000):
+    content = make_osu(count)
+    full = best_of(lambda: Beatmap(content))
+    columnar = best_of(lambda: Beatmap(content, columnar = True))
+    metadata = best_of(lambda: Beatmap(content, sections = ('[Metadata]',)))
+    print(
+        f'{count:>7} objects  full {full:8.1f} ms  columnar {columnar:8.1f} ms  '
+        f'[Metadata] {metadata:6.2f} ms'
+    )
@@ -0,0 +1,48 @@
+"""
+`BinaryReader` against reading by slicing off the front of the buffer
+(what `borgor` did before), over `N` records of a short, an int and a string.
+Run from anywhere: `python benchmarks/binary_reader.py`.
+"""
+import struct
+from common import best_of
+from synthetic import _string
+from borgor.binary import BinaryReader
+
+def read_offsets(data: bytes, count: int) -> None:
+    reader = BinaryReader(data)
+    for _ in range(count):
+        reader.read_short()
+        reader.read_int()
+        reader.read_string()
+
+def read_slices(data: bytes, count: int) -> None:
+    for _ in range(count):
+        _, = struct.unpack('<h', data[:2])
+        data = data[2:]
+        _, = struct.unpack('<i', data[:4])
+        data = data[4:]
+        if data[0] == 0x0b:
+            data = data[1:]
+            length = shift = 0
+            while True:
+                b = data[0]
+                data = data[1:]
+                length |= (b & 0b01111111) << shift
+                if not b & 0b10000000:
+                    break
+
+                shift += 7
+
+            str(data[:length], 'utf-8')
+            data = data[length:]
+        else:
+            data = data[1:]
+
+for count in (10_000, 20_000, 40_000):
+    data = b''.join(
+        struct.pack('<hi', i % 30000, i) + _string(f'player {i}')
+        for i in range(count)
+    )
+    offsets = best_of(lambda: read_offsets(data, count))
+    slices = best_of(lambda: read_slices(data, count), repeat = 1)
+    print(f'N={count:>7}  reader {offsets:8.1f} ms  slicing {slices:8.1f} ms')
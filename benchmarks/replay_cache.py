@@ -0,0 +1,29 @@
+"""
+Loading a long replay from its `.osr` against from `Replay.save_cache`.
+Run from anywhere: `python benchmarks/replay_cache.py`.
+"""
+import os
+import tempfile
+from common import best_of
+from synthetic import make_osr
+from borgor.replay import Replay
+
+osr = make_osr(200_000)
+with tempfile.TemporaryDirectory() as directory:
+    osr_path = os.path.join(directory, 'replay.osr')
+    cache_path = os.path.join(directory, 'replay.brc')
+    with open(osr_path, 'wb') as f:
+        f.write(osr)
+
+    Replay.from_content(osr, lazy = True).save_cache(cache_path)
+    assert Replay.load_cache(cache_path).build() == osr
+    print(f'.osr   {os.path.getsize(osr_path) / 1e6:6.2f} MB')
+    print(f'cache  {os.path.getsize(cache_path) / 1e6:6.2f} MB')
+
+    print(f'from_file            {best_of(lambda: Replay.from_file(osr_path)):8.1f} ms')
+    print(f'from_file, columnar  {best_of(lambda: Replay.from_file(osr_path, columnar = True)):8.1f} ms')
+    print(f'load_cache           {best_of(lambda: Replay.load_cache(cache_path)):8.1f} ms')
+    print(f'load_cache, mmap     {best_of(lambda: Replay.load_cache(cache_path, mmap = True)):8.1f} ms')
+
+    cached = Replay.load_cache(cache_path)
+    print(f'build, unedited      {best_of(cached.build):8.1f} ms')
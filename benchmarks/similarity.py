@@ -0,0 +1,36 @@
+"""
+`SimilarityIndex.query` against comparing with every replay on the map,
+with a slightly shifted copy of one of `N` random replays as the query.
+Run from anywhere: `python benchmarks/similarity.py`.
+"""
+import random
+from common import best_of
+from synthetic import make_osr
+from borgor.replay import Replay
+from borgor.similarity import Fingerprint
+from borgor.similarity import SimilarityIndex
+
+COUNT = 3000
+FRAMES = 300
+
+def frames(seed: int) -> list[tuple[int, float, float, int]]:
+    r = random.Random(seed)
+    return [(16, r.uniform(0, 512), r.uniform(0, 384), 1) for _ in range(FRAMES)]
+
+index = SimilarityIndex()
+for seed in range(COUNT):
+    index.add(Replay.from_content(make_osr(seed = seed, frames = frames(seed)), columnar = True))
+
+stolen = [(w, x + 1.5, y, z) for w, x, y, z in frames(17)]
+query = Replay.from_content(make_osr(seed = COUNT, frames = stolen), columnar = True)
+fingerprint = Fingerprint.from_replay(query)
+fingerprints = index.fingerprints[query.beatmap_md5]
+
+def brute_force() -> list[tuple[float, str]]:
+    return sorted((fingerprint.distance(other), key) for key, other in fingerprints.items())[:3]
+
+match, = index.query(query, k = 1)
+assert match.key == brute_force()[0][1]
+print(f'{len(index)} replays, closest {match.key} at {match.distance:.2f} osu!px')
+print(f'index        {best_of(lambda: index.query(query, k = 3)):8.1f} ms')
+print(f'brute force  {best_of(brute_force):8.1f} ms')
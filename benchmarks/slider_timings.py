@@ -0,0 +1,19 @@
+"""
+`Beatmap.slider_timings` and `Beatmap.max_combo` on long maps.
+Run from anywhere: `python benchmarks/slider_timings.py`.
+"""
+from common import best_of
+from synthetic import make_osu
+from borgor.beatmap import Beatmap
+
+for count in (2_000, 20_000):
+    content = make_osu(count)
+    for columnar in (False, True):
+        beatmaps = iter([Beatmap(content, columnar = columnar) for _ in range(3)])
+        timings = best_of(lambda: next(beatmaps).slider_timings)
+        beatmaps = iter([Beatmap(content, columnar = columnar) for _ in range(3)])
+        combo = best_of(lambda: next(beatmaps).max_combo)
+        print(
+            f'{count:>6} objects, columnar={columnar!s:<5}  '
+            f'slider_timings {timings:7.1f} ms  max_combo {combo:7.1f} ms'
+        )
@@ -6,6 +6,15 @@ __copyright__ = 'Copyright 2020 coverosu'
 from .akatsukiapi import *
 from .osuapiv2 import *
 from .beatmap import *
+from .curves import *
+from .stacking import *
 from .replay import *
+from .binary import *
+from .catalog import *
+from .judgement import *
+from .difficulty import *
+from .performance import *
+from .analytics import *
+from .similarity import *
 from .osuapi import *
 from .utils import *
\ No newline at end of file
@@ -0,0 +1,108 @@
+from math import fsum
+from math import sqrt
+from math import hypot
+from array import array
+from operator import sub
+from operator import truediv
+from typing import Union
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from .replay import Replay
+from .replay import process_files
+from .judgement import clock_rate
+
+def _diff(values: array) -> array:
+    """`values[i + 1] - values[i]` for every pair of neighbours."""
+    return array('d', map(sub, values[1:], values[:-1]))
+
+def _midpoints(values: array) -> array:
+    return array('d', [(a + b) / 2 for a, b in zip(values, values[1:])])
+
+def describe(values: array) -> dict[str, float]:
+    if not values:
+        return dict.fromkeys(('mean', 'stdev', 'median', 'p95', 'p99', 'max'), 0.0)
+
+    s = sorted(values)
+    last = len(s) - 1
+    mean = fsum(s) / len(s)
+    return {
+        'mean': mean,
+        # `statistics.pstdev` is exact but far too slow for a whole replay
+        'stdev': sqrt(fsum([(v - mean) * (v - mean) for v in s]) / len(s)),
+        'median': s[last // 2] if last % 2 == 0 else (s[last // 2] + s[last // 2 + 1]) / 2,
+        'p95': s[round(last * 0.95)],
+        'p99': s[round(last * 0.99)],
+        'max': s[-1]
+    }
+
+class Kinematics:
+    def __init__(
+        self, times: array, x: array, y: array,
+        clock_rate: float = 1.0
+    ) -> None:
+        """
+        Cursor velocity, acceleration and jerk (magnitudes, in osu!px per ms^n of
+        song time) from sorted frame `times` and positions, e.g. a `FrameIndex`.
+        Every series is one element shorter than the one it's derived from.
+        """
+        self.clock_rate = clock_rate
+        self.frame_times = _diff(times)
+
+        # frames sharing a timestamp would divide by zero, keep the last one of each
+        if 0.0 in self.frame_times:
+            keep = [i for i, dt in enumerate(self.frame_times) if dt] + [len(times) - 1]
+            times = array('d', [times[i] for i in keep])
+            x = array('d', [x[i] for i in keep])
+            y = array('d', [y[i] for i in keep])
+
+        self.times = times
+
+        dt = _diff(times)
+        vx = array('d', map(truediv, _diff(x), dt))
+        vy = array('d', map(truediv, _diff(y), dt))
+
+        times = _midpoints(times)
+        dt = _diff(times)
+        ax = array('d', map(truediv, _diff(vx), dt))
+        ay = array('d', map(truediv, _diff(vy), dt))
+
+        dt = _diff(_midpoints(times))
+        jx = array('d', map(truediv, _diff(ax), dt))
+        jy = array('d', map(truediv, _diff(ay), dt))
+
+        self.velocity = array('d', map(hypot, vx, vy))
+        self.acceleration = array('d', map(hypot, ax, ay))
+        self.jerk = array('d', map(hypot, jx, jy))
+
+    @classmethod
+    def from_replay(cls, replay: Replay) -> 'Kinematics':
+        index = replay.time_index
+        return cls(index.times, index.x, index.y, clock_rate(replay.mods))
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """
+        `describe` of every series. `frame_time` is in song time, `real_frame_time`
+        is that divided by the clock rate, which is what stays around the player's
+        frame rate (~16.67ms at 60fps) unless the replay was timewarped.
+        """
+        return {
+            'frame_time': describe(self.frame_times),
+            'real_frame_time': {k: v / self.clock_rate for k, v in describe(self.frame_times).items()},
+            'velocity': describe(self.velocity),
+            'acceleration': describe(self.acceleration),
+            'jerk': describe(self.jerk)
+        }
+
+def analyse_file(path: str) -> dict[str, dict[str, float]]:
+    return Kinematics.from_replay(Replay.from_file(path, columnar = True)).summary()
+
+def analyse_many(
+    paths: Iterable[str], workers: Optional[int] = None,
+    chunksize: int = 16
+) -> Iterator[tuple[str, Union[dict[str, dict[str, float]], Exception]]]:
+    """
+    `analyse_file` over a process pool, see `process_files`. Only the
+    summaries are sent back from the workers, not the frames.
+    """
+    return process_files(analyse_file, paths, workers, chunksize)
@@ -1,17 +1,40 @@
 # Don't use
 from .utils import string_to_key
 from .utils import isdecimal
+from .utils import format_number
+from .curves import SliderPath
+from .stacking import OBJECT_CIRCLE
+from .stacking import OBJECT_SLIDER
+from .stacking import OBJECT_SPINNER
+from .stacking import stack_heights
+from .stacking import stack_heights_old
 from typing import Optional
 from typing import Union
+from typing import Iterable
+from typing import Iterator
+from typing import BinaryIO
+import sys
+import struct
+from io import BytesIO
+import hashlib
+from math import isnan
+from array import array
+from bisect import bisect_right
 from enum import IntEnum
 from enum import IntFlag
 from enum import Enum
+from mmap import mmap as memory_map
+from mmap import ACCESS_READ
 
 class Bookmark:
+    __slots__ = ('time_stamp',)
+
     def __init__(self, time_stamp: int) -> None:
         self.time_stamp = time_stamp
 
 class CurvePoint:
+    __slots__ = ('x', 'y')
+
     def __init__(self, x: int, y: int) -> None:
         self.x = x 
         self.y = y
@@ -28,6 +51,8 @@ class CurveType(Enum):
     Perfect_Circle = 'P'
 
 class HitSample:
+    __slots__ = ('normal_set', 'addition_set', 'index', 'volume', 'filename')
+
     def __init__(
         self, normal_set: int,
         addition_set: int,
@@ -42,13 +67,19 @@ class HitSample:
         self.filename = filename
 
 class HitObject:
+    __slots__ = (
+        'x', 'y', 'type', 'time_when_object_hit',
+        'hit_sound', 'hit_sample', 'params'
+    )
+
     def __init__(self) -> None:
-        self.x: int
-        self.y: int
-        self._type: int
-        self.type: HitObjectType
-        self.time_when_object_hit: int
-        self.params: Optional[ObjectParams]
+        self.x: int = 0
+        self.y: int = 0
+        self.type: int = 0
+        self.time_when_object_hit: int = 0
+        self.hit_sound: HitSound = HitSound(0)
+        self.hit_sample: Optional[HitSample] = None
+        self.params: Optional[ObjectParams] = None
 
 class HitObjectType(IntFlag):
     HIT_CIRCLE = 1 << 0
@@ -61,8 +92,22 @@ class HitObjectType(IntFlag):
     MANIA_HOLD = 1 << 7
 
 class ObjectParams:
+    __slots__ = (
+        'curve', 'curve_points', 'slides', 'length',
+        'edge_sounds', 'edge_sets', 'end_time'
+    )
+
     def __init__(self) -> None:
-        ...
+        # Sliders
+        self.curve: Optional[CurveType] = None
+        self.curve_points: list[CurvePoint] = []
+        self.slides: int = 0
+        self.length: float = 0.0
+        self.edge_sounds: list[int] = []
+        self.edge_sets: list[tuple[int, int]] = []
+
+        # Spinners, mania holds
+        self.end_time: Optional[int] = None
     
     @classmethod
     def from_raw_params(
@@ -121,6 +166,11 @@ class SampleSet(IntEnum):
     Drum = 3
 
 class TimingPoint:
+    __slots__ = (
+        'start_time', 'beat_length', 'meter', 'sample_set',
+        'sample_index', 'volume', 'uninherited', 'effects'
+    )
+
     def __init__(
         self, start_time: int,
         beat_length: float,
@@ -158,17 +208,20 @@ class EventType(IntEnum):
         }[s.lower()])
 
 class EventParams:
-    def __init__(self) -> None:
-        # Background
-        self.file_name: str
-        self.offset_x: int
-        self.offset_y: int
+    __slots__ = ('file_name', 'offset_x', 'offset_y', 'end_time', 'num1', 'num2')
 
-        # Video
-        ...
+    def __init__(self) -> None:
+        # Background, Video, Sample
+        self.file_name: Optional[str] = None
+        self.offset_x: int = 0
+        self.offset_y: int = 0
 
         # Breaks
-        self.end_time: int
+        self.end_time: Optional[int] = None
+
+        # Sample
+        self.num1: Optional[float] = None
+        self.num2: Optional[float] = None
 
         # Storyboards
         ...
@@ -204,6 +257,8 @@ class EventParams:
         return ep
 
 class Event:
+    __slots__ = ('event_type', 'start_time', 'event_params')
+
     def __init__(
         self, event_type: EventType,
         start_time: int, event_params: EventParams
@@ -212,9 +267,693 @@ class Event:
         self.start_time = start_time
         self.event_params = event_params
 
+class HitObjectView(HitObject):
+    """A `HitObject` reading and writing through to a row of a `HitObjectArray`."""
+    __slots__ = ('_objects', '_index')
+
+    def __init__(self, objects: 'HitObjectArray', index: int) -> None:
+        self._objects = objects
+        self._index = index
+
+    @property
+    def x(self) -> int:
+        return self._objects.x[self._index]
+
+    @x.setter
+    def x(self, x: int) -> None:
+        self._objects.x[self._index] = x
+
+    @property
+    def y(self) -> int:
+        return self._objects.y[self._index]
+
+    @y.setter
+    def y(self, y: int) -> None:
+        self._objects.y[self._index] = y
+
+    @property
+    def time_when_object_hit(self) -> int:
+        return self._objects.time[self._index]
+
+    @time_when_object_hit.setter
+    def time_when_object_hit(self, time: int) -> None:
+        self._objects.time[self._index] = time
+
+    @property
+    def type(self) -> int:
+        return self._objects.type[self._index]
+
+    @type.setter
+    def type(self, type: int) -> None:
+        self._objects.type[self._index] = type
+
+    @property
+    def hit_sound(self) -> HitSound:
+        return HitSound(self._objects.hit_sound[self._index])
+
+    @hit_sound.setter
+    def hit_sound(self, hit_sound: HitSound) -> None:
+        self._objects.hit_sound[self._index] = int(hit_sound)
+
+    @property
+    def hit_sample(self) -> HitSample:
+        return HitSampleView(self._objects, self._index)
+
+    @hit_sample.setter
+    def hit_sample(self, hit_sample: HitSample) -> None:
+        view = HitSampleView(self._objects, self._index)
+        for name in HitSample.__slots__:
+            setattr(view, name, getattr(hit_sample, name))
+
+    @property
+    def params(self) -> Optional[ObjectParams]:
+        if not self.type & (HitObjectType.SLIDER | HitObjectType.SPINNER | HitObjectType.MANIA_HOLD):
+            return None
+
+        return ObjectParamsView(self._objects, self._index)
+
+    @params.setter
+    def params(self, params: Optional[ObjectParams]) -> None:
+        view = ObjectParamsView(self._objects, self._index)
+        for name in ObjectParams.__slots__:
+            setattr(view, name, getattr(params, name) if params is not None else None)
+
+class HitSampleView(HitSample):
+    """A `HitSample` reading and writing through to a row of a `HitObjectArray`."""
+    __slots__ = ('_objects', '_index')
+
+    def __init__(self, objects: 'HitObjectArray', index: int) -> None:
+        self._objects = objects
+        self._index = index
+
+    @property
+    def normal_set(self) -> int:
+        return self._objects.sample_normal_set[self._index]
+
+    @normal_set.setter
+    def normal_set(self, normal_set: Optional[int]) -> None:
+        self._objects.sample_normal_set[self._index] = normal_set or 0
+
+    @property
+    def addition_set(self) -> int:
+        return self._objects.sample_addition_set[self._index]
+
+    @addition_set.setter
+    def addition_set(self, addition_set: Optional[int]) -> None:
+        self._objects.sample_addition_set[self._index] = addition_set or 0
+
+    @property
+    def index(self) -> int:
+        return self._objects.sample_index[self._index]
+
+    @index.setter
+    def index(self, index: Optional[int]) -> None:
+        self._objects.sample_index[self._index] = index or 0
+
+    @property
+    def volume(self) -> int:
+        return self._objects.sample_volume[self._index]
+
+    @volume.setter
+    def volume(self, volume: Optional[int]) -> None:
+        self._objects.sample_volume[self._index] = volume or 0
+
+    @property
+    def filename(self) -> str:
+        return self._objects.sample_filename[self._index]
+
+    @filename.setter
+    def filename(self, filename: Optional[str]) -> None:
+        self._objects.sample_filename[self._index] = filename or ''
+
+class ObjectParamsView(ObjectParams):
+    """
+    An `ObjectParams` reading and writing through to a row of a `HitObjectArray`.
+    The lists it returns are copies, assign them back after changing them.
+    `edge_sounds` and `edge_sets` are stored with one length, setting either
+    pads (with 0s) or cuts the other to match.
+    """
+    __slots__ = ('_objects', '_index')
+
+    def __init__(self, objects: 'HitObjectArray', index: int) -> None:
+        self._objects = objects
+        self._index = index
+
+    @property
+    def curve(self) -> Optional[CurveType]:
+        curve_type = self._objects.curve_type[self._index]
+        return CurveType(chr(curve_type)) if curve_type else None
+
+    @curve.setter
+    def curve(self, curve: Optional[CurveType]) -> None:
+        self._objects.curve_type[self._index] = ord(curve.value) if curve is not None else 0
+
+    @property
+    def curve_points(self) -> list[CurvePoint]:
+        return self._objects.curve_points(self._index)
+
+    @curve_points.setter
+    def curve_points(self, curve_points: Optional[list[CurvePoint]]) -> None:
+        points = curve_points or ()
+        self._objects.splice(
+            self._objects.curve_offsets, self._index,
+            (self._objects.curve_x, [p.x for p in points]),
+            (self._objects.curve_y, [p.y for p in points])
+        )
+
+    @property
+    def slides(self) -> int:
+        return self._objects.slides[self._index]
+
+    @slides.setter
+    def slides(self, slides: Optional[int]) -> None:
+        self._objects.slides[self._index] = slides or 0
+
+    @property
+    def length(self) -> float:
+        return self._objects.length[self._index]
+
+    @length.setter
+    def length(self, length: Optional[float]) -> None:
+        self._objects.length[self._index] = length or 0.0
+
+    @property
+    def edge_sounds(self) -> list[int]:
+        objects = self._objects
+        start, end = objects.edge_offsets[self._index], objects.edge_offsets[self._index + 1]
+        return objects.edge_sounds[start:end].tolist()
+
+    @edge_sounds.setter
+    def edge_sounds(self, edge_sounds: Optional[list[int]]) -> None:
+        edge_sounds = list(edge_sounds or ())
+        edge_sets = self.edge_sets[:len(edge_sounds)]
+        edge_sets += [(0, 0)] * (len(edge_sounds) - len(edge_sets))
+        self._set_edges(edge_sounds, edge_sets)
+
+    @property
+    def edge_sets(self) -> list[tuple[int, int]]:
+        objects = self._objects
+        start, end = objects.edge_offsets[self._index], objects.edge_offsets[self._index + 1]
+        return list(zip(
+            objects.edge_normal_sets[start:end],
+            objects.edge_addition_sets[start:end]
+        ))
+
+    @edge_sets.setter
+    def edge_sets(self, edge_sets: Optional[list[tuple[int, int]]]) -> None:
+        edge_sets = list(edge_sets or ())
+        edge_sounds = self.edge_sounds[:len(edge_sets)]
+        edge_sounds += [0] * (len(edge_sets) - len(edge_sounds))
+        self._set_edges(edge_sounds, edge_sets)
+
+    def _set_edges(self, edge_sounds: list[int], edge_sets: list[tuple[int, int]]) -> None:
+        objects = self._objects
+        objects.splice(
+            objects.edge_offsets, self._index,
+            (objects.edge_sounds, edge_sounds),
+            (objects.edge_normal_sets, [normal for normal, _ in edge_sets]),
+            (objects.edge_addition_sets, [addition for _, addition in edge_sets])
+        )
+
+    @property
+    def end_time(self) -> Optional[int]:
+        end_time = self._objects.end_time[self._index]
+        return end_time if end_time != -1 else None
+
+    @end_time.setter
+    def end_time(self, end_time: Optional[int]) -> None:
+        self._objects.end_time[self._index] = end_time if end_time is not None else -1
+
+class HitObjectArray:
+    def __init__(self) -> None:
+        """
+        Columnar storage for hit objects, one contiguous `array` per field and
+        the slider curve points / edge sounds of every object flattened into shared
+        buffers (`curve_offsets[i]:curve_offsets[i + 1]` are object `i`'s points).
+        Indexing returns `HitObjectView`s so it can be used like `list[HitObject]`,
+        their `hit_sample` and `params` write through to the columns too.
+        """
+        self.x = array('i')
+        self.y = array('i')
+        self.time = array('i')
+        self.type = array('i')
+        self.hit_sound = array('i')
+
+        # spinners and mania holds, -1 for everything else
+        self.end_time = array('i')
+
+        # sliders, 0 for everything else
+        self.curve_type = array('B')
+        self.slides = array('i')
+        self.length = array('d')
+        self.curve_offsets = array('i', [0])
+        self.curve_x = array('i')
+        self.curve_y = array('i')
+        self.edge_offsets = array('i', [0])
+        self.edge_sounds = array('i')
+        self.edge_normal_sets = array('i')
+        self.edge_addition_sets = array('i')
+
+        self.sample_normal_set = array('i')
+        self.sample_addition_set = array('i')
+        self.sample_index = array('i')
+        self.sample_volume = array('i')
+        self.sample_filename: list[str] = []
+
+    def append(self, line: str) -> None:
+        """Parses and appends one `[HitObjects]` line."""
+        line = line.split(',', 5)
+        type = int(line[3])
+        self.x.append(int(line[0]))
+        self.y.append(int(line[1]))
+        self.time.append(int(line[2]))
+        self.type.append(type)
+        self.hit_sound.append(int(line[4]))
+
+        extras = line[5] if len(line) > 5 else ''
+        end_time = -1
+        curve_type = slides = 0
+        length = 0.0
+        hit_sample = '0:0:0:0:'
+
+        if type & HitObjectType.SLIDER:
+            _line = extras.split(',')
+            curve_type = ord(_line[0][0])
+            for point in _line[0][2:].split('|'):
+                x, y = point.split(':')
+                self.curve_x.append(int(x))
+                self.curve_y.append(int(y))
+
+            slides = int(_line[1])
+            length = float(_line[2])
+
+            if len(_line) > 3:
+                edge_sounds = _line[3].split('|')
+                self.edge_sounds.extend(map(int, edge_sounds))
+
+                edge_sets = _line[4].split('|') if len(_line) > 4 else ['0:0'] * len(edge_sounds)
+                for edge_set in edge_sets:
+                    normal_set, addition_set = edge_set.split(':', 1)
+                    self.edge_normal_sets.append(int(normal_set))
+                    self.edge_addition_sets.append(int(addition_set))
+
+            if len(_line) > 5:
+                hit_sample = _line[5]
+        elif type & HitObjectType.SPINNER:
+            split = extras.split(',', 1)
+            end_time = int(split[0])
+            if len(split) > 1:
+                hit_sample = split[1]
+        elif type & HitObjectType.MANIA_HOLD:
+            end_time, hit_sample = extras.split(':', 1)
+            end_time = int(end_time)
+        elif extras:
+            hit_sample = extras
+
+        self.end_time.append(end_time)
+        self.curve_type.append(curve_type)
+        self.slides.append(slides)
+        self.length.append(length)
+        self.curve_offsets.append(len(self.curve_x))
+        self.edge_offsets.append(len(self.edge_sounds))
+
+        ns, ads, i, volume, filename = hit_sample.split(':')
+        self.sample_normal_set.append(int(ns))
+        self.sample_addition_set.append(int(ads))
+        self.sample_index.append(int(i))
+        self.sample_volume.append(int(volume))
+        self.sample_filename.append(filename)
+
+    def hit_sample(self, index: int) -> HitSample:
+        return HitSample(
+            self.sample_normal_set[index], self.sample_addition_set[index],
+            self.sample_index[index], self.sample_volume[index],
+            self.sample_filename[index]
+        )
+
+    def curve_points(self, index: int) -> list[CurvePoint]:
+        start, end = self.curve_offsets[index], self.curve_offsets[index + 1]
+        return [
+            CurvePoint(x, y) for x, y in 
+            zip(self.curve_x[start:end], self.curve_y[start:end])
+        ]
+
+    def splice(self, offsets: array, index: int, *columns: tuple[array, list]) -> None:
+        """
+        Replaces object `index`'s part of flattened `columns` (all split by
+        `offsets`) with new values, shifting the offsets of every later object.
+        """
+        start, end = offsets[index], offsets[index + 1]
+        length = 0
+        for column, values in columns:
+            column[start:end] = array(column.typecode, values)
+            length = len(values)
+
+        shift = length - (end - start)
+        if shift:
+            offsets[index + 1:] = array(offsets.typecode, [offset + shift for offset in offsets[index + 1:]])
+
+    def params(self, index: int) -> Optional[ObjectParams]:
+        """Builds the `ObjectParams` the row based parser would have made."""
+        type = self.type[index]
+        if type & HitObjectType.SLIDER:
+            params = ObjectParams()
+            params.curve = CurveType(chr(self.curve_type[index]))
+            params.curve_points = self.curve_points(index)
+            params.slides = self.slides[index]
+            params.length = self.length[index]
+
+            start, end = self.edge_offsets[index], self.edge_offsets[index + 1]
+            params.edge_sounds = self.edge_sounds[start:end].tolist()
+            params.edge_sets = list(zip(
+                self.edge_normal_sets[start:end],
+                self.edge_addition_sets[start:end]
+            ))
+            return params
+        elif type & (HitObjectType.SPINNER | HitObjectType.MANIA_HOLD):
+            params = ObjectParams()
+            params.end_time = self.end_time[index]
+            return params
+
+        return None
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[HitObjectView, list[HitObjectView]]:
+        if isinstance(index, slice):
+            return [HitObjectView(self, i) for i in range(len(self))[index]]
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError('hit object index out of range')
+
+        return HitObjectView(self, index)
+
+    def __iter__(self) -> Iterator[HitObjectView]:
+        for i in range(len(self)):
+            yield HitObjectView(self, i)
+
+class TimingState:
+    __slots__ = (
+        'time', 'beat_length', 'meter', 'slider_velocity', 'sample_set',
+        'sample_index', 'volume', 'kiai'
+    )
+
+    def __init__(
+        self, time: float,
+        beat_length: float,
+        meter: int,
+        slider_velocity: float,
+        sample_set: SampleSet,
+        sample_index: int,
+        volume: int,
+        kiai: bool
+    ) -> None:
+        """The timing in effect from `time`, red and green lines combined."""
+        self.time = time
+        self.beat_length = beat_length
+        self.meter = meter
+        self.slider_velocity = slider_velocity
+        self.sample_set = sample_set
+        self.sample_index = sample_index
+        self.volume = volume
+        self.kiai = kiai
+
+    @property
+    def bpm(self) -> float:
+        return 60000 / self.beat_length
+
+class TimingIndex:
+    def __init__(self, timing_points: list[TimingPoint]) -> None:
+        """
+        Timing points merged into one `TimingState` per time anything changes,
+        for O(log n) lookups. Like osu!, a red line resets the slider velocity
+        to 1x unless a green line at the same time sets it, and times before the
+        first point use the first red line's timing.
+        """
+        self.times = array('d')
+        self.states: list[TimingState] = []
+
+        # red lines go first so green lines at the same time apply on top of them
+        points = sorted(timing_points, key = lambda p: (p.start_time, not p.uninherited))
+        uninherited = [p for p in points if p.uninherited]
+        if not uninherited:
+            return
+
+        beat_length = uninherited[0].beat_length
+        meter = uninherited[0].meter
+        slider_velocity = 1.0
+
+        for point in points:
+            if point.uninherited:
+                beat_length = point.beat_length
+                meter = point.meter
+                slider_velocity = 1.0
+            elif isnan(point.beat_length) or point.beat_length >= 0:
+                slider_velocity = 1.0
+            else:
+                slider_velocity = min(max(-100 / point.beat_length, 0.1), 10.0)
+
+            state = TimingState(
+                point.start_time, beat_length, meter, slider_velocity,
+                point.sample_set, point.sample_index, point.volume,
+                bool(point.effects & Effects.Kiai_Enabled)
+            )
+
+            if self.times and self.times[-1] == point.start_time:
+                self.states[-1] = state
+            else:
+                self.times.append(point.start_time)
+                self.states.append(state)
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def timing_at(self, time: float) -> Optional[TimingState]:
+        """The timing in effect at `time`, `None` if there are no red lines."""
+        if not self.states:
+            return None
+
+        return self.states[max(bisect_right(self.times, time) - 1, 0)]
+
+    def timings_at(self, times: Iterable[float]) -> list[Optional[TimingState]]:
+        """
+        `timing_at` for many times in one pass, walking forward while `times`
+        are sorted and only bisecting when they go backwards.
+        """
+        if not self.states:
+            return [None for _ in times]
+
+        states = self.states
+        boundaries = self.times
+        count = len(boundaries)
+        results = []
+        i = 0
+        last = float('-inf')
+
+        for time in times:
+            if time < last:
+                i = max(bisect_right(boundaries, time) - 1, 0)
+
+            while i + 1 < count and boundaries[i + 1] <= time:
+                i += 1
+
+            results.append(states[i])
+            last = time
+
+        return results
+
+class SliderTiming:
+    __slots__ = (
+        'start_time', 'end_time', 'span_duration', 'velocity',
+        'repeat_times', 'tick_times', 'tick_progress'
+    )
+
+    def __init__(
+        self, start_time: float, slides: int, length: float,
+        timing: TimingState, slider_multiplier: float,
+        slider_tick_rate: float, file_version: float = 14
+    ) -> None:
+        """
+        When a slider's spans, repeats and ticks happen. `velocity` is in osu!px
+        per ms, `tick_progress` is how far along the path (0 - 1, see `SliderPath`)
+        each tick in `tick_times` is. Ticks closer than 10ms to the end of a span
+        are dropped, like osu! does.
+        """
+        slides = max(slides, 1)
+        scoring_distance = 100 * slider_multiplier * timing.slider_velocity
+        self.start_time = start_time
+        self.velocity = scoring_distance / timing.beat_length
+        self.span_duration = length / self.velocity if length > 0 else 0.0
+        self.end_time = start_time + self.span_duration * slides
+        self.repeat_times = [start_time + self.span_duration * i for i in range(1, slides)]
+
+        # maps before v8 didn't scale tick spacing with the slider velocity
+        tick_distance = scoring_distance / slider_tick_rate
+        if file_version < 8:
+            tick_distance /= timing.slider_velocity
+
+        distances = []
+        if 0 < tick_distance < length:
+            end = length - self.velocity * 10
+            distance = tick_distance
+            while distance < end:
+                distances.append(distance / length)
+                distance += tick_distance
+
+        self.tick_times = []
+        self.tick_progress = []
+        for span in range(slides):
+            span_start = start_time + self.span_duration * span
+            # every other span runs from the end back to the head
+            reverse = span % 2 == 1
+            for progress in reversed(distances) if reverse else distances:
+                span_progress = 1 - progress if reverse else progress
+                self.tick_times.append(span_start + span_progress * self.span_duration)
+                self.tick_progress.append(progress)
+
+    @property
+    def combo(self) -> int:
+        """Head, ticks, repeats and tail."""
+        return 2 + len(self.repeat_times) + len(self.tick_times)
+
+def approach_time(approach_rate: float) -> float:
+    """How long (ms) before its time an object appears at `approach_rate`."""
+    if approach_rate <= 5:
+        return 1800 - 120 * approach_rate
+
+    return 1200 - 150 * (approach_rate - 5)
+
+class Stacking:
+    __slots__ = ('heights', 'offset', 'x', 'y')
+
+    def __init__(self, heights: array, offset: float, x: array, y: array) -> None:
+        """
+        Every hit object's stack height and stacked position, each height moves
+        an object `offset` osu!px (negative, towards the top left) along both axes.
+        """
+        self.heights = heights
+        self.offset = offset
+        self.x = x
+        self.y = y
+
+def split_sections(lines: list[str]) -> dict[str, tuple[int, int]]:
+    """
+    Finds every `[Section]` in one pass over `lines`, returning the
+    `(start, end)` line span of each section's body. A section ends where the
+    next header starts, blank lines between sections aren't required.
+    """
+    sections = {}
+    name = None
+    start = 0
+
+    for i, line in enumerate(lines):
+        if line[:1] != '[':
+            continue
+
+        line = line.rstrip()
+        if line[-1:] != ']':
+            continue
+
+        if name is not None:
+            sections[name] = (start, i)
+
+        name = line
+        start = i + 1
+
+    if name is not None:
+        sections[name] = (start, len(lines))
+
+    return sections
+
+def read_sections(
+    content: Union[bytes, memory_map, BinaryIO], 
+    sections: Iterable[str]
+) -> list[str]:
+    """
+    Decodes lines of `content` (bytes, a mmap or a file opened in binary mode)
+    until every section in `sections` has been read, the rest is never read.
+    """
+    wanted = set(sections)
+    stream = content if hasattr(content, 'readline') else BytesIO(content)
+    lines = []
+
+    for raw_line in iter(stream.readline, b''):
+        line = str(raw_line, 'utf-8').rstrip('\r\n')
+        if line[:1] == '[' and line.rstrip()[-1:] == ']':
+            if not wanted:
+                break
+
+            wanted.discard(line.rstrip())
+
+        lines.append(line)
+
+    return lines
+
+BEATMAP_CACHE_MAGIC = b'BBC'
+BEATMAP_CACHE_VERSION = 1
+beatmap_cache_header = struct.Struct('<3sBB?16sIIIIII')
+
+# sections `to_bytes` writes key by key, in the order osu! writes them
+KEY_VALUE_SECTIONS = ('[General]', '[Editor]', '[Metadata]', '[Difficulty]')
+
+# `HitObjectArray` columns as `save_cache` writes them, with what their length
+# is: 0 one per object, 1 one more than that, 2 one per curve point, 3 one per edge
+HIT_OBJECT_CACHE_COLUMNS = (
+    ('x', 0), ('y', 0), ('time', 0), ('type', 0), ('hit_sound', 0),
+    ('end_time', 0), ('curve_type', 0), ('slides', 0), ('length', 0),
+    ('curve_offsets', 1), ('curve_x', 2), ('curve_y', 2),
+    ('edge_offsets', 1), ('edge_sounds', 3), ('edge_normal_sets', 3),
+    ('edge_addition_sets', 3), ('sample_normal_set', 0),
+    ('sample_addition_set', 0), ('sample_index', 0), ('sample_volume', 0)
+)
+
 class Beatmap:
-    def __init__(self, content: bytes) -> None:
-        self.map = content.decode().splitlines()
+    def __init__(
+        self, content: Union[bytes, memory_map, BinaryIO],
+        sections: Optional[Iterable[str]] = None,
+        lazy: bool = False,
+        columnar: bool = False,
+        md5: Optional[str] = None
+    ) -> None:
+        """
+        `sections` (e.g. `('[Metadata]', '[Difficulty]')`) limits parsing to those
+        sections, and reading `content` stops once they're all read; list sections
+        past that point come back empty.
+        If `lazy` is set `events`, `timing_points` and `hit_objects` are
+        only parsed the first time they're accessed.
+        If `columnar` is set `hit_objects` will be a `HitObjectArray`.
+        `md5` is the hex digest of `content`, see `md5`. Passing it in skips
+        hashing `content` (`''` for no digest), `load_cache` already has it.
+        """
+        if sections is None and hasattr(content, 'read') and not isinstance(content, memory_map):
+            # everything gets parsed, no point reading line by line
+            content = content.read()
+
+        self._md5: Optional[str] = None
+        # what `md5` hashes on first use: the bytes, or the file's path (`from_file`)
+        self._md5_source: Optional[Union[bytes, str]] = None
+        if md5 is not None:
+            self._md5 = md5 or None
+        elif sections is None:
+            # all of it is read anyway
+            self._md5 = hashlib.md5(content).hexdigest()
+        elif not hasattr(content, 'read'):
+            self._md5_source = content
+
+        if sections is None:
+            self.map = str(content, 'utf-8').splitlines()
+        else:
+            sections = set(sections)
+            self.map = read_sections(content, sections)
+
+        self.section_spans = split_sections(self.map)
+        self._sections = sections
+        self._lazy = lazy
+        self._columnar = columnar
         self.file_version: int
         self.audio_filename: str
         self.audio_lead_in: int = 0
@@ -250,19 +989,327 @@ class Beatmap:
         self.hp_drain_rate: float
         self.circle_size: float
         self.overall_difficulty: float
-        self.approach_rate: float
+        # `approach_rate`, `None` for maps from before it existed
+        self._approach_rate: Optional[float] = None
         self.slider_multiplier: float
         self.slider_tick_rate: float
         self.combo_colors: list[tuple[int]] = []
         self.slider_track_colors: list[tuple[int]] = []
         self.slider_border_colors: list[tuple[int]] = [] 
-        self.events: list[Event] = []
-        self.timing_points: list[TimingPoint] = []
-        self.hit_objects: list[HitObject] = []
+        self._events: Optional[list[Event]] = None
+        self._timing_points: Optional[list[TimingPoint]] = None
+        self._hit_objects: Optional[Union[list[HitObject], HitObjectArray]] = None
+        self._timing_index: Optional[TimingIndex] = None
+        self._slider_timings: Optional[dict[int, SliderTiming]] = None
+        self._slider_paths: dict[int, SliderPath] = {}
+        self._stacking: dict[tuple[float, float], Stacking] = {}
         self.parse()
+
+    @property
+    def md5(self) -> Optional[str]:
+        """
+        Hex digest of the `.osu`. With `sections` it's only hashed on first
+        use, `None` for a mmap or file object that didn't come from `from_file`.
+        """
+        if self._md5 is None and self._md5_source is not None:
+            source = self._md5_source
+            if isinstance(source, str):
+                with open(source, 'rb') as f:
+                    self._md5 = hashlib.md5(f.read()).hexdigest()
+            else:
+                self._md5 = hashlib.md5(source).hexdigest()
+
+            self._md5_source = None
+
+        return self._md5
+
+    @md5.setter
+    def md5(self, digest: Optional[str]) -> None:
+        self._md5 = digest
+        self._md5_source = None
+
+    @property
+    def approach_rate(self) -> float:
+        """`ApproachRate`, maps from before it existed use `overall_difficulty`."""
+        if self._approach_rate is None:
+            return self.overall_difficulty
+
+        return self._approach_rate
+
+    @approach_rate.setter
+    def approach_rate(self, approach_rate: Optional[float]) -> None:
+        self._approach_rate = approach_rate
+
+    @property
+    def events(self) -> list[Event]:
+        if self._events is None:
+            self.parse_events()
+
+        return self._events
+
+    @events.setter
+    def events(self, events: list[Event]) -> None:
+        self._events = events
+
+    @property
+    def timing_points(self) -> list[TimingPoint]:
+        if self._timing_points is None:
+            self.parse_timing_points()
+
+        return self._timing_points
+
+    @timing_points.setter
+    def timing_points(self, timing_points: list[TimingPoint]) -> None:
+        self._timing_points = timing_points
+        self._timing_index = None
+        self._slider_timings = None
+        self._stacking = {}
+
+    @property
+    def timing_index(self) -> TimingIndex:
+        """
+        Built on first use, reassign `timing_points` after editing
+        them in place to rebuild it.
+        """
+        if self._timing_index is None:
+            self._timing_index = TimingIndex(self.timing_points)
+
+        return self._timing_index
+
+    def timing_at(self, time: float) -> Optional[TimingState]:
+        return self.timing_index.timing_at(time)
+
+    def hit_object_timings(self) -> list[Optional[TimingState]]:
+        """The timing in effect at every hit object, in `hit_objects` order."""
+        hit_objects = self.hit_objects
+        if isinstance(hit_objects, HitObjectArray):
+            times = hit_objects.time
+        else:
+            times = [obj.time_when_object_hit for obj in hit_objects]
+
+        return self.timing_index.timings_at(times)
+
+    @property
+    def slider_timings(self) -> dict[int, SliderTiming]:
+        """
+        `SliderTiming` of every slider by hit object index, computed for all of
+        them in one pass over the timing points on first use.
+        """
+        if self._slider_timings is not None:
+            return self._slider_timings
+
+        hit_objects = self.hit_objects
+        timings = self.hit_object_timings()
+        slider_multiplier = float(self.slider_multiplier)
+        slider_tick_rate = float(self.slider_tick_rate)
+        self._slider_timings = slider_timings = {}
+
+        if isinstance(hit_objects, HitObjectArray):
+            for index, (time, type, slides, length) in enumerate(zip(
+                hit_objects.time, hit_objects.type,
+                hit_objects.slides, hit_objects.length
+            )):
+                if type & HitObjectType.SLIDER and timings[index] is not None:
+                    slider_timings[index] = SliderTiming(
+                        time, slides, length, timings[index],
+                        slider_multiplier, slider_tick_rate, self.file_version
+                    )
+        else:
+            for index, obj in enumerate(hit_objects):
+                if obj.type & HitObjectType.SLIDER and timings[index] is not None:
+                    slider_timings[index] = SliderTiming(
+                        obj.time_when_object_hit, obj.params.slides,
+                        obj.params.length, timings[index],
+                        slider_multiplier, slider_tick_rate, self.file_version
+                    )
+
+        return slider_timings
+
+    def stacking(
+        self, approach_rate: Optional[float] = None,
+        circle_size: Optional[float] = None
+    ) -> Stacking:
+        """
+        osu!'s stacking of `hit_objects` (which have to be sorted by time) at
+        `approach_rate` and `circle_size`, the beatmap's own by default; HR/EZ
+        change both. Cached per AR and CS until hit objects or timing points are
+        reparsed or reassigned.
+        """
+        if approach_rate is None:
+            approach_rate = self.approach_rate
+        if circle_size is None:
+            circle_size = self.circle_size
+
+        key = (approach_rate, circle_size)
+        if key in self._stacking:
+            return self._stacking[key]
+
+        hit_objects = self.hit_objects
+        slider_timings = self.slider_timings
+        old = self.file_version < 6
+
+        kinds = array('b')
+        start = array('d')
+        end = array('d')
+        x = array('d')
+        y = array('d')
+        end_x = array('d')
+        end_y = array('d')
+
+        for index, obj in enumerate(hit_objects):
+            time = obj.time_when_object_hit
+            start.append(time)
+            x.append(obj.x)
+            y.append(obj.y)
+
+            if obj.type & HitObjectType.SLIDER:
+                kinds.append(OBJECT_SLIDER)
+                timing = slider_timings.get(index)
+                end.append(time if timing is None else timing.end_time)
+                repeats = 0 if timing is None else len(timing.repeat_times)
+
+                path = self.slider_path(index)
+                # old maps stack on the end of the path, new ones on where the slider ends
+                if not old and repeats % 2 == 1:
+                    px, py = path.x[0], path.y[0]
+                else:
+                    px, py = path.end_position
+
+                end_x.append(px)
+                end_y.append(py)
+                continue
+            elif obj.type & HitObjectType.SPINNER:
+                kinds.append(OBJECT_SPINNER)
+                end.append(obj.params.end_time)
+            else:
+                kinds.append(OBJECT_CIRCLE)
+                end.append(time)
+
+            end_x.append(obj.x)
+            end_y.append(obj.y)
+
+        threshold = approach_time(approach_rate) * self.stack_leniency
+        calculate = stack_heights_old if old else stack_heights
+        heights = calculate(kinds, start, end, x, y, end_x, end_y, threshold)
+
+        # a tenth of the radius per height, 3.2 osu!px at CS5 (a 32px radius)
+        offset = -6.4 * (1 - 0.7 * (circle_size - 5) / 5) / 2
+        result = self._stacking[key] = Stacking(
+            heights, offset,
+            array('d', [p + h * offset for p, h in zip(x, heights)]),
+            array('d', [p + h * offset for p, h in zip(y, heights)])
+        )
+        return result
+
+    @property
+    def max_combo(self) -> int:
+        """
+        osu!standard max combo: one per circle and spinner, plus
+        every slider's head, ticks, repeats and tail.
+        """
+        slider_timings = self.slider_timings
+        return (
+            len(self.hit_objects) - len(slider_timings) +
+            sum(timing.combo for timing in slider_timings.values())
+        )
+
+    @property
+    def hit_objects(self) -> Union[list[HitObject], HitObjectArray]:
+        if self._hit_objects is None:
+            self.parse_hit_objects()
+
+        return self._hit_objects
+
+    @hit_objects.setter
+    def hit_objects(self, hit_objects: Union[list[HitObject], HitObjectArray]) -> None:
+        self._hit_objects = hit_objects
+        self._slider_paths = {}
+        self._slider_timings = None
+        self._stacking = {}
+
+    def slider_path(self, index: int) -> Optional[SliderPath]:
+        """
+        The path of hit object `index`, `None` if it isn't a slider. Paths are
+        cached on the beatmap, reassign `hit_objects` after editing sliders in place.
+        """
+        hit_objects = self.hit_objects
+        if index < 0:
+            index += len(hit_objects)
+
+        if index in self._slider_paths:
+            return self._slider_paths[index]
+
+        if isinstance(hit_objects, HitObjectArray):
+            if not hit_objects.type[index] & HitObjectType.SLIDER:
+                return None
+
+            start, end = hit_objects.curve_offsets[index], hit_objects.curve_offsets[index + 1]
+            curve = chr(hit_objects.curve_type[index])
+            points = [(hit_objects.x[index], hit_objects.y[index])]
+            points += zip(hit_objects.curve_x[start:end], hit_objects.curve_y[start:end])
+            length = hit_objects.length[index]
+        else:
+            obj = hit_objects[index]
+            if not obj.type & HitObjectType.SLIDER:
+                return None
+
+            curve = obj.params.curve.value
+            points = [(obj.x, obj.y)] + [(p.x, p.y) for p in obj.params.curve_points]
+            length = obj.params.length
+
+        path = self._slider_paths[index] = SliderPath(curve, points, length)
+        return path
+
+    def slider_paths(self) -> dict[int, SliderPath]:
+        """`slider_path` of every slider, by hit object index."""
+        paths = {}
+        for index in range(len(self.hit_objects)):
+            path = self.slider_path(index)
+            if path is not None:
+                paths[index] = path
+
+        return paths
     
+    @classmethod
+    def from_file(
+        cls, path: str, mmap: bool = False,
+        sections: Optional[Iterable[str]] = None,
+        lazy: bool = False,
+        columnar: bool = False
+    ) -> 'Beatmap':
+        """If `mmap` is set the file is decoded straight from a memory-mapped region."""
+        with open(path, 'rb') as f:
+            if mmap:
+                with memory_map(f.fileno(), 0, access = ACCESS_READ) as content:
+                    beatmap = cls(content, sections, lazy, columnar)
+            elif sections is not None:
+                # read straight from the file so it can stop early
+                beatmap = cls(f, sections, lazy, columnar)
+            else:
+                beatmap = cls(f.read(), sections, lazy, columnar)
+
+        if sections is not None:
+            # only read the whole file again if `md5` is used
+            beatmap._md5_source = path
+
+        return beatmap
+
     def modify_metadata(self) -> None:
-        self.tags = self.tags.split()
+        if isinstance(self.tags, str):
+            self.tags = self.tags.split()
+
+    def section_lines(self, section: str) -> Iterator[str]:
+        """Lines of `section` without blank lines, comments and trailing whitespace."""
+        if section not in self.section_spans:
+            return
+
+        start, end = self.section_spans[section]
+        for line in self.map[start:end]:
+            line = line.rstrip()
+            if not line or line[:2] == '//':
+                continue
+
+            yield line
 
     def parse_file_version(self) -> None:
         version = []
@@ -280,32 +1327,53 @@ class Beatmap:
         else:
             self.bookmarks = [Bookmark(int(x)) for x in self.bookmarks.split(',')]
 
+    def wants(self, section: str) -> bool:
+        return self._sections is None or section in self._sections
+
     def parse(self) -> None:
         self.parse_file_version()
-        self.parse_section('[General]')
+        if self.wants('[General]'):
+            self.parse_section('[General]')
         
-        self.parse_section('[Editor]')
-        self.modify_editor()
+        if self.wants('[Editor]'):
+            self.parse_section('[Editor]')
+            self.modify_editor()
+
+        if self.wants('[Metadata]'):
+            self.parse_section('[Metadata]')
+            self.modify_metadata()
 
-        self.parse_section('[Metadata]')
-        self.modify_metadata()
+        if self.wants('[Difficulty]'):
+            self.parse_section('[Difficulty]')
 
-        self.parse_section('[Difficulty]')
-        self.parse_section('[Colours]')
+        if self.wants('[Colours]'):
+            self.parse_section('[Colours]')
         
-        self.parse_events()
-        self.parse_timing_points()
-        self.parse_hit_objects()
+        if self._lazy:
+            return
+
+        if self.wants('[Events]'):
+            self.parse_events()
+
+        if self.wants('[TimingPoints]'):
+            self.parse_timing_points()
+
+        if self.wants('[HitObjects]'):
+            self.parse_hit_objects()
 
     def parse_hit_objects(self) -> None:
-        index = self.map.index('[HitObjects]') + 1
-        for line in self.map[index:]:
-            if not line:
-                break
-            
-            if line[:2] == '//':
-                continue
+        self._slider_paths = {}
+        self._slider_timings = None
+        self._stacking = {}
+        if self._columnar:
+            self._hit_objects = hit_objects = HitObjectArray()
+            for line in self.section_lines('[HitObjects]'):
+                hit_objects.append(line)
 
+            return
+
+        self._hit_objects = hit_objects = []
+        for line in self.section_lines('[HitObjects]'):
             line = line.split(',', 5)
 
             obj = HitObject()
@@ -394,17 +1462,14 @@ class Beatmap:
                 )
                 obj.params = params
 
-            self.hit_objects.append(obj)
+            hit_objects.append(obj)
 
     def parse_timing_points(self) -> None:
-        index = self.map.index('[TimingPoints]') + 1
-        for line in self.map[index:]:
-            if not line:
-                break
-            
-            if line[:2] == '//':
-                continue
-            
+        self._timing_index = None
+        self._slider_timings = None
+        self._stacking = {}
+        self._timing_points = timing_points = []
+        for line in self.section_lines('[TimingPoints]'):
             line = line.split(',')
             start_time = float(line[0])
             beat_length = float(line[1])
@@ -415,7 +1480,7 @@ class Beatmap:
             uninherited = bool(int(line[6]))
             effects = Effects(int(line[7]))
 
-            self.timing_points.append(
+            timing_points.append(
                 TimingPoint(
                     start_time, beat_length,
                     meter, sample_set,
@@ -425,21 +1490,15 @@ class Beatmap:
             )
 
     def parse_events(self) -> None:
-        index = self.map.index('[Events]') + 1
-        for line in self.map[index:]:
-            if not line:
-                break
-            
-            if line[:2] == '//':
-                continue
-
+        self._events = events = []
+        for line in self.section_lines('[Events]'):
             event_type, start_time, params = line.split(',', 2)
             if event_type.isdecimal():
                 event_type = EventType(int(event_type))
             else:
                 event_type = EventType.from_str(event_type)
             
-            self.events.append(
+            events.append(
                 Event(
                     event_type, int(start_time), 
                     EventParams.from_raw_event_params(event_type, params)
@@ -447,34 +1506,248 @@ class Beatmap:
             )
 
     def parse_section(self, section: str) -> None:
-        if section not in self.map:
-            return
-        
-        index = self.map.index(section) + 1
-        for line in self.map[index:]:
-            if not line:
-                break
-            
-            if line[:2] == '//':
-                continue
-
+        for line in self.section_lines(section):
             k, v = line.split(':', 1)
             k = k.strip()
             v = v.strip()
 
-            if v.isdecimal():
-                v = int(v)
-            elif isdecimal(v):
-                v = float(v)
+            if v.isdecimal() or isdecimal(v):
+                v = _parse_value(v)
             elif section == '[Colours]':
                 rgb = tuple(map(int, v.split(',')))
                 if 'Combo' in k:
                     self.combo_colors.append(rgb)
-                elif 'track' in k:
+                elif 'Track' in k:
                     self.slider_track_colors.append(rgb)
                 else:
                     self.slider_border_colors.append(rgb)
                 
                 continue
 
-            self.__dict__[string_to_key(k)] = v
\ No newline at end of file
+            key = string_to_key(k)
+            if key == 'approach_rate':
+                self.approach_rate = v
+            else:
+                self.__dict__[key] = v
+
+    def iter_lines(self, tables: bool = True) -> Iterator[str]:
+        """
+        The beatmap as `.osu` lines. Key-value sections keep the keys (and
+        text, unless the value changed) they were read with, `[Events]` is written
+        as it was read since storyboards aren't parsed. `tables` can be unset
+        to leave out `[TimingPoints]` and `[HitObjects]`.
+        """
+        yield f'osu file format v{format_number(self.file_version)}'
+
+        for section in KEY_VALUE_SECTIONS:
+            if section not in self.section_spans:
+                continue
+
+            yield ''
+            yield section
+            for line in self.section_lines(section):
+                k, v = line.split(':', 1)
+                key = k.strip()
+                value = getattr(self, string_to_key(key), None)
+                if _format_value(key, value) == _format_value(key, _parse_value(v.strip())):
+                    yield line
+                else:
+                    separator = ': ' if v[:1] == ' ' else ':'
+                    yield f'{key}{separator}{_format_value(key, value)}'
+
+        if '[Events]' in self.section_spans:
+            yield ''
+            yield '[Events]'
+            start, end = self.section_spans['[Events]']
+            for line in self.map[start:end]:
+                if line.strip():
+                    yield line.rstrip()
+
+        if tables and (self.timing_points or '[TimingPoints]' in self.section_spans):
+            yield ''
+            yield '[TimingPoints]'
+            for timing_point in self.timing_points:
+                yield _timing_point_line(timing_point)
+
+        if self.combo_colors or self.slider_track_colors or self.slider_border_colors:
+            yield ''
+            yield '[Colours]'
+            for i, rgb in enumerate(self.combo_colors, 1):
+                yield f'Combo{i} : {",".join(map(str, rgb))}'
+            for rgb in self.slider_track_colors:
+                yield f'SliderTrackOverride : {",".join(map(str, rgb))}'
+            for rgb in self.slider_border_colors:
+                yield f'SliderBorder : {",".join(map(str, rgb))}'
+
+        if tables and (self.hit_objects or '[HitObjects]' in self.section_spans):
+            yield ''
+            yield '[HitObjects]'
+            for obj in self.hit_objects:
+                yield _hit_object_line(obj)
+
+    def to_bytes(self) -> bytes:
+        """The beatmap as a `.osu` file, see `iter_lines`."""
+        return '\r\n'.join(self.iter_lines()).encode() + b'\r\n'
+
+    def save_cache(self, path: str) -> None:
+        """
+        Saves the beatmap with its timing points and hit objects in fixed-width
+        columns and everything else as `.osu` text, `load_cache` reads it back
+        without parsing the tables.
+        """
+        hit_objects = self.hit_objects
+        if not isinstance(hit_objects, HitObjectArray):
+            hit_objects = HitObjectArray()
+            for obj in self.hit_objects:
+                hit_objects.append(_hit_object_line(obj))
+
+        timing_points = self.timing_points
+        timing_columns = (
+            array('d', [p.start_time for p in timing_points]),
+            array('d', [p.beat_length for p in timing_points]),
+            array('i', [p.meter for p in timing_points]),
+            array('i', [p.sample_set for p in timing_points]),
+            array('i', [p.sample_index for p in timing_points]),
+            array('i', [p.volume for p in timing_points]),
+            array('b', [p.uninherited for p in timing_points]),
+            array('i', [p.effects for p in timing_points])
+        )
+
+        head = '\n'.join(self.iter_lines(tables = False)).encode()
+        filenames = '\n'.join(hit_objects.sample_filename).encode()
+        with open(path, 'wb') as f:
+            f.write(beatmap_cache_header.pack(
+                BEATMAP_CACHE_MAGIC, BEATMAP_CACHE_VERSION,
+                sys.byteorder == 'big', self.md5 is not None,
+                bytes.fromhex(self.md5) if self.md5 is not None else bytes(16),
+                len(head), len(timing_points), len(hit_objects),
+                len(hit_objects.curve_x), len(hit_objects.edge_sounds),
+                len(filenames)
+            ))
+            f.write(head)
+            for column in timing_columns:
+                column.tofile(f)
+
+            for name, _ in HIT_OBJECT_CACHE_COLUMNS:
+                getattr(hit_objects, name).tofile(f)
+
+            f.write(filenames)
+
+    @classmethod
+    def load_cache(cls, path: str, mmap: bool = False) -> 'Beatmap':
+        """
+        Loads a beatmap saved by `save_cache`, `hit_objects` will be a
+        `HitObjectArray` and `events` are parsed the first time they're accessed.
+        """
+        with open(path, 'rb') as f:
+            if mmap:
+                data = memoryview(memory_map(f.fileno(), 0, access = ACCESS_READ))
+            else:
+                data = memoryview(f.read())
+
+        (
+            magic, version, big_endian, has_md5, digest, head_length,
+            timing_point_count, object_count, curve_point_count,
+            edge_count, filenames_length
+        ) = beatmap_cache_header.unpack_from(data)
+        if magic != BEATMAP_CACHE_MAGIC or version != BEATMAP_CACHE_VERSION:
+            raise ValueError(f'{path} is not a beatmap cache (version {BEATMAP_CACHE_VERSION})')
+
+        offset = beatmap_cache_header.size
+        beatmap = cls(
+            data[offset:offset + head_length], lazy = True, columnar = True,
+            md5 = digest.hex() if has_md5 else ''
+        )
+        offset += head_length
+
+        def read_column(typecode: str, count: int) -> array:
+            nonlocal offset
+            column = array(typecode)
+            size = count * column.itemsize
+            column.frombytes(data[offset:offset + size])
+            offset += size
+
+            if big_endian != (sys.byteorder == 'big'):
+                column.byteswap()
+
+            return column
+
+        columns = [
+            read_column(typecode, timing_point_count)
+            for typecode in ('d', 'd', 'i', 'i', 'i', 'i', 'b', 'i')
+        ]
+        beatmap.timing_points = [
+            TimingPoint(
+                start_time, beat_length, meter, SampleSet(sample_set),
+                sample_index, volume, bool(uninherited), Effects(effects)
+            ) for (
+                start_time, beat_length, meter, sample_set,
+                sample_index, volume, uninherited, effects
+            ) in zip(*columns)
+        ]
+
+        hit_objects = HitObjectArray()
+        counts = (object_count, object_count + 1, curve_point_count, edge_count)
+        for name, length in HIT_OBJECT_CACHE_COLUMNS:
+            setattr(hit_objects, name, read_column(getattr(hit_objects, name).typecode, counts[length]))
+
+        filenames = str(data[offset:offset + filenames_length], 'utf-8')
+        hit_objects.sample_filename = filenames.split('\n') if object_count else []
+        beatmap.hit_objects = hit_objects
+        return beatmap
+
+def _parse_value(v: str) -> Union[int, float, str]:
+    if v.isdecimal():
+        return int(v)
+    elif isdecimal(v):
+        return float(v)
+
+    return v
+
+def _format_value(key: str, value) -> str:
+    if isinstance(value, list):
+        if key == 'Bookmarks':
+            return ','.join(str(getattr(b, 'time_stamp', b)) for b in value)
+
+        return ' '.join(map(str, value))
+    elif isinstance(value, float):
+        return format_number(value)
+
+    return str(value)
+
+def _hit_sample_str(hit_sample: HitSample) -> str:
+    return (
+        f'{hit_sample.normal_set}:{hit_sample.addition_set}:'
+        f'{hit_sample.index}:{hit_sample.volume}:{hit_sample.filename}'
+    )
+
+def _timing_point_line(p: TimingPoint) -> str:
+    return (
+        f'{format_number(p.start_time)},{format_number(p.beat_length)},{p.meter},'
+        f'{int(p.sample_set)},{p.sample_index},{p.volume},{int(p.uninherited)},{int(p.effects)}'
+    )
+
+def _hit_object_line(obj: HitObject) -> str:
+    """`obj` as a `[HitObjects]` line, works for `HitObjectView`s too."""
+    type = int(obj.type)
+    line = [str(obj.x), str(obj.y), str(obj.time_when_object_hit), str(type), str(int(obj.hit_sound))]
+    params = obj.params
+    hit_sample = obj.hit_sample
+
+    if type & HitObjectType.SLIDER:
+        points = ''.join(f'|{p.x}:{p.y}' for p in params.curve_points)
+        line += [f'{params.curve.value}{points}', str(params.slides), format_number(params.length)]
+        if params.edge_sounds:
+            line.append('|'.join(map(str, params.edge_sounds)))
+            edge_sets = params.edge_sets or [(0, 0)] * len(params.edge_sounds)
+            line.append('|'.join(f'{normal}:{addition}' for normal, addition in edge_sets))
+            if hit_sample is not None and hit_sample.normal_set is not None:
+                line.append(_hit_sample_str(hit_sample))
+    elif type & HitObjectType.SPINNER:
+        line += [str(params.end_time), _hit_sample_str(hit_sample)]
+    elif type & HitObjectType.MANIA_HOLD:
+        line.append(f'{params.end_time}:{_hit_sample_str(hit_sample)}')
+    elif hit_sample is not None:
+        line.append(_hit_sample_str(hit_sample))
+
+    return ','.join(line)
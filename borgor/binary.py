@@ -0,0 +1,92 @@
+import struct
+from typing import Union
+
+_byte = struct.Struct('<b')
+_ubyte = struct.Struct('<B')
+_short = struct.Struct('<h')
+_int = struct.Struct('<i')
+_uint = struct.Struct('<I')
+_long_long = struct.Struct('<q')
+_float = struct.Struct('<f')
+_double = struct.Struct('<d')
+
+class BinaryReader:
+    def __init__(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        """
+        Reads osu! binary types (`.osr`, `.db`, ...) from a buffer
+        without copying it; every read unpacks at `self.offset`.
+        """
+        self.view = memoryview(data).cast('B')
+        self.offset = 0
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    @property
+    def remaining(self) -> int:
+        return len(self.view) - self.offset
+
+    def _unpack(self, s: struct.Struct):
+        val, = s.unpack_from(self.view, self.offset)
+        self.offset += s.size
+        return val
+
+    def read_byte(self) -> int:
+        return self._unpack(_byte)
+
+    def read_unsigned_byte(self) -> int:
+        return self._unpack(_ubyte)
+
+    def read_short(self) -> int:
+        return self._unpack(_short)
+
+    def read_int(self) -> int:
+        return self._unpack(_int)
+
+    def read_unsigned_int(self) -> int:
+        return self._unpack(_uint)
+
+    def read_long_long(self) -> int:
+        return self._unpack(_long_long)
+
+    def read_float(self) -> float:
+        return self._unpack(_float)
+
+    def read_double(self) -> float:
+        return self._unpack(_double)
+
+    def read_uleb128(self) -> int:
+        view = self.view
+        offset = self.offset
+        val = shift = 0
+
+        while True:
+            b = view[offset]
+            offset += 1
+
+            val |= ((b & 0b01111111) << shift)
+            if (b & 0b10000000) == 0:
+                break
+
+            shift += 7
+
+        self.offset = offset
+        return val
+
+    def read_string(self) -> str:
+        if self.read_byte() == 0x0b:
+            return str(self.read_view(self.read_uleb128()), 'utf-8')
+
+        return ''
+
+    def read_view(self, length: int) -> memoryview:
+        """Like `read_raw` but returns a view into the buffer instead of a copy."""
+        if length > self.remaining:
+            raise EOFError(f'expected {length} bytes, only {self.remaining} left')
+
+        val = self.view[self.offset:self.offset + length]
+        self.offset += length
+        return val
+
+    def read_raw(self, length: int) -> bytes:
+        return bytes(self.read_view(length))
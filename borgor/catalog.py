@@ -0,0 +1,172 @@
+import os
+import sqlite3
+from typing import Optional
+from .replay import Mods
+from .replay import Replay
+
+HEADER_COLUMNS = (
+    'mode', 'version', 'beatmap_md5', 'player_name',
+    'replay_md5', 'n300', 'n100', 'n50', 'geki', 'katu',
+    'miss', 'total_score', 'combo', 'perfect', 'mods',
+    'timestamp', 'score_id'
+)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS replays (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    error TEXT,
+    {', '.join(HEADER_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS replays_beatmap_md5 ON replays (beatmap_md5, mods);
+CREATE INDEX IF NOT EXISTS replays_player_name ON replays (player_name);
+CREATE INDEX IF NOT EXISTS replays_timestamp ON replays (timestamp);
+"""
+
+INSERT = f'INSERT OR REPLACE INTO replays VALUES ({", ".join("?" * (4 + len(HEADER_COLUMNS)))})'
+
+class ReplayCatalog:
+    def __init__(self, path: str = 'replays.db') -> None:
+        """
+        An on-disk index of replay headers, kept in sqlite at `path`.
+        `scan` only parses files that are new or changed since the last scan.
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> 'ReplayCatalog':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def scan(self, directory: str, recursive: bool = True) -> int:
+        """
+        Indexes every `.osr` under `directory`, forgets files that were removed.
+        Without `recursive` only files directly in `directory` are looked at,
+        subdirectories indexed by an earlier scan are left alone.
+        Returns how many files were (re)parsed.
+        """
+        directory = os.path.abspath(directory)
+        known = {
+            row['path']: (row['mtime_ns'], row['size'])
+            for row in self.conn.execute(
+                'SELECT path, mtime_ns, size FROM replays WHERE path >= ? AND path < ?',
+                (directory + os.sep, directory + chr(ord(os.sep) + 1))
+            )
+            if recursive or os.path.dirname(row['path']) == directory
+        }
+
+        rows = []
+        for entry in _iter_replay_files(directory, recursive):
+            stat = entry.stat()
+            if known.pop(entry.path, None) == (stat.st_mtime_ns, stat.st_size):
+                continue
+
+            rows.append(_index_row(entry.path, stat))
+
+        with self.conn:
+            self.conn.executemany(INSERT, rows)
+            self.conn.executemany(
+                'DELETE FROM replays WHERE path = ?',
+                [(path,) for path in known]
+            )
+
+        return len(rows)
+
+    def add(self, path: str) -> None:
+        path = os.path.abspath(path)
+        with self.conn:
+            self.conn.execute(INSERT, _index_row(path, os.stat(path)))
+
+    def query(
+        self, beatmap_md5: Optional[str] = None,
+        player_name: Optional[str] = None,
+        mods: Optional[Mods] = None,
+        exact_mods: bool = False,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> list[dict]:
+        """
+        Finds indexed replays, every given filter has to match.
+        `mods` matches replays with at least those mods, or exactly
+        those if `exact_mods` is set. `since`/`until` compare against `timestamp`.
+        """
+        where = ['error IS NULL']
+        params = []
+
+        if beatmap_md5 is not None:
+            where.append('beatmap_md5 = ?')
+            params.append(beatmap_md5)
+
+        if player_name is not None:
+            where.append('player_name = ?')
+            params.append(player_name)
+
+        if mods is not None:
+            if exact_mods:
+                where.append('mods = ?')
+                params.append(int(mods))
+            else:
+                where.append('mods & ? = ?')
+                params += [int(mods), int(mods)]
+
+        if since is not None:
+            where.append('timestamp >= ?')
+            params.append(since)
+
+        if until is not None:
+            where.append('timestamp < ?')
+            params.append(until)
+
+        sql = f'SELECT * FROM replays WHERE {" AND ".join(where)} ORDER BY timestamp'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        results = []
+        for row in self.conn.execute(sql, params):
+            result = dict(row)
+            del result['error']
+            result['mods'] = Mods(result['mods'])
+            results.append(result)
+
+        return results
+
+    def errors(self) -> dict[str, str]:
+        """Files that failed to parse, they're retried once they change."""
+        return {
+            row['path']: row['error'] for row in
+            self.conn.execute('SELECT path, error FROM replays WHERE error IS NOT NULL')
+        }
+
+    def __len__(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM replays WHERE error IS NULL').fetchone()[0]
+
+def _iter_replay_files(directory: str, recursive: bool):
+    with os.scandir(directory) as it:
+        for entry in it:
+            # symlinked directories aren't followed, they can loop
+            if entry.is_dir(follow_symlinks = False):
+                if recursive:
+                    yield from _iter_replay_files(entry.path, recursive)
+            elif entry.name.lower().endswith('.osr'):
+                yield entry
+
+def _index_row(path: str, stat: os.stat_result) -> tuple:
+    try:
+        replay = Replay.from_file(path, lazy = True, mmap = True)
+    except Exception as e:
+        return (path, stat.st_mtime_ns, stat.st_size, repr(e)) + (None,) * len(HEADER_COLUMNS)
+
+    header = {column: getattr(replay, column) for column in HEADER_COLUMNS}
+    header['mode'] = replay.mode.as_int
+    header['mods'] = int(replay.mods)
+    return (path, stat.st_mtime_ns, stat.st_size, None, *header.values())
@@ -0,0 +1,246 @@
+from math import pi
+from math import sin
+from math import cos
+from math import acos
+from math import ceil
+from math import atan2
+from math import hypot
+from array import array
+from bisect import bisect_left
+from typing import Iterable
+from itertools import accumulate
+
+# same tolerances osu! uses to flatten curves into line segments
+BEZIER_TOLERANCE = 0.25
+CIRCULAR_ARC_TOLERANCE = 0.1
+CATMULL_DETAIL = 50
+
+Point = tuple[float, float]
+
+def _subdivide(points: list[Point]) -> tuple[list[Point], list[Point]]:
+    """Splits a bezier curve in half (de Casteljau), returning both halves' control points."""
+    count = len(points)
+    midpoints = points[:]
+    left = [None] * count
+    right = [None] * count
+
+    for i in range(count):
+        left[i] = midpoints[0]
+        right[count - i - 1] = midpoints[count - i - 1]
+        for j in range(count - i - 1):
+            (x1, y1), (x2, y2) = midpoints[j], midpoints[j + 1]
+            midpoints[j] = ((x1 + x2) / 2, (y1 + y2) / 2)
+
+    return left, right
+
+def _is_flat_enough(points: list[Point]) -> bool:
+    limit = BEZIER_TOLERANCE * BEZIER_TOLERANCE * 4
+    for (x1, y1), (x2, y2), (x3, y3) in zip(points, points[1:], points[2:]):
+        x = x1 - 2 * x2 + x3
+        y = y1 - 2 * y2 + y3
+        if x * x + y * y > limit:
+            return False
+
+    return True
+
+def approximate_bezier(points: list[Point]) -> list[Point]:
+    """Flattens a bezier curve by subdividing it until every piece is flat enough."""
+    output = []
+    if not points:
+        return output
+
+    to_flatten = [points]
+    while to_flatten:
+        parent = to_flatten.pop()
+        left, right = _subdivide(parent)
+
+        if not _is_flat_enough(parent):
+            to_flatten.append(right)
+            to_flatten.append(left)
+            continue
+
+        # both halves end to end, smoothed into the approximation of this piece
+        joined = left + right[1:]
+        output.append(parent[0])
+        for i in range(1, len(parent) - 1):
+            (x1, y1), (x2, y2), (x3, y3) = joined[2 * i - 1:2 * i + 2]
+            output.append((0.25 * (x1 + 2 * x2 + x3), 0.25 * (y1 + 2 * y2 + y3)))
+
+    output.append(points[-1])
+    return output
+
+def _catmull_point(v1: Point, v2: Point, v3: Point, v4: Point, t: float) -> Point:
+    t2 = t * t
+    t3 = t * t2
+    return tuple(
+        0.5 * (
+            2 * b + (-a + c) * t +
+            (2 * a - 5 * b + 4 * c - d) * t2 +
+            (-a + 3 * b - 3 * c + d) * t3
+        ) for a, b, c, d in zip(v1, v2, v3, v4)
+    )
+
+def approximate_catmull(points: list[Point]) -> list[Point]:
+    output = []
+    last = len(points) - 1
+
+    for i in range(last):
+        v2 = points[i]
+        v3 = points[i + 1]
+        v1 = points[i - 1] if i > 0 else v2
+        v4 = points[i + 2] if i < last - 1 else (2 * v3[0] - v2[0], 2 * v3[1] - v2[1])
+
+        for c in range(CATMULL_DETAIL):
+            output.append(_catmull_point(v1, v2, v3, v4, c / CATMULL_DETAIL))
+            output.append(_catmull_point(v1, v2, v3, v4, (c + 1) / CATMULL_DETAIL))
+
+    return output
+
+def approximate_circular_arc(points: list[Point]) -> list[Point]:
+    """
+    The arc through 3 points, or a bezier curve through them if they're
+    (close to) on a line like osu! does.
+    """
+    (ax, ay), (bx, by), (cx, cy) = points
+    d = 2 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    if abs(d) < 1e-3:
+        return approximate_bezier(points)
+
+    a_sq = ax * ax + ay * ay
+    b_sq = bx * bx + by * by
+    c_sq = cx * cx + cy * cy
+    centre_x = (a_sq * (by - cy) + b_sq * (cy - ay) + c_sq * (ay - by)) / d
+    centre_y = (a_sq * (cx - bx) + b_sq * (ax - cx) + c_sq * (bx - ax)) / d
+    radius = hypot(ax - centre_x, ay - centre_y)
+
+    theta_start = atan2(ay - centre_y, ax - centre_x)
+    theta_end = atan2(cy - centre_y, cx - centre_x)
+    while theta_end < theta_start:
+        theta_end += 2 * pi
+
+    direction = 1
+    theta_range = theta_end - theta_start
+
+    # clockwise if the middle point is on the other side of a -> c
+    if (cy - ay) * (bx - ax) - (cx - ax) * (by - ay) < 0:
+        direction = -1
+        theta_range = 2 * pi - theta_range
+
+    if 2 * radius <= CIRCULAR_ARC_TOLERANCE:
+        amount = 2
+    else:
+        amount = max(2, ceil(theta_range / (2 * acos(1 - CIRCULAR_ARC_TOLERANCE / radius))))
+
+    output = []
+    for i in range(amount):
+        theta = theta_start + direction * i / (amount - 1) * theta_range
+        output.append((centre_x + cos(theta) * radius, centre_y + sin(theta) * radius))
+
+    return output
+
+def approximate_path(curve_type: str, points: list[Point]) -> list[Point]:
+    """
+    Flattens a slider's control `points` (head included) into line segments.
+    `curve_type` is the `CurveType` letter. Repeated points split bezier curves
+    into segments (red anchors), perfect circles that don't have exactly 3 points
+    are beziers.
+    """
+    if curve_type == 'L':
+        return points[:]
+    elif curve_type == 'C':
+        return approximate_catmull(points)
+    elif curve_type == 'P' and len(points) == 3:
+        return approximate_circular_arc(points)
+
+    output = []
+    start = 0
+    for i in range(1, len(points) + 1):
+        if i < len(points) and points[i] != points[i - 1]:
+            continue
+
+        segment = approximate_bezier(points[start:i])
+        # segments share their end / start point
+        output.extend(segment[1:] if output else segment)
+        start = i
+
+    return output
+
+class SliderPath:
+    def __init__(
+        self, curve_type: str, points: list[Point],
+        length: float
+    ) -> None:
+        """
+        The flattened path of a slider (one span, head to end) as `x`/`y`
+        vertices and the `distances` along the path to each of them, corrected
+        to the slider's `length` like osu! does: cut short if the curve is longer,
+        the last segment extended if it's shorter.
+        """
+        path = approximate_path(curve_type, points)
+        distances = list(accumulate(
+            (hypot(x2 - x1, y2 - y1) for (x1, y1), (x2, y2) in zip(path, path[1:])),
+            initial = 0.0
+        ))
+
+        # stable doesn't extend sliders whose last two control points are equal
+        if (
+            length > 0 and length != distances[-1] and not
+            (len(points) >= 2 and points[-1] == points[-2] and length > distances[-1])
+        ):
+            end = bisect_left(distances, length)
+            if end >= len(path):
+                end = len(path) - 1
+                # extend along the last segment that has a direction
+                while end > 1 and distances[end] == distances[end - 1]:
+                    end -= 1
+
+            del path[end + 1:]
+            del distances[end + 1:]
+
+            if end > 0:
+                (x1, y1), (x2, y2) = path[end - 1], path[end]
+                segment = distances[end] - distances[end - 1]
+                if segment:
+                    t = (length - distances[end - 1]) / segment
+                    path[end] = (x1 + (x2 - x1) * t, y1 + (y2 - y1) * t)
+                    distances[end] = length
+
+        self.x = array('d', [p[0] for p in path])
+        self.y = array('d', [p[1] for p in path])
+        self.distances = array('d', distances)
+
+    @property
+    def length(self) -> float:
+        return self.distances[-1]
+
+    @property
+    def end_position(self) -> Point:
+        return self.x[-1], self.y[-1]
+
+    def position_at(self, progress: float) -> Point:
+        """Position `progress` (0 - 1, clamped) of the way from the head to the end."""
+        distance = min(max(progress, 0.0), 1.0) * self.distances[-1]
+        i = bisect_left(self.distances, distance)
+        if i == 0:
+            return self.x[0], self.y[0]
+        elif i == len(self.distances):
+            return self.x[-1], self.y[-1]
+
+        start = self.distances[i - 1]
+        segment = self.distances[i] - start
+        t = (distance - start) / segment if segment else 0.0
+        return (
+            self.x[i - 1] + (self.x[i] - self.x[i - 1]) * t,
+            self.y[i - 1] + (self.y[i] - self.y[i - 1]) * t
+        )
+
+    def positions_at(self, progresses: Iterable[float]) -> tuple[array, array]:
+        """`position_at` for many progresses at once, as `x` and `y` arrays."""
+        x = array('d')
+        y = array('d')
+        for progress in progresses:
+            px, py = self.position_at(progress)
+            x.append(px)
+            y.append(py)
+
+        return x, y
@@ -0,0 +1,365 @@
+from math import pi
+from math import sin
+from math import ceil
+from math import sqrt
+from math import atan2
+from math import hypot
+from array import array
+from collections import OrderedDict
+from typing import Optional
+from .replay import Mods
+from .beatmap import Beatmap
+from .beatmap import Stacking
+from .beatmap import approach_time
+from .beatmap import HitObjectType
+from .judgement import apply_mods
+from .judgement import clock_rate
+from .judgement import hit_windows
+from .judgement import circle_radius
+
+# mods that change the star rating, NC is DT as far as difficulty goes
+DIFFICULTY_MODS = Mods.HARDROCK | Mods.EASY | Mods.DOUBLETIME | Mods.HALFTIME
+
+NORMALISED_RADIUS = 52
+SECTION_LENGTH = 400
+DECAY_WEIGHT = 0.9
+DIFFICULTY_MULTIPLIER = 0.0675
+
+AIM_MULTIPLIER = 26.25
+AIM_DECAY_BASE = 0.15
+AIM_ANGLE_BONUS_BEGIN = pi / 3
+AIM_TIMING_THRESHOLD = 107
+
+SPEED_MULTIPLIER = 1400
+SPEED_DECAY_BASE = 0.3
+SPEED_ANGLE_BONUS_BEGIN = 5 * pi / 6
+SINGLE_SPACING_THRESHOLD = 125
+MIN_SPEED_BONUS = 75
+MAX_SPEED_BONUS = 45
+SPEED_BALANCING_FACTOR = 40
+
+def difficulty_mods(mods: Mods) -> Mods:
+    """The part of `mods` that changes difficulty, NC counts as DT."""
+    if mods & Mods.NIGHTCORE:
+        mods |= Mods.DOUBLETIME
+
+    return Mods(mods & DIFFICULTY_MODS)
+
+def approach_rate_with_rate(ar: float, rate: float) -> float:
+    """The AR that has the same approach time as `ar` at a `rate` clock rate."""
+    preempt = approach_time(ar) / rate
+    if preempt > 1200:
+        return (1800 - preempt) / 120
+
+    return (1200 - preempt) / 150 + 5
+
+def overall_difficulty_with_rate(od: float, rate: float) -> float:
+    return (80 - hit_windows(od)[0] / rate) / 6
+
+class DifficultyAttributes:
+    def __init__(
+        self, mods: Mods, aim: float, speed: float,
+        approach_rate: float, overall_difficulty: float,
+        circle_size: float, hp_drain_rate: float,
+        max_combo: int, circle_count: int,
+        slider_count: int, spinner_count: int
+    ) -> None:
+        """
+        `approach_rate` and `overall_difficulty` include the clock rate (DT AR9
+        is AR10.33), `circle_size` and `hp_drain_rate` only HR/EZ.
+        """
+        self.mods = mods
+        self.aim = aim
+        self.speed = speed
+        self.star_rating = aim + speed + abs(aim - speed) / 2
+        self.approach_rate = approach_rate
+        self.overall_difficulty = overall_difficulty
+        self.circle_size = circle_size
+        self.hp_drain_rate = hp_drain_rate
+        self.max_combo = max_combo
+        self.circle_count = circle_count
+        self.slider_count = slider_count
+        self.spinner_count = spinner_count
+
+class _DifficultyObjects:
+    def __init__(
+        self, beatmap: Beatmap, radius: float, rate: float,
+        stacking: Stacking, flip: bool
+    ) -> None:
+        """
+        Everything the skills need about each object after the first, as
+        columns: the time since the previous object, the jump from where the
+        cursor left the previous object, the cursor travel over the previous
+        object if it's a slider and the angle of the previous object's corner.
+        Positions are stacked, after flipping them vertically if `flip` (HR).
+        """
+        scale = NORMALISED_RADIUS / radius
+        if radius < 30:
+            # small circle bonus
+            scale *= 1 + min(30 - radius, 5) / 50
+
+        hit_objects = beatmap.hit_objects
+        slider_timings = beatmap.slider_timings
+        follow_radius = radius * 3
+
+        # where the cursor starts and ends each object, and how far it
+        # has to move to stay in the slider's follow circle in between
+        start_x = array('d')
+        start_y = array('d')
+        end_x = array('d')
+        end_y = array('d')
+        travel = array('d')
+        times = array('d')
+        self.spinner = []
+
+        for index, obj in enumerate(hit_objects):
+            offset = stacking.heights[index] * stacking.offset
+            x = obj.x + offset
+            y = (384 - obj.y if flip else obj.y) + offset
+            times.append(obj.time_when_object_hit)
+            start_x.append(x)
+            start_y.append(y)
+            self.spinner.append(bool(obj.type & HitObjectType.SPINNER))
+
+            distance = 0.0
+            timing = slider_timings.get(index)
+            if timing is not None and timing.span_duration:
+                path = beatmap.slider_path(index)
+                # the legacy last tick is what counts instead of the real end
+                last = max(
+                    timing.start_time + (timing.end_time - timing.start_time) / 2,
+                    timing.end_time - 36
+                )
+                for time in sorted(timing.tick_times + timing.repeat_times + [last]):
+                    progress = (time - timing.start_time) / timing.span_duration
+                    progress = 1 - progress % 1 if progress % 2 >= 1 else progress % 1
+                    px, py = path.position_at(progress)
+                    px += offset
+                    py = (384 - py if flip else py) + offset
+                    dx, dy = px - x, py - y
+                    d = hypot(dx, dy)
+                    if d > follow_radius:
+                        d -= follow_radius
+                        x += dx / (d + follow_radius) * d
+                        y += dy / (d + follow_radius) * d
+                        distance += d
+
+            end_x.append(x)
+            end_y.append(y)
+            travel.append(distance * scale)
+
+        self.times = times[1:]
+        self.delta_time = array('d')
+        self.strain_time = array('d')
+        self.jump = array('d')
+        self.travel = travel[:-1]
+        self.angle: list[Optional[float]] = []
+        self.spinner = self.spinner[1:]
+
+        for i in range(1, len(times)):
+            delta = (times[i] - times[i - 1]) / rate
+            self.delta_time.append(delta)
+            self.strain_time.append(max(delta, 50))
+            self.jump.append(hypot(
+                start_x[i] - end_x[i - 1],
+                start_y[i] - end_y[i - 1]
+            ) * scale)
+
+            if i < 2:
+                self.angle.append(None)
+                continue
+
+            v1x = end_x[i - 2] - start_x[i - 1]
+            v1y = end_y[i - 2] - start_y[i - 1]
+            v2x = start_x[i] - end_x[i - 1]
+            v2y = start_y[i] - end_y[i - 1]
+            self.angle.append(abs(atan2(
+                v1x * v2y - v1y * v2x,
+                v1x * v2x + v1y * v2y
+            )))
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+def _aim_strains(objects: _DifficultyObjects) -> array:
+    strains = array('d')
+    previous_jump = previous_strain_time = None
+
+    for spinner, jump, travel, strain_time, angle in zip(
+        objects.spinner, objects.jump, objects.travel,
+        objects.strain_time, objects.angle
+    ):
+        if spinner:
+            strains.append(0.0)
+        else:
+            result = 0.0
+            if previous_jump is not None and angle is not None and angle > AIM_ANGLE_BONUS_BEGIN:
+                angle_bonus = sqrt(
+                    max(previous_jump - 90, 0) *
+                    sin(angle - AIM_ANGLE_BONUS_BEGIN) ** 2 *
+                    max(jump - 90, 0)
+                )
+                result = 1.5 * angle_bonus ** 0.99 / max(AIM_TIMING_THRESHOLD, previous_strain_time)
+
+            jump_exp = jump ** 0.99
+            travel_exp = travel ** 0.99
+            distance = jump_exp + travel_exp + sqrt(travel_exp * jump_exp)
+            strains.append(max(
+                result + distance / max(strain_time, AIM_TIMING_THRESHOLD),
+                distance / strain_time
+            ))
+
+        previous_jump = jump
+        previous_strain_time = strain_time
+
+    return strains
+
+def _speed_strains(objects: _DifficultyObjects) -> array:
+    strains = array('d')
+    for spinner, jump, travel, delta_time, strain_time, angle in zip(
+        objects.spinner, objects.jump, objects.travel,
+        objects.delta_time, objects.strain_time, objects.angle
+    ):
+        if spinner:
+            strains.append(0.0)
+            continue
+
+        distance = min(SINGLE_SPACING_THRESHOLD, travel + jump)
+        delta_time = max(MAX_SPEED_BONUS, delta_time)
+
+        speed_bonus = 1.0
+        if delta_time < MIN_SPEED_BONUS:
+            speed_bonus += ((MIN_SPEED_BONUS - delta_time) / SPEED_BALANCING_FACTOR) ** 2
+
+        angle_bonus = 1.0
+        if angle is not None and angle < SPEED_ANGLE_BONUS_BEGIN:
+            angle_bonus = 1 + sin(1.5 * (SPEED_ANGLE_BONUS_BEGIN - angle)) ** 2 / 3.57
+            if angle < pi / 2:
+                angle_bonus = 1.28
+                if distance < 90 and angle < pi / 4:
+                    angle_bonus += (1 - angle_bonus) * min((90 - distance) / 10, 1)
+                elif distance < 90:
+                    angle_bonus += (
+                        (1 - angle_bonus) * min((90 - distance) / 10, 1) *
+                        sin((pi / 2 - angle) / (pi / 4))
+                    )
+
+        strains.append(
+            (1 + (speed_bonus - 1) * 0.75) * angle_bonus *
+            (0.95 + speed_bonus * (distance / SINGLE_SPACING_THRESHOLD) ** 3.5) /
+            strain_time
+        )
+
+    return strains
+
+def _difficulty_value(
+    objects: _DifficultyObjects, strains: array,
+    multiplier: float, decay_base: float,
+    first_time: float, rate: float
+) -> float:
+    """
+    Decays and accumulates `strains`, takes the peak strain of every 400ms
+    section (of real time) and sums them highest first, each weighted 0.9x the last.
+    """
+    section_length = SECTION_LENGTH * rate
+    section_end = ceil(first_time / section_length) * section_length
+    peaks = []
+    current = peak = 1.0
+    previous_time = None
+
+    for time, delta_time, strain in zip(objects.times, objects.delta_time, strains):
+        while time > section_end:
+            if previous_time is not None:
+                peaks.append(peak)
+                peak = current * decay_base ** ((section_end - previous_time) / 1000)
+
+            section_end += section_length
+
+        current = current * decay_base ** (delta_time / 1000) + strain * multiplier
+        peak = max(peak, current)
+        previous_time = time
+
+    if previous_time is not None:
+        peaks.append(peak)
+
+    difficulty = 0.0
+    weight = 1.0
+    for peak in sorted(peaks, reverse = True):
+        difficulty += peak * weight
+        weight *= DECAY_WEIGHT
+
+    return difficulty
+
+def calculate_difficulty(beatmap: Beatmap, mods: Mods = Mods.NOMOD) -> DifficultyAttributes:
+    """
+    osu!standard star rating of `beatmap` with `mods`, from aim and speed
+    strain like osu!'s 2019 difficulty calculator. Only `DIFFICULTY_MODS`
+    change it, HD and FL are left to performance calculation.
+    """
+    mods = difficulty_mods(mods)
+    rate = clock_rate(mods)
+
+    od = apply_mods(beatmap.overall_difficulty, mods)
+    ar = apply_mods(beatmap.approach_rate, mods)
+    cs = apply_mods(beatmap.circle_size, mods, 1.3)
+    hp = apply_mods(beatmap.hp_drain_rate, mods)
+
+    hit_objects = beatmap.hit_objects
+    slider_count = len(beatmap.slider_timings)
+    spinner_count = sum(1 for obj in hit_objects if obj.type & HitObjectType.SPINNER)
+
+    aim = speed = 0.0
+    if len(hit_objects) > 1:
+        stacking = beatmap.stacking(ar, cs)
+        objects = _DifficultyObjects(
+            beatmap, circle_radius(cs), rate,
+            stacking, bool(mods & Mods.HARDROCK)
+        )
+        first_time = hit_objects[0].time_when_object_hit
+        aim = sqrt(_difficulty_value(
+            objects, _aim_strains(objects), AIM_MULTIPLIER,
+            AIM_DECAY_BASE, first_time, rate
+        )) * DIFFICULTY_MULTIPLIER
+        speed = sqrt(_difficulty_value(
+            objects, _speed_strains(objects), SPEED_MULTIPLIER,
+            SPEED_DECAY_BASE, first_time, rate
+        )) * DIFFICULTY_MULTIPLIER
+
+    return DifficultyAttributes(
+        mods, aim, speed,
+        approach_rate_with_rate(ar, rate),
+        overall_difficulty_with_rate(od, rate),
+        cs, hp, beatmap.max_combo,
+        len(hit_objects) - slider_count - spinner_count,
+        slider_count, spinner_count
+    )
+
+class DifficultyCache:
+    def __init__(self, max_size: Optional[int] = 4096) -> None:
+        """
+        `DifficultyAttributes` by beatmap md5 and `difficulty_mods`, so every
+        mod combination that plays the same is only calculated once. The least
+        recently used entries are dropped past `max_size` (`None` for no limit).
+        """
+        self.max_size = max_size
+        self.attributes: OrderedDict[tuple[str, int], DifficultyAttributes] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.attributes)
+
+    def get(self, beatmap: Beatmap, mods: Mods = Mods.NOMOD) -> DifficultyAttributes:
+        """Cached `calculate_difficulty`, beatmaps without an `md5` are never cached."""
+        if beatmap.md5 is None:
+            return calculate_difficulty(beatmap, mods)
+
+        key = (beatmap.md5, int(difficulty_mods(mods)))
+        attributes = self.attributes.get(key)
+        if attributes is not None:
+            self.attributes.move_to_end(key)
+            return attributes
+
+        attributes = self.attributes[key] = calculate_difficulty(beatmap, mods)
+        if self.max_size is not None and len(self.attributes) > self.max_size:
+            self.attributes.popitem(last = False)
+
+        return attributes
@@ -0,0 +1,345 @@
+from math import pi
+from math import atan2
+from enum import IntEnum
+from bisect import bisect_left
+from bisect import bisect_right
+from statistics import pstdev
+from typing import Optional
+from .replay import Key
+from .replay import Mods
+from .replay import Replay
+from .replay import Gamemode
+from .beatmap import Beatmap
+from .beatmap import HitObjectType
+
+# keys that can hit objects, smoke can't
+HIT_KEYS = (Key.M1, Key.M2, Key.K1, Key.K2)
+HIT_KEY_MASK = int(Key.M1 | Key.M2 | Key.K1 | Key.K2)
+
+# the follow circle is this many times the circle radius
+FOLLOW_RADIUS = 2.4
+
+SPINNER_CENTRE = (256, 192)
+# osu!'s 477 rpm cap, in radians per ms
+MAX_SPIN_RATE = 477 * 2 * pi / 60000
+
+class HitResult(IntEnum):
+    Miss = 0
+    Meh = 50
+    Ok = 100
+    Great = 300
+
+class ObjectJudgement:
+    def __init__(
+        self, index: int, time: int,
+        result: HitResult, hit_error: Optional[float],
+        combo: int
+    ) -> None:
+        self.index = index
+        self.time = time
+        self.result = result
+        self.hit_error = hit_error
+        self.combo = combo
+
+class Judgement:
+    def __init__(
+        self, judgements: list[ObjectJudgement],
+        clock_rate: float, max_combo: Optional[int] = None
+    ) -> None:
+        """
+        `max_combo` counts slider heads, ticks, repeats and ends like osu! does so
+        it compares with `Replay.combo`, by default it's the highest combo any object ended on.
+        """
+        self.judgements = judgements
+        self.clock_rate = clock_rate
+
+        self.n300 = self.n100 = self.n50 = self.miss = 0
+        for judgement in judgements:
+            if judgement.result == HitResult.Great:
+                self.n300 += 1
+            elif judgement.result == HitResult.Ok:
+                self.n100 += 1
+            elif judgement.result == HitResult.Meh:
+                self.n50 += 1
+            else:
+                self.miss += 1
+
+        if max_combo is None:
+            max_combo = max((j.combo for j in judgements), default = 0)
+
+        self.max_combo = max_combo
+
+    @property
+    def hit_errors(self) -> list[float]:
+        return [j.hit_error for j in self.judgements if j.hit_error is not None]
+
+    @property
+    def unstable_rate(self) -> float:
+        """Standard deviation of the hit errors * 10, in real time (adjusted for DT/HT)."""
+        hit_errors = self.hit_errors
+        if len(hit_errors) < 2:
+            return 0.0
+
+        return pstdev(hit_errors) * 10 / self.clock_rate
+
+    def matches(self, replay: Replay) -> bool:
+        """Whether the recomputed counts are the ones submitted with `replay`."""
+        return (
+            self.n300 == replay.n300 and self.n100 == replay.n100 and
+            self.n50 == replay.n50 and self.miss == replay.miss
+        )
+
+def clock_rate(mods: Mods) -> float:
+    if mods & (Mods.DOUBLETIME | Mods.NIGHTCORE):
+        return 1.5
+    elif mods & Mods.HALFTIME:
+        return 0.75
+
+    return 1.0
+
+def apply_mods(value: float, mods: Mods, hardrock_multiplier: float = 1.4) -> float:
+    """Applies HR/EZ to a CS/AR/OD/HP value (CS uses a 1.3 `hardrock_multiplier`)."""
+    if mods & Mods.HARDROCK:
+        value = min(value * hardrock_multiplier, 10.0)
+    elif mods & Mods.EASY:
+        value *= 0.5
+
+    return value
+
+def hit_windows(od: float) -> tuple[float, float, float]:
+    """300, 100 and 50 hit windows in ms either side of the object."""
+    return 80 - 6 * od, 140 - 8 * od, 200 - 10 * od
+
+def circle_radius(cs: float) -> float:
+    return 54.4 - 4.48 * cs
+
+def spins_required(od: float, duration: float) -> int:
+    """Whole spins a `duration` ms spinner needs for a 300 at `od`."""
+    if od > 5:
+        spins_per_second = 5 + 2.5 * (od - 5) / 5
+    else:
+        spins_per_second = 5 - 2 * (5 - od) / 5
+
+    return int(duration / 1000 * spins_per_second)
+
+def slider_result(hit: int, total: int) -> HitResult:
+    """A slider's result from how many of its `total` parts (head, ticks, repeats, end) were `hit`."""
+    if hit == total:
+        return HitResult.Great
+    elif hit * 2 >= total:
+        return HitResult.Ok
+    elif hit > 0:
+        return HitResult.Meh
+
+    return HitResult.Miss
+
+def spinner_result(spins: int, required: int) -> HitResult:
+    if spins >= required:
+        return HitResult.Great
+    elif required > 1 and spins >= required - 1:
+        return HitResult.Ok
+    elif required > 2 and spins >= required - 2:
+        return HitResult.Meh
+
+    return HitResult.Miss
+
+def judge(replay: Replay, beatmap: Beatmap) -> Judgement:
+    """
+    Recomputes the hit results of an osu!standard `replay` on `beatmap`.
+
+    Presses (from `Replay.key_events`) and objects are both walked in time
+    order; a press hits the earliest object that hasn't been judged yet (osu!'s
+    note lock) if it's inside the object's 50 window and the cursor is on it.
+    Objects whose window passes without a hit are misses.
+
+    Slider heads are hit the same way but only count as hit or missed, like
+    every tick, repeat and the end (at osu!'s legacy last tick) which are hit
+    while a key is held and the cursor is in the follow circle; the slider's
+    result is the share of those it got. Spinners count whole turns of the
+    cursor around the centre while a key is held, capped at 477 rpm. Missed
+    heads, ticks and repeats break combo, missed ends don't.
+    Relax/Autopilot aren't handled.
+    """
+    if replay.mode != Gamemode.STD:
+        raise ValueError(f'only osu!standard replays can be judged, got {replay.mode}')
+
+    mods = replay.mods
+    rate = clock_rate(mods)
+    od = apply_mods(beatmap.overall_difficulty, mods)
+    cs = apply_mods(beatmap.circle_size, mods, 1.3)
+    ar = apply_mods(beatmap.approach_rate, mods)
+    stacking = beatmap.stacking(ar, cs)
+    slider_timings = beatmap.slider_timings
+    window_300, window_100, window_50 = hit_windows(od)
+    radius = circle_radius(cs)
+    radius_squared = radius ** 2
+    follow_radius_squared = (radius * FOLLOW_RADIUS) ** 2
+    flip = bool(mods & Mods.HARDROCK)
+
+    objects = sorted(
+        enumerate(beatmap.hit_objects),
+        key = lambda x: x[1].time_when_object_hit
+    )
+
+    presses = [
+        event.press_time for event in replay.key_events()
+        if event.key in HIT_KEYS
+    ]
+
+    time_index = replay.time_index
+    frame_times = time_index.times
+    frame_keys = time_index.keys
+    judgements = []
+    press = 0
+
+    # (time, order, change, object index) combo changes: 1 adds one, 0 breaks
+    # combo and `None` records the combo an object ended on; applied in time
+    # order at the end since sliders overlap whatever comes after their head
+    combo_events = []
+
+    def combo_event(time: float, change: Optional[int], index: int = -1) -> None:
+        combo_events.append((time, len(combo_events), change, index))
+
+    def position(index: int, x: float, y: float) -> tuple[float, float]:
+        if flip:
+            y = 384 - y
+
+        # stacks move up-left after flipping
+        offset = stacking.heights[index] * stacking.offset
+        return x + offset, y + offset
+
+    def tracking(time: float, x: float, y: float) -> bool:
+        i = bisect_right(frame_times, time) - 1
+        if i < 0 or not frame_keys[i] & HIT_KEY_MASK:
+            return False
+
+        cursor_x, cursor_y = time_index.position_at(time)
+        return (cursor_x - x) ** 2 + (cursor_y - y) ** 2 <= follow_radius_squared
+
+    def spins(start: float, end: float) -> int:
+        """Whole turns around the centre between `start` and `end` with a key held."""
+        centre_x, centre_y = SPINNER_CENTRE
+        total = most = 0.0
+        lo = max(bisect_left(frame_times, start) - 1, 0)
+        hi = bisect_right(frame_times, end)
+        for i in range(lo + 1, hi):
+            if not frame_keys[i - 1] & HIT_KEY_MASK:
+                continue
+
+            angle = (
+                atan2(time_index.y[i] - centre_y, time_index.x[i] - centre_x) -
+                atan2(time_index.y[i - 1] - centre_y, time_index.x[i - 1] - centre_x)
+            )
+            if angle > pi:
+                angle -= 2 * pi
+            elif angle < -pi:
+                angle += 2 * pi
+
+            # the cap is in real time, frames are in song time
+            limit = MAX_SPIN_RATE * (frame_times[i] - max(frame_times[i - 1], start)) / rate
+            total += max(-limit, min(angle, limit))
+            most = max(most, abs(total))
+
+        return int(most / (2 * pi))
+
+    for index, obj in objects:
+        time = obj.time_when_object_hit
+        if obj.type & HitObjectType.SPINNER:
+            end_time = obj.params.end_time
+            result = spinner_result(
+                spins(time, end_time),
+                spins_required(od, end_time - time)
+            )
+            judgements.append(ObjectJudgement(index, time, result, None, 0))
+            combo_event(end_time, 1 if result else 0)
+            combo_event(end_time, None, len(judgements) - 1)
+            continue
+
+        x, y = position(index, obj.x, obj.y)
+
+        # presses from before this object's window can't hit it (or anything later)
+        while press < len(presses) and presses[press] < time - window_50:
+            press += 1
+
+        hit_error = None
+        while press < len(presses) and presses[press] <= time + window_50:
+            press_time = presses[press]
+            press += 1
+
+            cursor_x, cursor_y = time_index.position_at(press_time)
+            if (cursor_x - x) ** 2 + (cursor_y - y) ** 2 <= radius_squared:
+                hit_error = press_time - time
+                break
+
+        if hit_error is None:
+            combo_event(time + window_50, 0)
+        else:
+            combo_event(time + hit_error, 1)
+
+        timing = slider_timings.get(index) if obj.type & HitObjectType.SLIDER else None
+        if timing is not None:
+            path = beatmap.slider_path(index)
+            head_x, head_y = position(index, *path.position_at(0))
+            end_x, end_y = position(index, *path.end_position)
+            parts = [
+                (tick_time, *position(index, *path.position_at(progress)))
+                for tick_time, progress in zip(timing.tick_times, timing.tick_progress)
+            ]
+            # odd repeats are at the end of the path, even ones back at the head
+            parts += [
+                (repeat_time, end_x, end_y) if i % 2 else (repeat_time, head_x, head_y)
+                for i, repeat_time in enumerate(timing.repeat_times, 1)
+            ]
+            parts.sort()
+
+            hit = hit_error is not None
+            for part_time, part_x, part_y in parts:
+                tracked = tracking(part_time, part_x, part_y)
+                hit += tracked
+                combo_event(part_time, 1 if tracked else 0)
+
+            # the end is checked at the legacy last tick, a bit before the real end
+            last = max(
+                timing.start_time + (timing.end_time - timing.start_time) / 2,
+                timing.end_time - 36
+            )
+            progress = (last - timing.start_time) / timing.span_duration if timing.span_duration else 0.0
+            progress = 1 - progress % 1 if progress % 2 >= 1 else progress % 1
+            if tracking(last, *position(index, *path.position_at(progress))):
+                hit += 1
+                combo_event(last, 1)
+
+            result = slider_result(hit, len(parts) + 2)
+            end_time = timing.end_time
+        elif hit_error is None:
+            result = HitResult.Miss
+            end_time = time + window_50
+        else:
+            # sliders without timing only have their head to go on
+            if obj.type & HitObjectType.SLIDER or abs(hit_error) <= window_300:
+                result = HitResult.Great
+            elif abs(hit_error) <= window_100:
+                result = HitResult.Ok
+            else:
+                result = HitResult.Meh
+
+            end_time = time + hit_error
+
+        judgements.append(ObjectJudgement(index, time, result, hit_error, 0))
+        if obj.type & HitObjectType.SLIDER and result == HitResult.Miss:
+            combo_event(end_time, 0)
+
+        combo_event(end_time, None, len(judgements) - 1)
+
+    combo = max_combo = 0
+    for _, _, change, index in sorted(combo_events):
+        if change is None:
+            judgements[index].combo = combo
+        elif change:
+            combo += 1
+            max_combo = max(max_combo, combo)
+        else:
+            combo = 0
+
+    judgements.sort(key = lambda j: j.index)
+    return Judgement(judgements, rate, max_combo)
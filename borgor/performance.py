@@ -0,0 +1,164 @@
+from math import log10
+from array import array
+from typing import Union
+from typing import Iterable
+from typing import Optional
+from .replay import Mods
+from .beatmap import Beatmap
+from .difficulty import DifficultyCache
+from .difficulty import DifficultyAttributes
+
+# beatmap, mods, n300, n100, n50, miss, combo
+PerformanceScore = tuple[Beatmap, Mods, int, int, int, int, int]
+
+def score_counts(score: dict) -> tuple[Mods, int, int, int, int, int]:
+    """
+    `(mods, n300, n100, n50, miss, combo)` of a score from the osu! api
+    (`OsuApi.get_user_best` etc.) or Akatsuki's api (`AkatsukiApi.get_user_best` etc.).
+    """
+    if 'enabled_mods' in score:
+        keys = ('enabled_mods', 'count300', 'count100', 'count50', 'countmiss', 'maxcombo')
+    else:
+        keys = ('mods', 'count_300', 'count_100', 'count_50', 'count_miss', 'max_combo')
+
+    mods, *counts = (int(score[key]) for key in keys)
+    return (Mods(mods), *counts)
+
+def _length_bonus(total_hits: int) -> float:
+    bonus = 0.95 + 0.4 * min(1.0, total_hits / 2000)
+    if total_hits > 2000:
+        bonus += log10(total_hits / 2000) * 0.5
+
+    return bonus
+
+def _strain_value(strain: float) -> float:
+    return (5 * max(1.0, strain / 0.0675) - 4) ** 3 / 100000
+
+def _group_performance(
+    attributes: DifficultyAttributes, mods: Mods,
+    n300: array, n100: array, n50: array,
+    miss: array, combo: array
+) -> array:
+    """
+    pp of every score in a group sharing a beatmap and mods,
+    everything that doesn't depend on the score is only computed once.
+    """
+    ar = attributes.approach_rate
+    od = attributes.overall_difficulty
+    hidden = bool(mods & Mods.HIDDEN)
+    flashlight = bool(mods & Mods.FLASHLIGHT)
+    max_combo = attributes.max_combo
+    circles = attributes.circle_count
+
+    multiplier = 1.12
+    if mods & Mods.NOFAIL:
+        multiplier *= 0.9
+    if mods & Mods.SPUNOUT:
+        multiplier *= 0.95
+
+    aim_strain = attributes.aim
+    if mods & Mods.TOUCHSCREEN:
+        aim_strain **= 0.8
+
+    aim_base = _strain_value(aim_strain)
+    if ar > 10.33:
+        aim_base *= 1 + 0.3 * (ar - 10.33)
+    elif ar < 8:
+        aim_base *= 1 + 0.01 * (8 - ar)
+    if hidden:
+        aim_base *= 1 + 0.04 * (12 - ar)
+    aim_base *= 0.98 + od ** 2 / 2500
+
+    speed_base = _strain_value(attributes.speed)
+    if ar > 10.33:
+        speed_base *= 1 + 0.3 * (ar - 10.33)
+    if hidden:
+        speed_base *= 1 + 0.04 * (12 - ar)
+    speed_base *= 0.96 + od ** 2 / 1600
+
+    accuracy_base = 1.52163 ** od * 2.83 * min(1.15, (circles / 1000) ** 0.3)
+    if hidden:
+        accuracy_base *= 1.08
+    if flashlight:
+        accuracy_base *= 1.02
+
+    results = array('d')
+    for n300_, n100_, n50_, miss_, combo_ in zip(n300, n100, n50, miss, combo):
+        total_hits = n300_ + n100_ + n50_ + miss_
+        if not total_hits:
+            results.append(0.0)
+            continue
+
+        accuracy = (300 * n300_ + 100 * n100_ + 50 * n50_) / (300 * total_hits)
+        scale = _length_bonus(total_hits) * 0.97 ** miss_
+        if max_combo > 0:
+            scale *= min((combo_ / max_combo) ** 0.8, 1.0)
+
+        aim = aim_base * scale * (0.5 + accuracy / 2)
+        if flashlight:
+            aim *= (
+                1 + 0.35 * min(1.0, total_hits / 200) +
+                (0.3 * min(1.0, (total_hits - 200) / 300) if total_hits > 200 else 0.0) +
+                ((total_hits - 500) / 1200 if total_hits > 500 else 0.0)
+            )
+
+        speed = speed_base * scale * (0.02 + accuracy)
+
+        # only circles are judged on timing, assume the sliders and spinners got the 300s
+        accuracy_value = 0.0
+        if circles > 0:
+            better_accuracy = max(
+                ((n300_ - (total_hits - circles)) * 6 + n100_ * 2 + n50_) / (circles * 6),
+                0.0
+            )
+            accuracy_value = accuracy_base * better_accuracy ** 24
+
+        results.append(
+            (aim ** 1.1 + speed ** 1.1 + accuracy_value ** 1.1) ** (1 / 1.1) * multiplier
+        )
+
+    return results
+
+def calculate_performance_many(
+    scores: Iterable[PerformanceScore],
+    cache: Optional[DifficultyCache] = None
+) -> list[float]:
+    """
+    osu!standard pp (2019 formula, matching `calculate_difficulty`) of many
+    `(beatmap, mods, n300, n100, n50, miss, combo)` scores, in the same order.
+    Scores are grouped by beatmap and mods so difficulty is only calculated
+    once per group (and once per map and `difficulty_mods` with a shared `cache`).
+    Relax and Autopilot are scored like any other mod.
+    """
+    if cache is None:
+        cache = DifficultyCache(None)
+
+    groups: dict[tuple[Union[str, int], int], tuple[Beatmap, Mods, list[int], list[array]]] = {}
+    count = 0
+    for beatmap, mods, *counts in scores:
+        key = (beatmap.md5 or id(beatmap), int(mods))
+        if key not in groups:
+            groups[key] = (beatmap, Mods(mods), [], [array('i') for _ in range(5)])
+
+        indices, columns = groups[key][2:]
+        indices.append(count)
+        for column, value in zip(columns, counts):
+            column.append(value)
+
+        count += 1
+
+    results = [0.0] * count
+    for beatmap, mods, indices, columns in groups.values():
+        attributes = cache.get(beatmap, mods)
+        for index, pp in zip(indices, _group_performance(attributes, mods, *columns)):
+            results[index] = pp
+
+    return results
+
+def calculate_performance(
+    beatmap: Beatmap, mods: Mods,
+    n300: int, n100: int, n50: int,
+    miss: int, combo: int,
+    cache: Optional[DifficultyCache] = None
+) -> float:
+    return calculate_performance_many([(beatmap, mods, n300, n100, n50, miss, combo)], cache)[0]
@@ -1,10 +1,33 @@
+import os
+import sys
 import lzma
+import zlib
 import struct
+from array import array
+from mmap import mmap as memory_map
+from mmap import ACCESS_READ
+from bisect import bisect_left
+from bisect import bisect_right
+from functools import partial
+from itertools import islice
+from itertools import accumulate
+from concurrent.futures import wait
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
 from enum import unique 
 from enum import IntFlag
 from textwrap import wrap
+from io import BytesIO
+from typing import Union
+from typing import TypeVar
+from typing import Callable
+from typing import BinaryIO
+from typing import Iterable
+from typing import Iterator
 from typing import Optional
+from .binary import BinaryReader
+from .utils import format_number
 
 str_to_num = {
     'osu': 0,
@@ -172,21 +195,56 @@ class Key(IntFlag):
     K2    = 1 << 3
     Smoke = 1 << 4
 
+class KeyEvent:
+    __slots__ = ('key', 'press_time', 'release_time')
+
+    def __init__(self, key: Key, press_time: float, release_time: float) -> None:
+        self.key = key
+        self.press_time = press_time
+        self.release_time = release_time
+
+    @property
+    def duration(self) -> float:
+        return self.release_time - self.press_time
+
+def resolve_keys(keys: int) -> int:
+    """
+    osu! sets `M1` along with `K1` (and `M2` with `K2`),
+    drops the mouse bit when the keyboard key is what's held.
+    """
+    keys &= 0b11111
+    if keys & Key.K1:
+        keys &= ~Key.M1
+
+    if keys & Key.K2:
+        keys &= ~Key.M2
+
+    return int(keys)
+
+# `resolve_keys` for every combination and every key as a plain int, 
+# `Key` operations are too slow to do per frame
+resolved_keys = [resolve_keys(keys) for keys in range(32)]
+key_values = [(int(key), key) for key in Key]
+
 class LifeBar:
+    __slots__ = ('delta_time', 'current_hp')
+
     def __init__(self, delta_time: int, current_hp: float) -> None:
         self.delta_time = delta_time
         self.current_hp = current_hp
 
     @classmethod
     def from_raw_bar(cls, raw_bar: str) -> 'LifeBar':
-        hp = 1.0
-        if ',' not in raw_bar:
-            return cls(int(raw_bar), hp)
-        
-        hp, vtime = raw_bar.split(',')
-        return cls(int(vtime or 0), float(hp))
+        """One `time|hp` pair of the `.osr` life bar string."""
+        vtime, _, hp = raw_bar.partition('|')
+        return cls(int(vtime), float(hp or 1.0))
+
+    def to_raw_bar(self) -> str:
+        return f'{format_number(self.delta_time)}|{format_number(self.current_hp)}'
 
 class Frame:
+    __slots__ = ('delta_time', 'x', 'y', 'pressed')
+
     def __init__(
         self, delta_time: float, 
         x: float, y: float, 
@@ -205,11 +263,275 @@ class Frame:
             float(y), Key(int(z))
         )
 
+class FrameView(Frame):
+    """A `Frame` reading and writing through to a row of a `FrameArray`."""
+    __slots__ = ('_frames', '_index')
+
+    def __init__(self, frames: 'FrameArray', index: int) -> None:
+        self._frames = frames
+        self._index = index
+
+    @property
+    def delta_time(self) -> float:
+        return self._frames.delta_time[self._index]
+
+    @delta_time.setter
+    def delta_time(self, delta_time: float) -> None:
+        self._frames.delta_time[self._index] = delta_time
+        self._frames._time = None
+
+    @property
+    def x(self) -> float:
+        return self._frames.x[self._index]
+
+    @x.setter
+    def x(self, x: float) -> None:
+        self._frames.x[self._index] = x
+
+    @property
+    def y(self) -> float:
+        return self._frames.y[self._index]
+
+    @y.setter
+    def y(self, y: float) -> None:
+        self._frames.y[self._index] = y
+
+    @property
+    def pressed(self) -> Key:
+        return Key(self._frames.keys[self._index])
+
+    @pressed.setter
+    def pressed(self, key: Key) -> None:
+        self._frames.keys[self._index] = int(key)
+
+class FrameArray:
+    def __init__(
+        self, delta_time: Optional[array] = None,
+        x: Optional[array] = None, y: Optional[array] = None,
+        keys: Optional[array] = None
+    ) -> None:
+        """
+        Columnar storage for replay frames, one contiguous
+        `array` per field instead of one `Frame` per sample.
+        Indexing returns `FrameView`s so it can be used like `list[Frame]`.
+        """
+        self.delta_time = array('d') if delta_time is None else delta_time
+        self.x = array('d') if x is None else x
+        self.y = array('d') if y is None else y
+        self.keys = array('i') if keys is None else keys
+        self._time: Optional[array] = None
+
+    @property
+    def time(self) -> array:
+        """Absolute time of every frame (running sum of `delta_time`)."""
+        if self._time is None:
+            self._time = array('d', accumulate(self.delta_time))
+
+        return self._time
+
+    @classmethod
+    def from_raw_frames(cls, raw_frames: bytes) -> 'FrameArray':
+        """Parses the decompressed `w|x|y|z,` frame payload column by column."""
+        raw_frames = bytes(raw_frames).rstrip(b',')
+        if not raw_frames:
+            return cls()
+
+        fields = raw_frames.replace(b',', b'|').split(b'|')
+        if len(fields) % 4:
+            raise ValueError('frame data is not made of `w|x|y|z` groups')
+
+        return cls(
+            array('d', map(float, fields[0::4])),
+            array('d', map(float, fields[1::4])),
+            array('d', map(float, fields[2::4])),
+            array('i', map(int, fields[3::4]))
+        )
+
+    @classmethod
+    def from_frames(cls, frames: list[Frame]) -> 'FrameArray':
+        return cls(
+            array('d', [frame.delta_time for frame in frames]),
+            array('d', [frame.x for frame in frames]),
+            array('d', [frame.y for frame in frames]),
+            array('i', [int(frame.pressed) for frame in frames])
+        )
+
+    def checksum(self) -> int:
+        """CRC32 of every column, to tell whether the frames were edited."""
+        crc = 0
+        for column in (self.delta_time, self.x, self.y, self.keys):
+            crc = zlib.crc32(column, crc)
+
+        return crc
+
+    def to_frames(self) -> list[Frame]:
+        return [
+            Frame(w, x, y, Key(z)) for w, x, y, z in
+            zip(self.delta_time, self.x, self.y, self.keys)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.delta_time)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[FrameView, 'FrameArray']:
+        if isinstance(index, slice):
+            return self.__class__(
+                self.delta_time[index], self.x[index],
+                self.y[index], self.keys[index]
+            )
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError('frame index out of range')
+
+        return FrameView(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield FrameView(self, i)
+
+class FrameIndex:
+    def __init__(self, frames: Union[list[Frame], FrameArray]) -> None:
+        """
+        Sorted absolute times of the frames osu! actually plays back, for
+        O(log n) lookups by song time. Like osu!, the two `256|-500` frames stable
+        writes at the start and frames with a negative `delta_time` (skips,
+        the RNG seed frame at the end) count towards the running time but aren't played.
+        """
+        self.frames = frames
+        self.times = array('d')
+        self.x = array('d')
+        self.y = array('d')
+        self.keys = array('i')
+        self.indices = array('i')
+
+        if isinstance(frames, FrameArray):
+            columns = zip(frames.delta_time, frames.x, frames.y, frames.keys)
+        else:
+            columns = (
+                (frame.delta_time, frame.x, frame.y, int(frame.pressed)) 
+                for frame in frames
+            )
+
+        time = 0.0
+        for i, (delta_time, x, y, keys) in enumerate(columns):
+            time += delta_time
+            if (
+                delta_time < 0 or
+                i < 2 and x == 256 and y == -500 or
+                self.times and time < self.times[-1]
+            ):
+                continue
+
+            self.times.append(time)
+            self.x.append(x)
+            self.y.append(y)
+            self.keys.append(keys)
+            self.indices.append(i)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def frame_at(self, time: float) -> Optional[Frame]:
+        """The last frame at or before `time`, `None` before the first one."""
+        i = bisect_right(self.times, time) - 1
+        if i < 0:
+            return None
+
+        return self.frames[self.indices[i]]
+
+    def frames_between(self, start: float, end: float) -> list[Frame]:
+        """Frames with `start <= time <= end`."""
+        lo = bisect_left(self.times, start)
+        hi = bisect_right(self.times, end)
+        return [self.frames[i] for i in self.indices[lo:hi]]
+
+    def key_events(self) -> list[KeyEvent]:
+        """
+        Every press of `K1`, `K2`, `M1`, `M2` and `Smoke` with its release time,
+        sorted by press time. Keys still held at the end release on the last frame.
+        """
+        events = []
+        pressed_at = {}
+        previous = 0
+
+        for time, keys in zip(self.times, self.keys):
+            keys = resolved_keys[keys & 0b11111]
+            changed = keys ^ previous
+            if not changed:
+                continue
+
+            for value, key in key_values:
+                if not changed & value:
+                    continue
+
+                if keys & value:
+                    pressed_at[key] = time
+                else:
+                    events.append(KeyEvent(key, pressed_at.pop(key), time))
+
+            previous = keys
+
+        for key, press_time in pressed_at.items():
+            events.append(KeyEvent(key, press_time, self.times[-1]))
+
+        events.sort(key = lambda event: event.press_time)
+        return events
+
+    def position_at(self, time: float) -> Optional[tuple[float, float]]:
+        """Cursor position at `time`, linearly interpolated between frames."""
+        if not self.times:
+            return None
+
+        i = bisect_right(self.times, time)
+        if i == 0:
+            return self.x[0], self.y[0]
+        elif i == len(self.times):
+            return self.x[-1], self.y[-1]
+
+        t0 = self.times[i - 1]
+        t1 = self.times[i]
+        if t1 == t0:
+            return self.x[i], self.y[i]
+
+        progress = (time - t0) / (t1 - t0)
+        return (
+            self.x[i - 1] + (self.x[i] - self.x[i - 1]) * progress,
+            self.y[i - 1] + (self.y[i] - self.y[i - 1]) * progress
+        )
+
+_T = TypeVar('_T')
+
+# replay cache: magic, format version, byte order (0 = little, 1 = big),
+# whether `delta_time` is stored as int32 (otherwise float64), the LZMA preset
+# to compress edited frames with, frame count, `.osr` length and how many keys
+# didn't fit in a byte; then the `.osr`, the `FrameArray` columns and the
+# (index, keys) pairs that didn't fit
+CACHE_MAGIC = b'BRC'
+CACHE_VERSION = 3
+cache_header = struct.Struct('<3sB??IIII')
+
 class Replay:
-    def __init__(self, raw_replay: bytes) -> None:
+    def __init__(self, raw_replay: Union[bytes, memory_map]) -> None:
         """https://osu.ppy.sh/wiki/en/osu%21_File_Formats/Osr_%28file_format%29"""
         self._data = raw_replay
-        self.offset = 0
+        self.reader = BinaryReader(raw_replay)
+
+        # raw sections kept around until they're decoded
+        self._raw_bar_graph: Optional[str] = None
+        self._raw_frames: Optional[memoryview] = None
+        self._columnar = False
+        self._bar_graph: Optional[list[LifeBar]] = None
+        self._frames: Optional[Union[list[Frame], FrameArray]] = None
+        # `FrameArray.checksum` of frames loaded along with their compressed
+        # data (`load_cache`), `write` reuses that data while they match
+        self._frames_checksum: Optional[int] = None
+        self._time_index: Optional[FrameIndex] = None
+
+        # what `write` compresses frames with unless it's given a preset
+        self.preset = lzma.PRESET_DEFAULT
 
         self.mode: Optional[Gamemode] = None
         self.version: Optional[int] = None
@@ -226,30 +548,258 @@ class Replay:
         self.combo: Optional[int] = None
         self.perfect: Optional[int] = None
         self.mods: Optional[Mods] = None
-        self.bar_graph: Optional[list[LifeBar]] = None
         self.timestamp: Optional[int] = None
         self.score_id: Optional[int] = None
         self.additional_mods: Optional[Mods] = None
-        self.frames: Optional[list[Frame]] = None
     
+    @property
+    def bar_graph(self) -> Optional[list[LifeBar]]:
+        if self._bar_graph is None and self._raw_bar_graph is not None:
+            self.parse_bar_graph()
+
+        return self._bar_graph
+
+    @bar_graph.setter
+    def bar_graph(self, bar_graph: Optional[list[LifeBar]]) -> None:
+        self._bar_graph = bar_graph
+        self._raw_bar_graph = None
+
+    @property
+    def frames(self) -> Optional[Union[list[Frame], FrameArray]]:
+        if self._frames is None and self._raw_frames is not None:
+            self.parse_frames()
+
+        return self._frames
+
+    @frames.setter
+    def frames(self, frames: Optional[Union[list[Frame], FrameArray]]) -> None:
+        self._frames = frames
+        self._raw_frames = None
+        self._time_index = None
+
+    @property
+    def time_index(self) -> FrameIndex:
+        """
+        Built on first use, assign `frames` back after
+        editing them in place to have it rebuilt.
+        """
+        if self._time_index is None:
+            self._time_index = FrameIndex(self.frames or [])
+
+        return self._time_index
+
+    def frame_at(self, time: float) -> Optional[Frame]:
+        return self.time_index.frame_at(time)
+
+    def frames_between(self, start: float, end: float) -> list[Frame]:
+        return self.time_index.frames_between(start, end)
+
+    def position_at(self, time: float) -> Optional[tuple[float, float]]:
+        return self.time_index.position_at(time)
+
+    def key_events(self) -> list[KeyEvent]:
+        return self.time_index.key_events()
+
+    @property
+    def offset(self) -> int:
+        return self.reader.offset
+
+    @offset.setter
+    def offset(self, offset: int) -> None:
+        self.reader.offset = offset
+
     @property
     def data(self) -> bytes:
-        return self._data[self.offset:]
+        """Copy of the unread part of the replay, use `self.reader` for parsing."""
+        return bytes(self.reader.view[self.offset:])
     
     @classmethod
-    def from_file(cls, path: str) -> 'Replay':
+    def from_file(
+        cls, path: str, 
+        columnar: bool = False, 
+        lazy: bool = False,
+        mmap: bool = False
+    ) -> 'Replay':
+        """
+        If `mmap` is set the file is memory-mapped instead of read,
+        so parsing only touches the pages it needs (just the header with `lazy=True`)
+        and the page cache is shared between processes reading the same file.
+        A lazy replay keeps the file mapped until it's decoded, otherwise it's
+        unmapped once parsing is done.
+        """
         with open(path, 'rb') as f:
-            replay = cls(f.read())
-            replay.parse()
-            return replay
+            if mmap:
+                replay = cls(memory_map(f.fileno(), 0, access = ACCESS_READ))
+            else:
+                replay = cls(f.read())
+
+            replay.parse(columnar, lazy)
+
+        if mmap and not lazy:
+            # everything's decoded, nothing needs the mapping anymore
+            data = replay._data
+            replay._data = b''
+            replay.reader = BinaryReader(replay._data)
+            data.close()
+
+        return replay
     
     @classmethod
-    def from_content(cls, content: bytes) -> 'Replay':
+    def from_content(
+        cls, content: bytes, 
+        columnar: bool = False, 
+        lazy: bool = False
+    ) -> 'Replay':
         replay = cls(content)
-        replay.parse()
+        replay.parse(columnar, lazy)
+        return replay
+
+    @classmethod
+    def parse_many(
+        cls, paths: Iterable[str],
+        workers: Optional[int] = None,
+        chunksize: int = 16,
+        columnar: bool = True,
+        lazy: bool = False,
+        mmap: bool = False
+    ) -> Iterator[tuple[str, Union['Replay', Exception]]]:
+        """
+        Parses replay files over a process pool of `workers` processes,
+        `chunksize` files per task. Yields `(path, replay)` in the order
+        they finish, or `(path, exception)` if that file failed to parse.
+
+        Frames default to `FrameArray` (`columnar=True`) which are sent
+        back from the workers as a few flat buffers instead of a `Frame` per sample.
+        """
+        return process_files(
+            partial(cls.from_file, columnar = columnar, lazy = lazy, mmap = mmap),
+            paths, workers, chunksize
+        )
+
+    def save_cache(self, path: str) -> None:
+        """
+        Saves the replay along with its frames decoded into fixed-width columns,
+        `load_cache` reads them back without going through LZMA or text parsing.
+        `delta_time` is stored as int32 if it's whole (it always is in osu!'s
+        replays), keys as one byte and positions as float64.
+
+        The `.osr` from `build` is stored as well, so `load_cache(path).build()`
+        gives the same bytes as long as the frames aren't edited: the original
+        file for replays whose frames weren't decoded yet (`lazy=True`).
+        """
+        # before the frames are decoded, that drops the compressed ones
+        osr = self.build()
+        frames = self.frames
+        if not isinstance(frames, FrameArray):
+            frames = FrameArray.from_frames(frames or ())
+
+        delta_time = frames.delta_time
+        whole = all(d.is_integer() and -2 ** 31 <= d < 2 ** 31 for d in delta_time)
+        if whole:
+            delta_time = array('i', map(int, delta_time))
+
+        # the seed frame at the end of the replay stores the RNG seed as keys
+        overflow = array('i')
+        for i, k in enumerate(frames.keys):
+            if not 0 <= k < 256:
+                overflow += array('i', (i, k))
+
+        keys = array('B', [k if 0 <= k < 256 else 0 for k in frames.keys])
+        with open(path, 'wb') as f:
+            f.write(cache_header.pack(
+                CACHE_MAGIC, CACHE_VERSION, 
+                sys.byteorder == 'big', whole, self.preset,
+                len(frames), len(osr), len(overflow) // 2
+            ))
+            f.write(osr)
+            for column in (delta_time, array('d', frames.x), array('d', frames.y), keys, overflow):
+                column.tofile(f)
+
+    @classmethod
+    def load_cache(cls, path: str, mmap: bool = False) -> 'Replay':
+        """
+        Loads a replay saved by `save_cache`, `self.frames` will be a `FrameArray`.
+        With `mmap` the compressed frames are read from the mapping when they're needed.
+        """
+        with open(path, 'rb') as f:
+            if mmap:
+                data = memoryview(memory_map(f.fileno(), 0, access = ACCESS_READ))
+            else:
+                data = memoryview(f.read())
+
+        (
+            magic, version, big_endian, whole, preset,
+            frame_count, osr_length, overflow_count
+        ) = cache_header.unpack_from(data)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            raise ValueError(f'{path} is not a replay cache (version {CACHE_VERSION})')
+
+        offset = cache_header.size
+        osr = data[offset:offset + osr_length]
+        # don't keep the columns' bytes alive along with the `.osr`
+        replay = cls(osr if mmap else bytes(osr))
+        replay.parse(columnar = True, lazy = True)
+        replay.preset = preset
+        offset += osr_length
+
+        def read_column(typecode: str, count: int) -> array:
+            nonlocal offset
+            column = array(typecode)
+            size = count * column.itemsize
+            column.frombytes(data[offset:offset + size])
+            offset += size
+
+            if big_endian != (sys.byteorder == 'big'):
+                column.byteswap()
+
+            return column
+
+        delta_time = read_column('i' if whole else 'd', frame_count)
+        x = read_column('d', frame_count)
+        y = read_column('d', frame_count)
+
+        # widen the key bytes to int32 by placing them in the low byte of each
+        raw_keys = bytearray(4 * frame_count)
+        raw_keys[3 if sys.byteorder == 'big' else 0::4] = data[offset:offset + frame_count]
+        offset += frame_count
+        keys = array('i')
+        keys.frombytes(raw_keys)
+
+        frames = FrameArray(array('d', delta_time) if whole else delta_time, x, y, keys)
+
+        overflow = read_column('i', overflow_count * 2)
+        for i, k in zip(overflow[0::2], overflow[1::2]):
+            frames.keys[i] = k
+
+        # the compressed frames stay in `_raw_frames` for `write` to reuse
+        replay._frames = frames
+        replay._frames_checksum = frames.checksum()
         return replay
+
+    def __getstate__(self) -> dict:
+        # `_data` can be a mmap and `reader` holds a memoryview, neither can be
+        # pickled and they're not needed once parsed. The raw sections are kept
+        # so lazy replays stay lazy on the other side.
+        state = self.__dict__.copy()
+        del state['reader']
+        state['_data'] = b''
+        if state['_raw_frames'] is not None:
+            state['_raw_frames'] = bytes(state['_raw_frames'])
+
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.reader = BinaryReader(self._data)
     
-    def parse(self) -> None:
+    def parse(self, columnar: bool = False, lazy: bool = False) -> None:
+        """
+        Reads the replay, if `columnar` is set `self.frames` 
+        will be a `FrameArray` instead of a `list[Frame]`.
+
+        If `lazy` is set only the header fields are read, `frames`
+        and `bar_graph` get decoded the first time they are accessed.
+        """
         self.mode = Gamemode.from_int(self.read_byte())
         self.version = self.read_int()
         self.beatmap_md5 = self.read_string()
@@ -265,19 +815,126 @@ class Replay:
         self.combo = self.read_short()
         self.perfect = self.read_byte()
         self.mods = Mods(self.read_int())
-        self.bar_graph = [LifeBar.from_raw_bar(x) for x in self.read_string().split('|')]
+        self._raw_bar_graph = self.read_string()
+        self._bar_graph = None
         self.timestamp = self.read_long_long()
-        raw_frames: list[bytes] = lzma.decompress(self.read_raw(self.read_int())).split(b',')
-        self.frames = [Frame.from_raw_frame(x) for x in raw_frames if x]
+        self._raw_frames = self.reader.read_view(self.read_int())
+        self._frames = None
+        self._columnar = columnar
 
-        self.scoreid = self.read_long_long()
+        self.score_id = self.read_long_long()
         
         if self.mods & Mods.TARGET:
             self.additional_mods = self.read_double()
 
-    def build(self) -> bytes:
+        if not lazy:
+            self.parse_bar_graph()
+            self.parse_frames()
+
+    def parse_bar_graph(self) -> None:
+        self._bar_graph = [LifeBar.from_raw_bar(x) for x in self._raw_bar_graph.split(',') if x]
+        # the life bars can be edited in place from here on, `write` re-encodes them
+        self._raw_bar_graph = None
+
+    def parse_frames(self) -> None:
+        self._time_index = None
+        raw_frames = lzma.decompress(self._raw_frames)
+        if self._columnar:
+            self._frames = FrameArray.from_raw_frames(raw_frames)
+        else:
+            self._frames = [Frame.from_raw_frame(x) for x in raw_frames.split(b',') if x]
+
+        # same as the life bars, decoded frames get compressed again by `write`
+        self._raw_frames = None
+
+    def iter_frames(self, chunk_size: int = 1 << 16) -> Iterator[Frame]:
+        """
+        Yields frames while decompressing the frame data `chunk_size` bytes
+        at a time, memory use doesn't grow with the length of the replay.
+        Doesn't store anything in `self.frames`, best used with `lazy=True`.
+        """
+        if self._raw_frames is None or self._frames is not None:
+            yield from self.frames or ()
+            return
+
+        raw_frames = self._raw_frames
+        decompressor = lzma.LZMADecompressor()
+        offset = 0
+        pending = b''
+
+        while not decompressor.eof:
+            if decompressor.needs_input:
+                if offset >= len(raw_frames):
+                    break
+
+                chunk = raw_frames[offset:offset + chunk_size]
+                offset += chunk_size
+            else:
+                chunk = b''
+
+            *complete, pending = (pending + decompressor.decompress(chunk, chunk_size)).split(b',')
+            for raw_frame in complete:
+                if raw_frame:
+                    yield Frame.from_raw_frame(raw_frame)
+
+        if pending:
+            yield Frame.from_raw_frame(pending)
+
+    def build(self, preset: Optional[int] = None) -> bytes:
+        """Returns the replay as `.osr` bytes, see `write`."""
+        f = BytesIO()
+        self.write(f, preset)
+        return f.getvalue()
+
+    def write(self, f: BinaryIO, preset: Optional[int] = None) -> None:
+        """
+        Writes the replay as `.osr` to the file object `f`.
+
+        If `frames` were never decoded (a `lazy` replay whose frames weren't
+        accessed) or are unchanged since `load_cache`, the original compressed
+        frame data is written back as is, otherwise the frames are compressed with
+        `preset` (`self.preset` by default) straight into `f` (if it's seekable).
+        The life bars are only re-encoded once they're decoded too.
+        """
+        if preset is None:
+            preset = self.preset
+
+        buffer = self.header_bytes()
+
+        if self._raw_frames is not None and (
+            self._frames is None or
+            isinstance(self._frames, FrameArray) and
+            self._frames.checksum() == self._frames_checksum
+        ):
+            buffer += self.write_int(len(self._raw_frames))
+            f.write(buffer)
+            f.write(self._raw_frames)
+        elif f.seekable():
+            # length isn't known until the frames are compressed, patch it in after
+            length_offset = f.tell() + len(buffer)
+            buffer += self.write_int(0)
+            f.write(buffer)
+
+            length = 0
+            for chunk in self.compress_frames(preset):
+                length += f.write(chunk)
+
+            end = f.tell()
+            f.seek(length_offset)
+            f.write(self.write_int(length))
+            f.seek(end)
+        else:
+            raw_frames = b''.join(self.compress_frames(preset))
+            buffer += self.write_int(len(raw_frames))
+            f.write(buffer)
+            f.write(raw_frames)
+
+        f.write(self.footer_bytes())
+
+    def header_bytes(self) -> bytearray:
+        """Everything in the `.osr` before the frames' length."""
         buffer = bytearray()
-        buffer += self.write_byte(self.mode._value_)
+        buffer += self.write_byte(self.mode.as_int)
         buffer += self.write_int(self.version)
         buffer += self.write_string(self.beatmap_md5)
         buffer += self.write_string(self.player_name)
@@ -291,90 +948,68 @@ class Replay:
         buffer += self.write_int(self.total_score)
         buffer += self.write_short(self.combo)
         buffer += self.write_byte(self.perfect)
-        buffer += self.write_int(self.mods._value_)
+        buffer += self.write_int(int(self.mods))
         
-        bar_graph = '0,|' + '|'.join([
-            f'{lifebar.current_hp},{lifebar.delta_time}' 
-            for lifebar in self.bar_graph
-        ])
+        if self._raw_bar_graph is not None:
+            bar_graph = self._raw_bar_graph
+        else:
+            bar_graph = ''.join([f'{lifebar.to_raw_bar()},' for lifebar in self.bar_graph or ()])
         
         buffer += self.write_string(bar_graph)
         buffer += self.write_long_long(self.timestamp)
+        return buffer
 
-        raw_frames = lzma.compress(
-            b','.join([
-                f'{frame.delta_time}|{frame.x}|{frame.y}|{int(frame.pressed)}'.encode() 
-                for frame in self.frames
-            ])
-        )
-
-        buffer += self.write_int(len(raw_frames))
-        buffer += raw_frames
-        
-        buffer += self.write_long_long(self.score_id or 0)
-
+    def footer_bytes(self) -> bytearray:
+        """Everything in the `.osr` after the frames."""
+        buffer = bytearray(self.write_long_long(self.score_id or 0))
         if self.mods & Mods.TARGET:
             buffer += self.write_double(self.additional_mods)
 
-        if (d := bytes(buffer) )== self._data:
-            print
-        else:
-            p = len(self._data)
-            print
+        return buffer
+
+    def compress_frames(
+        self, preset: int = lzma.PRESET_DEFAULT, 
+        batch_size: int = 4096
+    ) -> Iterator[bytes]:
+        """Encodes and compresses `self.frames` `batch_size` frames at a time."""
+        compressor = lzma.LZMACompressor(lzma.FORMAT_ALONE, preset = preset)
+        frames = self.frames or ()
+        
+        for i in range(0, len(frames), batch_size):
+            raw_frames = ''.join([
+                f'{format_number(frame.delta_time)}|{format_number(frame.x)}|'
+                f'{format_number(frame.y)}|{int(frame.pressed)},'
+                for frame in frames[i:i + batch_size]
+            ])
+            
+            if chunk := compressor.compress(raw_frames.encode()):
+                yield chunk
 
-        return bytes(buffer)
+        yield compressor.flush()
     
     def read_byte(self) -> int:
-        val, = struct.unpack('<b', self.data[:1])
-        self.offset += 1
-        return val
+        return self.reader.read_byte()
 
     def read_short(self) -> int:
-        val, = struct.unpack('<h', self.data[:2])
-        self.offset += 2
-        return val
+        return self.reader.read_short()
 
     def read_int(self) -> int:
-        val, = struct.unpack('<i', self.data[:4])
-        self.offset += 4
-        return val
+        return self.reader.read_int()
 
     def read_long_long(self) -> int:
-        val, = struct.unpack('<q', self.data[:8])
-        self.offset += 8
-        return val
+        return self.reader.read_long_long()
 
-    def read_double(self) -> int:
-        val, = struct.unpack('<d', self.data[:8])
-        self.offset += 8
-        return val
+    def read_double(self) -> float:
+        return self.reader.read_double()
 
     def read_uleb128(self) -> int:
-        val = shift = 0
-
-        while True:
-            b = self.data[0]
-            self.offset += 1
-
-            val |= ((b & 0b01111111) << shift)
-            if (b & 0b10000000) == 0:
-                break
-
-
-            shift += 7
-
-        return val
+        return self.reader.read_uleb128()
 
     def read_string(self) -> str:
-        if self.read_byte() == 0x0b:
-            return self.read_raw(self.read_uleb128()).decode()
-
-        return ''
+        return self.reader.read_string()
 
     def read_raw(self, length: int) -> bytes:
-        val = self.data[:length]
-        self.offset += length
-        return val
+        return self.reader.read_raw(length)
 
     def write_double(self, i: int) -> int:
         return struct.pack('<d', i)
@@ -418,4 +1053,57 @@ class Replay:
         return struct.pack('<h', s)
 
     def write_long_long(self, l: int) -> bytes:
-        return struct.pack('<q', l)
\ No newline at end of file
+        return struct.pack('<q', l)
+
+def process_files(
+    func: Callable[[str], _T], paths: Iterable[str],
+    workers: Optional[int] = None, chunksize: int = 16
+) -> Iterator[tuple[str, Union[_T, Exception]]]:
+    """
+    Runs `func(path)` for every path over a process pool of `workers` processes,
+    `chunksize` paths per task; `func` has to be picklable. Yields `(path, result)`
+    in the order they finish, or `(path, exception)` if `func` raised for that path.
+    """
+    paths = iter(paths)
+    # keep a couple of tasks queued per worker without reading all `paths` up front
+    max_pending = (workers or os.cpu_count() or 1) * 2
+    executor = ProcessPoolExecutor(workers)
+    try:
+        pending = {}
+
+        while True:
+            while len(pending) < max_pending:
+                batch = list(islice(paths, chunksize))
+                if not batch:
+                    break
+
+                pending[executor.submit(_process_batch, func, batch)] = batch
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when = FIRST_COMPLETED)
+            for future in done:
+                batch = pending.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # the worker itself died, every file in the batch failed
+                    results = [(path, e) for path in batch]
+
+                yield from results
+    finally:
+        # closed early, don't wait for the batches nobody will read
+        executor.shutdown(cancel_futures = True)
+
+def _process_batch(
+    func: Callable[[str], _T], paths: list[str]
+) -> list[tuple[str, Union[_T, Exception]]]:
+    results = []
+    for path in paths:
+        try:
+            results.append((path, func(path)))
+        except Exception as e:
+            results.append((path, e))
+
+    return results
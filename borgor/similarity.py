@@ -0,0 +1,156 @@
+import random
+from math import fsum
+from math import sqrt
+from math import hypot
+from array import array
+from operator import mul
+from operator import sub
+from typing import Hashable
+from typing import Optional
+from .replay import Mods
+from .replay import Replay
+
+class Fingerprint:
+    def __init__(self, x: array, y: array) -> None:
+        self.x = x
+        self.y = y
+
+    @classmethod
+    def from_replay(cls, replay: Replay, samples: int = 256) -> 'Fingerprint':
+        """
+        The cursor position at `samples` evenly spaced times between the first
+        and last played frame, so replays of different lengths line up. HR replays
+        are flipped back to the map's orientation.
+        """
+        index = replay.time_index
+        if not index.times:
+            raise ValueError('replay has no frames to fingerprint')
+
+        start = index.times[0]
+        step = (index.times[-1] - start) / max(samples - 1, 1)
+
+        x = array('d')
+        y = array('d')
+        for i in range(samples):
+            px, py = index.position_at(start + i * step)
+            x.append(px)
+            y.append(py)
+
+        fingerprint = cls(x, y)
+        if replay.mods & Mods.HARDROCK:
+            fingerprint = fingerprint.flipped()
+
+        return fingerprint
+
+    def flipped(self) -> 'Fingerprint':
+        """The same path flipped vertically, like HR does."""
+        return self.__class__(self.x, array('d', [384 - y for y in self.y]))
+
+    def distance(self, other: 'Fingerprint') -> float:
+        """Mean distance in osu!px between the paths' samples (a metric)."""
+        return fsum(map(
+            hypot, map(sub, self.x, other.x),
+            map(sub, self.y, other.y)
+        )) / len(self.x)
+
+class Match:
+    def __init__(self, key: Hashable, distance: float, flipped: bool) -> None:
+        self.key = key
+        self.distance = distance
+        self.flipped = flipped
+
+class SimilarityIndex:
+    def __init__(
+        self, radius: float = 10.0,
+        samples: int = 256, hashes: int = 4,
+        tables: int = 8, seed: int = 0
+    ) -> None:
+        """
+        Replay fingerprints grouped by beatmap md5 and bucketed with
+        locality-sensitive hashing (random projections, `tables` tables of
+        `hashes` hashes each). Paths within `radius` osu!px of each other (mean
+        distance) share a bucket in at least one table with high probability, so a
+        query only compares against the few replays in its buckets instead of the whole map.
+        """
+        self.radius = radius
+        self.samples = samples
+        self.fingerprints: dict[str, dict[Hashable, Fingerprint]] = {}
+        self.buckets: dict[str, list[dict[tuple[int, ...], set[Hashable]]]] = {}
+
+        # a path `radius` away is ~`radius * sqrt(samples)` away as one long vector
+        self.width = 4 * radius * sqrt(samples)
+        rng = random.Random(seed)
+        self.projections = [
+            [
+                (array('d', [rng.gauss(0, 1) for _ in range(samples * 2)]), rng.uniform(0, self.width))
+                for _ in range(hashes)
+            ] for _ in range(tables)
+        ]
+
+    def _hash(self, fingerprint: Fingerprint) -> list[tuple[int, ...]]:
+        vector = fingerprint.x + fingerprint.y
+        return [
+            tuple([int((sum(map(mul, a, vector)) + b) // self.width) for a, b in table])
+            for table in self.projections
+        ]
+
+    def add(self, replay: Replay, key: Optional[Hashable] = None) -> None:
+        """Adds `replay` under `key` (`replay.replay_md5` by default)."""
+        if key is None:
+            key = replay.replay_md5
+
+        fingerprint = Fingerprint.from_replay(replay, self.samples)
+
+        if key in self.fingerprints.get(replay.beatmap_md5, ()):
+            self.remove(replay.beatmap_md5, key)
+
+        self.fingerprints.setdefault(replay.beatmap_md5, {})[key] = fingerprint
+        buckets = self.buckets.setdefault(
+            replay.beatmap_md5, 
+            [{} for _ in self.projections]
+        )
+        for table, h in zip(buckets, self._hash(fingerprint)):
+            table.setdefault(h, set()).add(key)
+
+    def remove(self, beatmap_md5: str, key: Hashable) -> None:
+        fingerprint = self.fingerprints[beatmap_md5].pop(key)
+        for table, h in zip(self.buckets[beatmap_md5], self._hash(fingerprint)):
+            table[h].discard(key)
+            if not table[h]:
+                del table[h]
+
+    def __len__(self) -> int:
+        return sum(map(len, self.fingerprints.values()))
+
+    def query(
+        self, replay: Replay, k: int = 5,
+        max_distance: Optional[float] = None,
+        exclude: Optional[Hashable] = None
+    ) -> list[Match]:
+        """
+        Up to `k` replays on the same beatmap within `max_distance` osu!px
+        (`self.radius` by default), closest first, checking the vertically flipped
+        path as well (`Match.flipped`). `exclude` skips a key, e.g. the queried replay itself.
+        Only replays sharing a bucket are compared, so matches much further
+        than `self.radius` away are likely to be missed.
+        """
+        if max_distance is None:
+            max_distance = self.radius
+
+        fingerprints = self.fingerprints.get(replay.beatmap_md5, {})
+        buckets = self.buckets.get(replay.beatmap_md5, ())
+        fingerprint = Fingerprint.from_replay(replay, self.samples)
+
+        best: dict[Hashable, Match] = {}
+        for flipped, target in ((False, fingerprint), (True, fingerprint.flipped())):
+            candidates = set()
+            for table, h in zip(buckets, self._hash(target)):
+                candidates.update(table.get(h, ()))
+
+            candidates.discard(exclude)
+            for key in candidates:
+                distance = target.distance(fingerprints[key])
+                if distance <= max_distance and (key not in best or distance < best[key].distance):
+                    best[key] = Match(key, distance, flipped)
+
+        return sorted(best.values(), key = lambda m: m.distance)[:k]
@@ -0,0 +1,234 @@
+from math import hypot
+from math import floor
+from array import array
+from bisect import bisect_left
+from bisect import bisect_right
+from typing import Iterator
+
+STACK_DISTANCE = 3
+
+OBJECT_CIRCLE = 0
+OBJECT_SLIDER = 1
+OBJECT_SPINNER = 2
+
+# windows with fewer objects than this are quicker to walk than to look up
+LINEAR_WINDOW = 32
+
+class _Grid:
+    def __init__(
+        self, kinds: array, x: array, y: array,
+        end_x: array, end_y: array
+    ) -> None:
+        """
+        Circles, slider heads and slider ends bucketed by position into
+        `STACK_DISTANCE` sized cells, each cell's object indices in ascending order,
+        so the latest object near a point before some index is a bisect in the
+        9 cells around it instead of a walk over every object in between.
+        """
+        self.kinds = kinds
+        self.x = x
+        self.y = y
+        self.end_x = end_x
+        self.end_y = end_y
+        # cell -> (indices, whether each one is a slider end)
+        self.cells: dict[tuple[int, int], tuple[array, bytearray]] = {}
+
+        for i, kind in enumerate(kinds):
+            if kind == OBJECT_SPINNER:
+                continue
+
+            self.add(i, x[i], y[i], False)
+            if kind == OBJECT_SLIDER:
+                # after the head so it's found first, slider ends win ties
+                self.add(i, end_x[i], end_y[i], True)
+
+    def add(self, index: int, x: float, y: float, end: bool) -> None:
+        key = (floor(x / STACK_DISTANCE), floor(y / STACK_DISTANCE))
+        if key not in self.cells:
+            self.cells[key] = (array('i'), bytearray())
+
+        indices, ends = self.cells[key]
+        indices.append(index)
+        ends.append(end)
+
+    def latest(
+        self, x: float, y: float, lo: int, hi: int,
+        heads: bool = True
+    ) -> tuple[int, bool]:
+        """
+        The largest index `lo < i < hi` with a circle, slider head (if
+        `heads`) or slider end within `STACK_DISTANCE` of `x`, `y`, and whether
+        it was the slider end. `(-1, False)` if there's none.
+        """
+        cx = floor(x / STACK_DISTANCE)
+        cy = floor(y / STACK_DISTANCE)
+        latest = -1
+        latest_end = False
+
+        for i in range(cx - 1, cx + 2):
+            for j in range(cy - 1, cy + 2):
+                cell = self.cells.get((i, j))
+                if cell is None:
+                    continue
+
+                indices, ends = cell
+                # newest first, anything below `latest` can't win anymore
+                for k in range(bisect_left(indices, hi) - 1, bisect_left(indices, max(lo + 1, latest)) - 1, -1):
+                    index = indices[k]
+                    end = ends[k]
+                    if end:
+                        px, py = self.end_x[index], self.end_y[index]
+                    elif not heads and self.kinds[index] == OBJECT_SLIDER:
+                        continue
+                    else:
+                        px, py = self.x[index], self.y[index]
+
+                    if hypot(px - x, py - y) < STACK_DISTANCE:
+                        if index > latest or end:
+                            latest = index
+                            latest_end = bool(end)
+                        break
+
+        return latest, latest_end
+
+    def near(self, x: float, y: float, lo: int, hi: int) -> Iterator[int]:
+        """Indices `lo < i < hi` of circles and slider heads within `STACK_DISTANCE` of `x`, `y`."""
+        cx = floor(x / STACK_DISTANCE)
+        cy = floor(y / STACK_DISTANCE)
+        for i in range(cx - 1, cx + 2):
+            for j in range(cy - 1, cy + 2):
+                cell = self.cells.get((i, j))
+                if cell is None:
+                    continue
+
+                indices, ends = cell
+                for k in range(bisect_right(indices, lo), bisect_left(indices, hi)):
+                    index = indices[k]
+                    if not ends[k] and hypot(self.x[index] - x, self.y[index] - y) < STACK_DISTANCE:
+                        yield index
+
+def _walk_back(
+    kinds: array, x: array, y: array,
+    end_x: array, end_y: array,
+    current: int, lo: int, hi: int, heads: bool
+) -> tuple[int, bool]:
+    """`_Grid.latest` by checking every object from `hi - 1` down to `lo + 1`."""
+    px, py = x[current], y[current]
+    for n in range(hi - 1, lo, -1):
+        kind = kinds[n]
+        if kind == OBJECT_SPINNER:
+            continue
+
+        if kind == OBJECT_SLIDER and hypot(end_x[n] - px, end_y[n] - py) < STACK_DISTANCE:
+            return n, True
+
+        if (heads or kind == OBJECT_CIRCLE) and hypot(x[n] - px, y[n] - py) < STACK_DISTANCE:
+            return n, False
+
+    return -1, False
+
+def stack_heights(
+    kinds: array, start: array, end: array,
+    x: array, y: array, end_x: array, end_y: array,
+    threshold: float
+) -> array:
+    """
+    osu!'s stacking (beatmap version 6 and up) over objects sorted by `start`
+    time. `end_x`/`end_y` are where sliders end (after repeats), `threshold` is
+    the approach time * stack leniency. Heights are counted towards the top left.
+
+    Spinners never stack. Windows with more than `LINEAR_WINDOW` objects
+    (dense streams, low AR) aren't walked, the latest object that can stack is
+    looked up in a `_Grid` instead; the objects skipped over couldn't have
+    changed anything.
+    """
+    count = len(kinds)
+    heights = array('i', bytes(4 * count))
+    grid = None
+
+    def window_start(n: int, time: float, times: array) -> int:
+        """
+        The index the walk back from `n` would stop at, the latest object
+        before it (spinners don't count) with `times[m] < time - threshold`.
+        """
+        m = min(n, bisect_left(start, time - threshold)) - 1
+        while m >= 0 and (kinds[m] == OBJECT_SPINNER or times[m] >= time - threshold):
+            m -= 1
+
+        return m
+
+    for i in range(count - 1, 0, -1):
+        if heights[i] != 0 or kinds[i] == OBJECT_SPINNER:
+            continue
+
+        current = n = i
+        circle = kinds[i] == OBJECT_CIRCLE
+        while n > 0:
+            # circles stop at objects that ended too long ago, sliders at ones that started too long ago
+            lo = window_start(n, start[current], end if circle else start)
+            if n - lo > LINEAR_WINDOW:
+                if grid is None:
+                    grid = _Grid(kinds, x, y, end_x, end_y)
+
+                stacked, slider_end = grid.latest(x[current], y[current], lo, n, circle)
+            else:
+                stacked, slider_end = _walk_back(kinds, x, y, end_x, end_y, current, lo, n, circle)
+
+            if stacked < 0:
+                break
+
+            if circle and slider_end:
+                # stacks under a slider end shift everything after it
+                offset = heights[current] - heights[stacked] + 1
+                ex, ey = end_x[stacked], end_y[stacked]
+                if i - stacked > LINEAR_WINDOW:
+                    if grid is None:
+                        grid = _Grid(kinds, x, y, end_x, end_y)
+
+                    shifted = grid.near(ex, ey, stacked, i + 1)
+                else:
+                    shifted = [
+                        j for j in range(stacked + 1, i + 1) if kinds[j] != OBJECT_SPINNER and
+                        hypot(x[j] - ex, y[j] - ey) < STACK_DISTANCE
+                    ]
+
+                for j in shifted:
+                    heights[j] -= offset
+                break
+
+            heights[stacked] = heights[current] + 1
+            current = n = stacked
+
+    return heights
+
+def stack_heights_old(
+    kinds: array, start: array, end: array,
+    x: array, y: array, end_x: array, end_y: array,
+    threshold: float
+) -> array:
+    """
+    osu!'s stacking for beatmap versions before 6. Here `end_x`/`end_y`
+    should be the end of the slider's path, ignoring repeats.
+    """
+    count = len(kinds)
+    heights = array('i', bytes(4 * count))
+
+    for i in range(count):
+        if heights[i] != 0 and kinds[i] != OBJECT_SLIDER:
+            continue
+
+        time = end[i]
+        slider_stack = 0
+        for j in range(i + 1, count):
+            if start[j] - threshold > time:
+                break
+
+            if hypot(x[j] - x[i], y[j] - y[i]) < STACK_DISTANCE:
+                heights[i] += 1
+                time = end[j]
+            elif hypot(x[j] - end_x[i], y[j] - end_y[i]) < STACK_DISTANCE:
+                slider_stack += 1
+                heights[j] -= slider_stack
+                time = end[j]
+
+    return heights
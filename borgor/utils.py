@@ -1,3 +1,6 @@
+from math import isnan
+from math import isfinite
+
 def string_to_key(s: str) -> str:
     """
     Makes a string into a valid key
@@ -30,4 +33,20 @@ def isdecimal(s: str) -> bool:
     if '.' in s:
         return False
     
-    return s.isdecimal()
\ No newline at end of file
+    return s.isdecimal()
+
+def format_number(n: float) -> str:
+    """
+    Formats a number like osu! writes it: whole numbers without a fraction
+    (`16|256|192|0`), NaN and infinities the way .NET spells them.
+    """
+    if not isfinite(n):
+        if isnan(n):
+            return 'NaN'
+
+        return 'Infinity' if n > 0 else '-Infinity'
+
+    if n == int(n):
+        return str(int(n))
+
+    return str(n)
@@ -0,0 +1,11 @@
+import pytest
+from synthetic import make_osu
+from synthetic import make_osr
+
+@pytest.fixture(scope = 'session')
+def osu_bytes() -> bytes:
+    return make_osu()
+
+@pytest.fixture(scope = 'session')
+def osr_bytes() -> bytes:
+    return make_osr()
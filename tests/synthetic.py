@@ -0,0 +1,182 @@
+import lzma
+import random
+import struct
+from math import pi
+from math import cos
+from math import sin
+from typing import Callable
+from typing import Optional
+from borgor.beatmap import Beatmap
+from borgor.beatmap import HitObjectType
+from borgor.judgement import apply_mods
+
+def _uleb128(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = n & 0x7f
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def _string(s: str) -> bytes:
+    b = s.encode()
+    return b'\x0b' + _uleb128(len(b)) + b
+
+def make_osu(count: int = 200, seed: int = 1, timing_every: int = 20) -> bytes:
+    """
+    A v14 osu!standard map with circles, every slider curve, spinners and
+    an inherited timing point every `timing_every` objects.
+    """
+    r = random.Random(seed)
+    lines = [
+        'osu file format v14', '',
+        '[General]', 'AudioFilename: audio.mp3', 'AudioLeadIn: 0', 'PreviewTime: 1000',
+        'Countdown: 0', 'SampleSet: Soft', 'StackLeniency: 0.7', 'Mode: 0',
+        'LetterboxInBreaks: 0', 'WidescreenStoryboard: 0', '',
+        '[Editor]', 'Bookmarks: 1000,2000,3000', 'DistanceSpacing: 1.2',
+        'BeatDivisor: 4', 'GridSize: 8', 'TimelineZoom: 1.5', '',
+        '[Metadata]', 'Title:Song', 'TitleUnicode:Song', 'Artist:Artist',
+        'ArtistUnicode:Artist', 'Creator:mapper', 'Version:Insane', 'Source:',
+        'Tags:tag1 tag2', 'BeatmapID:12345', 'BeatmapSetID:678', '',
+        '[Difficulty]', 'HPDrainRate:5', 'CircleSize:4', 'OverallDifficulty:8',
+        'ApproachRate:9', 'SliderMultiplier:1.8', 'SliderTickRate:1', '',
+        '[Events]', '//Background and Video events', '0,0,"bg.jpg",0,0',
+        '//Break Periods', '2,50000,55000', '',
+        '[TimingPoints]', '1000,333.333333333333,4,2,1,60,1,0'
+    ]
+
+    time = 1000
+    hit_objects = []
+    for i in range(count):
+        x, y = r.randint(0, 512), r.randint(0, 384)
+        kind = r.random()
+        if kind < 0.6:
+            hit_objects.append(f'{x},{y},{time},1,0,0:0:0:0:')
+            time += 166
+        elif kind < 0.95:
+            curve = r.choice('BLPC')
+            points = '|'.join(
+                f'{min(512, max(0, x + r.randint(-100, 100)))}:{min(384, max(0, y + r.randint(-100, 100)))}'
+                for _ in range({'B': 3, 'L': 1, 'P': 2, 'C': 3}[curve])
+            )
+            slides = r.choice((1, 1, 2))
+            edges = '|'.join(['0'] * (slides + 1))
+            edge_sets = '|'.join(['0:0'] * (slides + 1))
+            hit_objects.append(
+                f'{x},{y},{time},2,0,{curve}|{points},{slides},{r.uniform(60, 200):.4f},'
+                f'{edges},{edge_sets},0:0:0:0:'
+            )
+            time += 666 * slides
+        else:
+            hit_objects.append(f'256,192,{time},12,0,{time + 1500},0:0:0:0:')
+            time += 2000
+
+        if i % timing_every == timing_every - 1:
+            lines.append(f'{time - 10},-{r.choice((50, 75, 100, 120))},4,2,0,60,0,{r.choice((0, 1))}')
+
+    lines += [
+        '', '', '[Colours]', 'Combo1 : 255,0,0', 'Combo2 : 0,255,0',
+        'SliderTrackOverride : 1,2,3', '', '[HitObjects]'
+    ]
+    return ('\r\n'.join(lines + hit_objects) + '\r\n').encode()
+
+def make_osr(
+    count: int = 2000, seed: int = 1,
+    frames: Optional[list[tuple[int, float, float, int]]] = None,
+    mods: int = 8 | 64
+) -> bytes:
+    """
+    A replay of `count` random frames (or `frames`, `(delta_time, x, y, keys)`)
+    with osu!'s two `256|-500` frames up front and the RNG seed frame at the end.
+    """
+    r = random.Random(seed)
+    if frames is None:
+        frames = []
+        keys = 0
+        for _ in range(count):
+            if r.random() < 0.05:
+                keys = r.choice((0, 1, 2, 5, 10, 15))
+
+            frames.append((r.choice((15, 16, 17)), r.uniform(0, 512), r.uniform(0, 384), keys))
+
+    raw_frames = ['0|256|-500|0', '-1|256|-500|0']
+    raw_frames += [f'{w}|{x:.4f}|{y:.4f}|{z}' for w, x, y, z in frames]
+    raw_frames.append('-12345|0|0|7364')
+    compressed = lzma.compress((','.join(raw_frames) + ',').encode(), format = lzma.FORMAT_ALONE)
+
+    osr = bytearray()
+    osr += struct.pack('<bi', 0, 20210520)
+    osr += _string('a' * 32) + _string('tester') + _string(f'{seed:032x}')
+    osr += struct.pack('<hhhhhhihbi', 500, 20, 3, 50, 10, 2, 1234567, 700, 0, mods)
+    osr += _string('0|1,100|1,200|0.9,300|0.95,')
+    osr += struct.pack('<q', 637000000000000000)
+    osr += struct.pack('<i', len(compressed)) + compressed
+    osr += struct.pack('<q', 3456789)
+    return bytes(osr)
+
+def make_autoplay(
+    beatmap: Beatmap, mods: int = 0,
+    release: Callable[[int], Optional[float]] = lambda index: None,
+    spin_rpm: float = 460
+) -> bytes:
+    """
+    A perfect play of `beatmap`: every circle clicked on time, sliders followed
+    to their end (or let go at `release(index)`), spinners spun at `spin_rpm`.
+    """
+    stacking = beatmap.stacking(
+        apply_mods(beatmap.approach_rate, mods),
+        apply_mods(beatmap.circle_size, mods, 1.3)
+    )
+
+    def position(index: int, x: float, y: float) -> tuple[float, float]:
+        if mods & 16:
+            y = 384 - y
+
+        offset = stacking.heights[index] * stacking.offset
+        return x + offset, y + offset
+
+    points = []
+    keys = 5
+    for index, obj in enumerate(beatmap.hit_objects):
+        time = obj.time_when_object_hit
+        if obj.type & HitObjectType.SPINNER:
+            end_time = obj.params.end_time
+            points.append((time - 5, 306, 192, 0))
+            for t in range(time, end_time + 1, 8):
+                angle = (t - time) * spin_rpm * 2 * pi / 60000
+                points.append((t, 256 + 50 * cos(angle), 192 + 50 * sin(angle), keys))
+
+            points.append((end_time + 8, 256, 192, 0))
+        elif obj.type & HitObjectType.SLIDER:
+            timing = beatmap.slider_timings[index]
+            path = beatmap.slider_path(index)
+            released = release(index)
+            x, y = position(index, obj.x, obj.y)
+            points.append((time - 10, x, y, 0))
+            for t in range(time, int(timing.end_time) + 1, 8):
+                progress = (t - time) / timing.span_duration
+                progress = 1 - progress % 1 if progress % 2 >= 1 else progress % 1
+                x, y = position(index, *path.position_at(progress))
+                points.append((t, x, y, keys if released is None or t < released else 0))
+
+            points.append((timing.end_time + 4, x, y, 0))
+        else:
+            x, y = position(index, obj.x, obj.y)
+            points += [(time - 10, x, y, 0), (time, x, y, keys), (time + 8, x, y, 0)]
+
+        # alternate K1 and K2
+        keys = 10 if keys == 5 else 5
+
+    points.sort(key = lambda point: point[0])
+    frames = []
+    # the leading frames end at -1ms
+    last = -1
+    for time, x, y, keys in points:
+        time = max(round(time), last)
+        frames.append((time - last, x, y, keys))
+        last = time
+
+    return make_osr(frames = frames, mods = mods)
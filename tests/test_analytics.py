@@ -0,0 +1,48 @@
+import pytest
+from array import array
+from synthetic import make_osr
+from borgor.replay import Replay
+from borgor.analytics import Kinematics
+from borgor.analytics import describe
+from borgor.analytics import analyse_many
+
+def test_describe() -> None:
+    summary = describe(array('d', [4, 1, 3, 2]))
+    assert summary['mean'] == 2.5
+    assert summary['median'] == 2.5
+    assert summary['max'] == 4
+    assert summary['stdev'] == pytest.approx(1.118, abs = 1e-3)
+    assert describe(array('d'))['mean'] == 0.0
+
+def test_kinematics() -> None:
+    # 2 osu!px/ms to the right, then 1 osu!px/ms down, DT
+    frames = [(10, 20 * i, 0, 0) for i in range(10)] + [(10, 180, 10 * i, 0) for i in range(1, 10)]
+    replay = Replay.from_content(make_osr(frames = frames, mods = 64))
+    kinematics = Kinematics.from_replay(replay)
+
+    assert len(kinematics.velocity) == len(kinematics.times) - 1
+    assert len(kinematics.acceleration) == len(kinematics.velocity) - 1
+    assert len(kinematics.jerk) == len(kinematics.acceleration) - 1
+    assert kinematics.velocity[0] == 2.0
+    assert kinematics.velocity[-1] == 1.0
+    assert kinematics.acceleration[0] == 0.0
+
+    summary = kinematics.summary()
+    assert summary['frame_time']['median'] == 10
+    assert summary['real_frame_time']['median'] == pytest.approx(10 / 1.5)
+
+def test_kinematics_repeated_times() -> None:
+    kinematics = Kinematics(array('d', [0, 10, 10, 20]), array('d', [0, 5, 10, 20]), array('d', [0] * 4))
+    # the first of the frames sharing a time is dropped
+    assert list(kinematics.times) == [0, 10, 20]
+    assert list(kinematics.velocity) == [1.0, 1.0]
+
+def test_analyse_many(tmp_path, osr_bytes: bytes) -> None:
+    good = tmp_path / 'good.osr'
+    good.write_bytes(osr_bytes)
+    bad = tmp_path / 'bad.osr'
+    bad.write_bytes(b'\x00')
+
+    results = dict(analyse_many([str(good), str(bad)], workers = 2, chunksize = 1))
+    assert isinstance(results[str(bad)], Exception)
+    assert results[str(good)] == Kinematics.from_replay(Replay.from_content(osr_bytes)).summary()
@@ -0,0 +1,169 @@
+import math
+import pytest
+import borgor.beatmap
+from borgor.beatmap import Beatmap
+from borgor.beatmap import HitSample
+from borgor.beatmap import HitObjectType
+from borgor.beatmap import HitObjectArray
+from borgor.beatmap import split_sections
+
+def snapshot(beatmap: Beatmap) -> tuple:
+    """Everything parsed out of `beatmap`, in plain comparable values."""
+    attributes = {
+        key: value for key, value in beatmap.__dict__.items()
+        if not key.startswith('_') and key not in ('map', 'section_spans')
+    }
+    attributes['approach_rate'] = beatmap.approach_rate
+    attributes['bookmarks'] = [b.time_stamp for b in beatmap.bookmarks]
+
+    timing_points = [
+        (
+            p.start_time, p.beat_length, p.meter, p.sample_set,
+            p.sample_index, p.volume, p.uninherited, p.effects
+        ) for p in beatmap.timing_points
+    ]
+
+    hit_objects = []
+    for obj in beatmap.hit_objects:
+        params = obj.params
+        if params is not None:
+            params = (
+                params.curve, [(p.x, p.y) for p in params.curve_points], params.slides,
+                params.length, params.edge_sounds, params.edge_sets, params.end_time
+            )
+
+        sample = obj.hit_sample
+        hit_objects.append((
+            obj.x, obj.y, obj.time_when_object_hit, obj.type, obj.hit_sound, params,
+            (sample.normal_set, sample.addition_set, sample.index, sample.volume, sample.filename)
+        ))
+
+    events = [
+        (e.event_type, e.start_time, e.event_params.file_name, e.event_params.end_time)
+        for e in beatmap.events
+    ]
+    return attributes, timing_points, hit_objects, events
+
+def test_from_file_mmap(tmp_path, osu_bytes: bytes) -> None:
+    path = tmp_path / 'beatmap.osu'
+    path.write_bytes(osu_bytes)
+
+    assert snapshot(Beatmap.from_file(str(path), mmap = True)) == snapshot(Beatmap(osu_bytes))
+
+def test_split_sections() -> None:
+    lines = ['osu file format v14', '[General]', 'Mode: 0', '[Metadata] ', 'Title:a', '', '[Events]']
+    assert split_sections(lines) == {'[General]': (2, 3), '[Metadata]': (4, 6), '[Events]': (7, 7)}
+
+def test_section_lines(osu_bytes: bytes) -> None:
+    beatmap = Beatmap(osu_bytes)
+    assert list(beatmap.section_lines('[Events]')) == ['0,0,"bg.jpg",0,0', '2,50000,55000']
+    assert list(beatmap.section_lines('[Missing]')) == []
+    assert beatmap.title == 'Song'
+    assert beatmap.tags == ['tag1', 'tag2']
+    assert [b.time_stamp for b in beatmap.bookmarks] == [1000, 2000, 3000]
+    assert beatmap.combo_colors == [(255, 0, 0), (0, 255, 0)]
+    assert len(beatmap.hit_objects) == 200
+
+def test_selected_sections(tmp_path, osu_bytes: bytes) -> None:
+    beatmap = Beatmap(osu_bytes, sections = ('[Metadata]', '[Difficulty]'))
+    assert beatmap.title == 'Song'
+    assert beatmap.overall_difficulty == 8
+    assert not hasattr(beatmap, 'audio_filename')
+    assert beatmap.hit_objects == []
+
+    path = tmp_path / 'beatmap.osu'
+    path.write_bytes(osu_bytes)
+    with path.open('rb') as f:
+        assert Beatmap(f, sections = ('[Metadata]',)).title == 'Song'
+        # stops reading once the sections it wants are read
+        assert f.tell() < len(osu_bytes) // 2
+
+    with path.open('rb') as f:
+        assert snapshot(Beatmap(f)) == snapshot(Beatmap(osu_bytes))
+
+def test_lazy_sections(osu_bytes: bytes) -> None:
+    beatmap = Beatmap(osu_bytes, lazy = True)
+    assert beatmap._hit_objects is None and beatmap._timing_points is None
+    assert snapshot(beatmap) == snapshot(Beatmap(osu_bytes))
+
+def test_columnar_hit_objects(osu_bytes: bytes) -> None:
+    columnar = Beatmap(osu_bytes, columnar = True)
+    assert isinstance(columnar.hit_objects, HitObjectArray)
+    assert snapshot(columnar) == snapshot(Beatmap(osu_bytes))
+
+def test_hit_object_view_writes_through(osu_bytes: bytes) -> None:
+    beatmap = Beatmap(osu_bytes, columnar = True)
+    hit_objects = beatmap.hit_objects
+    slider = next(i for i, obj in enumerate(hit_objects) if obj.type & HitObjectType.SLIDER)
+
+    hit_objects[slider].params.slides = 7
+    hit_objects[slider].hit_sample = HitSample(1, 2, 3, 40, 'hit.wav')
+    hit_objects[0].hit_sample.volume = 77
+
+    reparsed = Beatmap(beatmap.to_bytes())
+    assert reparsed.hit_objects[slider].params.slides == 7
+    assert reparsed.hit_objects[slider].hit_sample.filename == 'hit.wav'
+    assert reparsed.hit_objects[0].hit_sample.volume == 77
+
+def test_approach_rate(osu_bytes: bytes) -> None:
+    beatmap = Beatmap(osu_bytes)
+    assert beatmap.approach_rate == 9
+
+    beatmap.approach_rate = 7.5
+    assert Beatmap(beatmap.to_bytes()).approach_rate == 7.5
+
+    # maps from before ApproachRate existed use the OD
+    beatmap.approach_rate = None
+    assert beatmap.approach_rate == beatmap.overall_difficulty == 8
+
+@pytest.mark.parametrize('columnar', (False, True))
+def test_to_bytes_round_trip(osu_bytes: bytes, columnar: bool) -> None:
+    beatmap = Beatmap(osu_bytes, columnar = columnar)
+    written = beatmap.to_bytes()
+    reparsed = Beatmap(written, columnar = columnar)
+
+    assert snapshot(reparsed) == snapshot(beatmap)
+    assert reparsed.to_bytes() == written
+    assert reparsed.max_combo == beatmap.max_combo
+
+def test_to_bytes_writes_changes(osu_bytes: bytes) -> None:
+    beatmap = Beatmap(osu_bytes)
+    beatmap.title = 'Other'
+    beatmap.hit_objects[0].x = 1
+
+    reparsed = Beatmap(beatmap.to_bytes())
+    assert reparsed.title == 'Other'
+    assert reparsed.hit_objects[0].x == 1
+
+def test_to_bytes_nan_beat_length(osu_bytes: bytes) -> None:
+    content = osu_bytes.replace(b'[TimingPoints]\r\n', b'[TimingPoints]\r\n500,NaN,4,2,1,60,1,0\r\n')
+    written = Beatmap(content).to_bytes()
+
+    assert b'500,NaN,' in written
+    assert math.isnan(Beatmap(written).timing_points[0].beat_length)
+
+@pytest.mark.parametrize('columnar', (False, True))
+@pytest.mark.parametrize('mmap', (False, True))
+def test_cache_round_trip(tmp_path, monkeypatch, osu_bytes: bytes, columnar: bool, mmap: bool) -> None:
+    beatmap = Beatmap(osu_bytes, columnar = columnar)
+    path = tmp_path / 'beatmap.bbc'
+    beatmap.save_cache(str(path))
+
+    # the digest comes from the cache, the head it parses isn't hashed
+    monkeypatch.setattr(borgor.beatmap.hashlib, 'md5', None)
+    cached = Beatmap.load_cache(str(path), mmap = mmap)
+    assert cached.md5 == beatmap.md5
+    monkeypatch.undo()
+
+    assert isinstance(cached.hit_objects, HitObjectArray)
+    assert snapshot(cached) == snapshot(beatmap)
+    assert cached.to_bytes() == beatmap.to_bytes()
+    assert cached.max_combo == beatmap.max_combo
+
+def test_cache_without_md5(tmp_path, osu_bytes: bytes) -> None:
+    beatmap = Beatmap(osu_bytes)
+    beatmap.md5 = None
+    path = tmp_path / 'beatmap.bbc'
+    beatmap.save_cache(str(path))
+
+    assert Beatmap.load_cache(str(path)).md5 is None
@@ -0,0 +1,38 @@
+import struct
+import pytest
+from synthetic import _string
+from borgor.binary import BinaryReader
+
+def test_reads_at_offset() -> None:
+    data = struct.pack('<bBhiIqfd', -1, 255, -2, -3, 4, -5, 0.5, 0.25) + _string('player')
+    reader = BinaryReader(data)
+
+    assert reader.read_byte() == -1
+    assert reader.read_unsigned_byte() == 255
+    assert reader.read_short() == -2
+    assert reader.read_int() == -3
+    assert reader.read_unsigned_int() == 4
+    assert reader.read_long_long() == -5
+    assert reader.read_float() == 0.5
+    assert reader.read_double() == 0.25
+    assert reader.read_string() == 'player'
+    assert reader.remaining == 0
+
+def test_uleb128_and_empty_string() -> None:
+    reader = BinaryReader(_string('a' * 300) + b'\x00')
+    assert reader.read_string() == 'a' * 300
+    assert reader.read_string() == ''
+    assert reader.remaining == 0
+
+def test_read_view_does_not_copy() -> None:
+    data = bytearray(b'\x01\x02\x03\x04')
+    reader = BinaryReader(data)
+    reader.read_byte()
+    view = reader.read_view(2)
+
+    data[1] = 9
+    assert bytes(view) == b'\x09\x03'
+    assert reader.read_raw(1) == b'\x04'
+
+    with pytest.raises(EOFError):
+        reader.read_view(1)
@@ -0,0 +1,59 @@
+import os
+from synthetic import make_osr
+from borgor.replay import Mods
+from borgor.catalog import ReplayCatalog
+
+def write_replays(directory, count: int, start: int = 0) -> None:
+    directory.mkdir(parents = True, exist_ok = True)
+    for seed in range(start, start + count):
+        (directory / f'{seed}.osr').write_bytes(make_osr(20, seed = seed))
+
+def test_scan_and_rescan(tmp_path) -> None:
+    write_replays(tmp_path / 'replays', 3)
+    write_replays(tmp_path / 'replays' / 'sub', 2, start = 3)
+    (tmp_path / 'replays' / 'corrupt.osr').write_bytes(b'\x00\x01')
+
+    with ReplayCatalog(str(tmp_path / 'replays.db')) as catalog:
+        assert catalog.scan(str(tmp_path / 'replays')) == 6
+        assert len(catalog) == 5
+        assert list(catalog.errors()) == [str(tmp_path / 'replays' / 'corrupt.osr')]
+
+        # nothing changed
+        assert catalog.scan(str(tmp_path / 'replays')) == 0
+
+        os.remove(tmp_path / 'replays' / '0.osr')
+        write_replays(tmp_path / 'replays', 1, start = 5)
+        assert catalog.scan(str(tmp_path / 'replays')) == 1
+        assert len(catalog) == 5
+
+def test_non_recursive_scan_keeps_subdirectories(tmp_path) -> None:
+    write_replays(tmp_path / 'replays', 2)
+    write_replays(tmp_path / 'replays' / 'sub', 2, start = 2)
+
+    with ReplayCatalog(str(tmp_path / 'replays.db')) as catalog:
+        assert catalog.scan(str(tmp_path / 'replays')) == 4
+        assert catalog.scan(str(tmp_path / 'replays'), recursive = False) == 0
+        assert len(catalog) == 4
+
+def test_symlink_loop(tmp_path) -> None:
+    write_replays(tmp_path / 'replays', 1)
+    os.symlink(tmp_path / 'replays', tmp_path / 'replays' / 'loop')
+
+    with ReplayCatalog(str(tmp_path / 'replays.db')) as catalog:
+        assert catalog.scan(str(tmp_path / 'replays')) == 1
+
+def test_query(tmp_path) -> None:
+    write_replays(tmp_path / 'replays', 3)
+
+    with ReplayCatalog(str(tmp_path / 'replays.db')) as catalog:
+        catalog.scan(str(tmp_path / 'replays'))
+
+        assert len(catalog.query(beatmap_md5 = 'a' * 32)) == 3
+        assert len(catalog.query(player_name = 'tester', limit = 2)) == 2
+        assert catalog.query(player_name = 'other') == []
+        assert len(catalog.query(mods = Mods.HIDDEN)) == 3
+        assert catalog.query(mods = Mods.HIDDEN, exact_mods = True) == []
+
+        result, = catalog.query(mods = Mods.HIDDEN | Mods.DOUBLETIME, exact_mods = True, limit = 1)
+        assert result['mods'] == Mods.HIDDEN | Mods.DOUBLETIME
+        assert result['player_name'] == 'tester'
@@ -0,0 +1,77 @@
+import pytest
+from math import hypot
+from borgor.beatmap import Beatmap
+from borgor.curves import SliderPath
+from borgor.curves import approximate_path
+from borgor.curves import approximate_bezier
+from borgor.curves import approximate_catmull
+from borgor.curves import approximate_circular_arc
+
+def test_bezier() -> None:
+    path = approximate_bezier([(0, 0), (50, 100), (100, 0)])
+    assert path[0] == (0, 0) and path[-1] == (100, 0)
+    assert len(path) == 65
+
+    # every vertex is on the curve, x = 100t and y = 200t(1 - t)
+    for x, y in path:
+        t = x / 100
+        assert y == pytest.approx(200 * t * (1 - t), abs = 0.25)
+
+def test_bezier_red_anchors() -> None:
+    # a repeated control point splits the curve into straight segments
+    path = approximate_path('B', [(0, 0), (100, 0), (100, 0), (100, 100)])
+    assert path == [(0, 0), (100, 0), (100, 100)]
+
+def test_catmull() -> None:
+    points = [(0, 0), (100, 50), (200, 0)]
+    path = approximate_catmull(points)
+    assert len(path) == 200
+    # passes through every control point
+    assert path[0] == (0, 0) and (100, 50) in path and path[-1] == pytest.approx((200, 0))
+
+def test_perfect_circle() -> None:
+    path = approximate_circular_arc([(0, 0), (50, 50), (100, 0)])
+    assert len(path) == 25
+    assert path[0] == pytest.approx((0, 0), abs = 1e-9)
+    assert path[-1] == pytest.approx((100, 0), abs = 1e-9)
+    for x, y in path:
+        assert hypot(x - 50, y) == pytest.approx(50)
+        assert y >= -1e-9
+
+def test_perfect_circle_collinear() -> None:
+    # points on a line are a bezier, i.e. the line
+    path = approximate_circular_arc([(0, 0), (50, 0), (100, 0)])
+    assert path[0] == (0, 0) and path[-1] == (100, 0)
+    assert all(y == 0 for _, y in path)
+
+    # and anything but 3 points isn't a circle either
+    assert approximate_path('P', [(0, 0), (50, 50), (100, 0), (150, 50)]) == \
+        approximate_bezier([(0, 0), (50, 50), (100, 0), (150, 50)])
+
+def test_slider_path_length() -> None:
+    shortened = SliderPath('L', [(0, 0), (100, 0)], 50)
+    assert shortened.length == 50
+    assert shortened.end_position == (50, 0)
+    assert shortened.position_at(0.5) == (25, 0)
+
+    extended = SliderPath('L', [(0, 0), (100, 0)], 150)
+    assert extended.end_position == (150, 0)
+    assert extended.position_at(2) == (150, 0)
+    assert extended.position_at(-1) == (0, 0)
+
+    x, y = SliderPath('B', [(0, 0), (50, 100), (100, 0)], 120).positions_at([0, 0.5, 1])
+    assert list(x)[0] == 0 and list(y)[0] == 0
+    assert x[1] < x[2]
+
+def test_beatmap_caches_paths(osu_bytes: bytes) -> None:
+    beatmap = Beatmap(osu_bytes)
+    paths = beatmap.slider_paths()
+
+    assert paths
+    for index, path in paths.items():
+        assert beatmap.slider_path(index) is path
+        assert path.length == pytest.approx(beatmap.hit_objects[index].params.length)
+
+    circle = next(i for i in range(len(beatmap.hit_objects)) if i not in paths)
+    assert beatmap.slider_path(circle) is None
+    assert Beatmap(osu_bytes, columnar = True).slider_path(index).end_position == path.end_position
@@ -0,0 +1,98 @@
+import pytest
+from synthetic import make_osu
+from borgor.beatmap import Beatmap
+from borgor.replay import Mods
+from borgor.difficulty import DifficultyCache
+from borgor.difficulty import difficulty_mods
+from borgor.difficulty import calculate_difficulty
+from borgor.difficulty import approach_rate_with_rate
+from borgor.difficulty import overall_difficulty_with_rate
+
+@pytest.fixture(scope = 'module')
+def beatmap() -> Beatmap:
+    return Beatmap(make_osu())
+
+@pytest.mark.parametrize('mods, stars, aim, speed', (
+    (Mods.NOMOD, 5.265955, 2.909020, 1.804850),
+    (Mods.HARDROCK, 5.646411, 3.159936, 1.813015),
+    (Mods.DOUBLETIME, 6.856621, 3.774480, 2.389802),
+    (Mods.EASY, 4.785226, 2.593340, 1.790432),
+    (Mods.HALFTIME, 4.313764, 2.386870, 1.466917)
+))
+def test_star_rating(beatmap: Beatmap, mods: Mods, stars: float, aim: float, speed: float) -> None:
+    attributes = calculate_difficulty(beatmap, mods)
+
+    assert attributes.star_rating == pytest.approx(stars, abs = 1e-6)
+    assert attributes.aim == pytest.approx(aim, abs = 1e-6)
+    assert attributes.speed == pytest.approx(speed, abs = 1e-6)
+    assert (attributes.circle_count, attributes.slider_count, attributes.spinner_count) == (115, 80, 5)
+    assert attributes.max_combo == beatmap.max_combo == 325
+
+def test_mods_order_star_rating(beatmap: Beatmap) -> None:
+    nomod = calculate_difficulty(beatmap).star_rating
+
+    assert calculate_difficulty(beatmap, Mods.HARDROCK).star_rating > nomod
+    assert calculate_difficulty(beatmap, Mods.DOUBLETIME).star_rating > nomod
+    assert calculate_difficulty(beatmap, Mods.EASY).star_rating < nomod
+    assert calculate_difficulty(beatmap, Mods.HIDDEN).star_rating == nomod
+
+def test_rate_adjusted_attributes(beatmap: Beatmap) -> None:
+    doubletime = calculate_difficulty(beatmap, Mods.DOUBLETIME)
+
+    assert doubletime.approach_rate == pytest.approx(31 / 3)
+    assert doubletime.overall_difficulty == pytest.approx(88 / 9)
+    assert approach_rate_with_rate(9, 1.0) == pytest.approx(9)
+    assert overall_difficulty_with_rate(8, 1.0) == pytest.approx(8)
+    assert approach_rate_with_rate(5, 0.75) < 5
+
+def test_difficulty_mods() -> None:
+    assert difficulty_mods(Mods.HIDDEN | Mods.DOUBLETIME) == Mods.DOUBLETIME
+    assert difficulty_mods(Mods.NIGHTCORE) == Mods.DOUBLETIME
+    assert difficulty_mods(Mods.HIDDEN | Mods.FLASHLIGHT) == Mods.NOMOD
+
+def test_cache_is_keyed_on_md5_and_difficulty_mods(beatmap: Beatmap) -> None:
+    cache = DifficultyCache()
+    nomod = cache.get(beatmap)
+
+    assert cache.get(beatmap, Mods.HIDDEN) is nomod
+    assert cache.get(beatmap, Mods.DOUBLETIME) is cache.get(beatmap, Mods.NIGHTCORE)
+    assert cache.get(beatmap, Mods.HARDROCK) is not nomod
+    assert len(cache) == 3
+    assert set(cache.attributes) == {
+        (beatmap.md5, int(mods)) for mods in (Mods.NOMOD, Mods.DOUBLETIME, Mods.HARDROCK)
+    }
+
+    # same md5, same attributes, even from a different `Beatmap`
+    assert cache.get(Beatmap(make_osu())) is nomod
+    assert cache.get(Beatmap(make_osu(seed = 2))) is not nomod
+    assert len(cache) == 4
+
+def test_cache_evicts_least_recently_used(beatmap: Beatmap) -> None:
+    cache = DifficultyCache(2)
+    nomod = cache.get(beatmap)
+    cache.get(beatmap, Mods.HARDROCK)
+    # nomod is used again, so HR is the oldest when DT is added
+    cache.get(beatmap)
+    cache.get(beatmap, Mods.DOUBLETIME)
+
+    assert len(cache) == 2
+    assert cache.get(beatmap) is nomod
+    assert (beatmap.md5, int(Mods.HARDROCK)) not in cache.attributes
+
+def test_cache_skips_beatmaps_without_md5() -> None:
+    beatmap = Beatmap(make_osu())
+    beatmap.md5 = None
+    cache = DifficultyCache()
+
+    assert cache.get(beatmap).star_rating == calculate_difficulty(beatmap).star_rating
+    assert len(cache) == 0
+
+def test_sections_md5_is_lazy(tmp_path, osu_bytes: bytes) -> None:
+    path = tmp_path / 'beatmap.osu'
+    path.write_bytes(osu_bytes)
+    full = Beatmap.from_file(str(path))
+    partial = Beatmap.from_file(str(path), mmap = True, sections = ('[Metadata]',))
+
+    assert partial._md5 is None
+    assert partial.md5 == full.md5
+    assert Beatmap(path.open('rb')).md5 == full.md5
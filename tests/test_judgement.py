@@ -0,0 +1,99 @@
+import pytest
+from synthetic import make_osu
+from synthetic import make_autoplay
+from borgor.beatmap import Beatmap
+from borgor.beatmap import HitObjectType
+from borgor.replay import Mods
+from borgor.replay import Replay
+from borgor.replay import Gamemode
+from borgor.judgement import HitResult
+from borgor.judgement import judge
+from borgor.judgement import apply_mods
+from borgor.judgement import clock_rate
+from borgor.judgement import hit_windows
+from borgor.judgement import slider_result
+from borgor.judgement import spinner_result
+from borgor.judgement import spins_required
+
+@pytest.fixture(scope = 'module')
+def beatmap() -> Beatmap:
+    return Beatmap(make_osu())
+
+def indices(beatmap: Beatmap, kind: HitObjectType) -> list[int]:
+    return [i for i, obj in enumerate(beatmap.hit_objects) if obj.type & kind]
+
+@pytest.mark.parametrize('mods', (Mods.NOMOD, Mods.HARDROCK, Mods.HIDDEN | Mods.HARDROCK))
+def test_autoplay(beatmap: Beatmap, mods: Mods) -> None:
+    judgement = judge(Replay.from_content(make_autoplay(beatmap, mods)), beatmap)
+
+    assert judgement.n300 == len(beatmap.hit_objects)
+    assert judgement.n100 == judgement.n50 == judgement.miss == 0
+    assert judgement.max_combo == beatmap.max_combo
+    assert judgement.unstable_rate < 10
+
+def test_released_sliders(beatmap: Beatmap) -> None:
+    sliders = indices(beatmap, HitObjectType.SLIDER)[:10]
+    timings = beatmap.slider_timings
+
+    def release(index: int):
+        if index in sliders:
+            return (timings[index].start_time + timings[index].end_time) / 2
+
+    judgement = judge(Replay.from_content(make_autoplay(beatmap, release = release)), beatmap)
+    for index in sliders:
+        assert judgement.judgements[index].result in (HitResult.Ok, HitResult.Meh)
+
+    assert judgement.n300 == len(beatmap.hit_objects) - len(sliders)
+    assert judgement.max_combo < beatmap.max_combo
+
+def test_slow_spinners(beatmap: Beatmap) -> None:
+    judgement = judge(Replay.from_content(make_autoplay(beatmap, spin_rpm = 100)), beatmap)
+    for index in indices(beatmap, HitObjectType.SPINNER):
+        assert judgement.judgements[index].result == HitResult.Miss
+
+def test_only_standard(beatmap: Beatmap) -> None:
+    replay = Replay.from_content(make_autoplay(beatmap))
+    replay.mode = Gamemode.Taiko
+    with pytest.raises(ValueError):
+        judge(replay, beatmap)
+
+def test_hit_windows() -> None:
+    assert hit_windows(0) == (80, 140, 200)
+    assert hit_windows(5) == (50, 100, 150)
+    assert hit_windows(10) == (20, 60, 100)
+
+def test_spins_required() -> None:
+    assert spins_required(0, 1000) == 3
+    assert spins_required(5, 1000) == 5
+    assert spins_required(10, 1000) == 7
+    assert spins_required(10, 2000) == 15
+    assert spins_required(8, 999) == 6
+
+def test_slider_result() -> None:
+    assert slider_result(4, 4) == HitResult.Great
+    assert slider_result(2, 4) == HitResult.Ok
+    assert slider_result(1, 4) == HitResult.Meh
+    assert slider_result(0, 4) == HitResult.Miss
+
+def test_spinner_result() -> None:
+    assert spinner_result(6, 5) == HitResult.Great
+    assert spinner_result(4, 5) == HitResult.Ok
+    assert spinner_result(3, 5) == HitResult.Meh
+    assert spinner_result(2, 5) == HitResult.Miss
+    assert spinner_result(0, 1) == HitResult.Miss
+    assert spinner_result(0, 0) == HitResult.Great
+
+def test_apply_mods() -> None:
+    assert apply_mods(5, Mods.NOMOD) == 5
+    assert apply_mods(5, Mods.HARDROCK) == 7
+    # HR caps at 10
+    assert apply_mods(9, Mods.HARDROCK) == 10
+    assert apply_mods(4, Mods.HARDROCK, 1.3) == pytest.approx(5.2)
+    assert apply_mods(8, Mods.HARDROCK, 1.3) == 10
+    assert apply_mods(5, Mods.EASY) == 2.5
+
+def test_clock_rate() -> None:
+    assert clock_rate(Mods.NOMOD) == 1.0
+    assert clock_rate(Mods.DOUBLETIME) == 1.5
+    assert clock_rate(Mods.NIGHTCORE | Mods.DOUBLETIME) == 1.5
+    assert clock_rate(Mods.HALFTIME) == 0.75
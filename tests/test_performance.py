@@ -0,0 +1,61 @@
+import pytest
+from synthetic import make_osu
+from borgor.beatmap import Beatmap
+from borgor.replay import Mods
+from borgor.difficulty import DifficultyCache
+from borgor.performance import score_counts
+from borgor.performance import calculate_performance
+from borgor.performance import calculate_performance_many
+
+@pytest.fixture(scope = 'module')
+def beatmap() -> Beatmap:
+    return Beatmap(make_osu())
+
+@pytest.mark.parametrize('mods, counts, pp', (
+    (Mods.NOMOD, (200, 0, 0, 0, 325), 163.448335),
+    (Mods.HARDROCK, (200, 0, 0, 0, 325), 251.536213),
+    (Mods.DOUBLETIME, (200, 0, 0, 0, 325), 364.703779),
+    (Mods.HIDDEN, (200, 0, 0, 0, 325), 181.381040),
+    (Mods.NOMOD, (190, 8, 1, 1, 200), 87.795216)
+))
+def test_performance(beatmap: Beatmap, mods: Mods, counts: tuple, pp: float) -> None:
+    assert calculate_performance(beatmap, mods, *counts) == pytest.approx(pp, abs = 1e-6)
+
+def test_performance_order(beatmap: Beatmap) -> None:
+    full = (200, 0, 0, 0, 325)
+    nomod = calculate_performance(beatmap, Mods.NOMOD, *full)
+
+    assert calculate_performance(beatmap, Mods.HARDROCK, *full) > nomod
+    assert calculate_performance(beatmap, Mods.DOUBLETIME, *full) > nomod
+    assert calculate_performance(beatmap, Mods.NOFAIL, *full) == pytest.approx(nomod * 0.9)
+    assert calculate_performance(beatmap, Mods.NOMOD, 199, 0, 0, 1, 325) < nomod
+    assert calculate_performance(beatmap, Mods.NOMOD, 200, 0, 0, 0, 100) < nomod
+    assert calculate_performance(beatmap, Mods.NOMOD, 0, 0, 0, 0, 0) == 0.0
+
+def test_performance_many(beatmap: Beatmap) -> None:
+    other = Beatmap(make_osu(seed = 2))
+    scores = [
+        (beatmap, Mods.NOMOD, 200, 0, 0, 0, 325),
+        (other, Mods.HARDROCK, 190, 5, 0, 0, 200),
+        (beatmap, Mods.NIGHTCORE, 195, 4, 1, 0, 300),
+        (beatmap, Mods.NOMOD, 190, 8, 1, 1, 200),
+        (beatmap, Mods.DOUBLETIME, 200, 0, 0, 0, 325)
+    ]
+    cache = DifficultyCache()
+
+    assert calculate_performance_many(scores, cache) == [
+        calculate_performance(*score) for score in scores
+    ]
+    # NC and DT share difficulty
+    assert len(cache) == 3
+    assert calculate_performance_many([]) == []
+
+def test_score_counts() -> None:
+    assert score_counts({
+        'enabled_mods': '24', 'count300': '200', 'count100': '3',
+        'count50': '1', 'countmiss': '0', 'maxcombo': '300'
+    }) == (Mods.HIDDEN | Mods.HARDROCK, 200, 3, 1, 0, 300)
+    assert score_counts({
+        'mods': 64, 'count_300': 100, 'count_100': 0,
+        'count_50': 0, 'count_miss': 2, 'max_combo': 50
+    }) == (Mods.DOUBLETIME, 100, 0, 0, 2, 50)
@@ -0,0 +1,212 @@
+import pytest
+from synthetic import make_osr
+from borgor.replay import Key
+from borgor.replay import Replay
+from borgor.replay import FrameArray
+from borgor.replay import resolve_keys
+from borgor.replay import process_files
+
+HEADER = (
+    'mode', 'version', 'beatmap_md5', 'player_name', 'replay_md5',
+    'n300', 'n100', 'n50', 'geki', 'katu', 'miss', 'total_score',
+    'combo', 'perfect', 'mods', 'timestamp', 'score_id'
+)
+
+def header(replay: Replay) -> dict:
+    return {name: getattr(replay, name) for name in HEADER}
+
+def frames(frames) -> list[tuple]:
+    return [(f.delta_time, f.x, f.y, int(f.pressed)) for f in frames]
+
+def test_columnar_frames(osr_bytes: bytes) -> None:
+    replay = Replay.from_content(osr_bytes)
+    columnar = Replay.from_content(osr_bytes, columnar = True)
+
+    assert isinstance(columnar.frames, FrameArray)
+    assert frames(columnar.frames) == frames(replay.frames)
+    assert frames(columnar.frames.to_frames()) == frames(replay.frames)
+    assert frames(FrameArray.from_frames(replay.frames)) == frames(replay.frames)
+    assert frames(columnar.frames[2:5]) == frames(replay.frames[2:5])
+    assert list(columnar.frames.time)[-1] == sum(f.delta_time for f in replay.frames)
+
+    columnar.frames[-1].x = 5.0
+    assert columnar.frames.x[-1] == 5.0
+
+def test_lazy_parse(osr_bytes: bytes) -> None:
+    replay = Replay.from_content(osr_bytes)
+    lazy = Replay.from_content(osr_bytes, lazy = True)
+
+    assert header(lazy) == header(replay)
+    assert lazy._frames is None and lazy._bar_graph is None
+    assert frames(lazy.frames) == frames(replay.frames)
+    assert [(b.delta_time, b.current_hp) for b in lazy.bar_graph] == [
+        (b.delta_time, b.current_hp) for b in replay.bar_graph
+    ]
+
+@pytest.mark.parametrize('chunk_size', (7, 1 << 16))
+def test_iter_frames(osr_bytes: bytes, chunk_size: int) -> None:
+    replay = Replay.from_content(osr_bytes, lazy = True)
+    streamed = frames(replay.iter_frames(chunk_size))
+
+    assert replay._frames is None
+    assert streamed == frames(Replay.from_content(osr_bytes).frames)
+    # decoded replays just iterate over their frames
+    assert frames(Replay.from_content(osr_bytes).iter_frames()) == streamed
+
+def _double(path: str) -> str:
+    if path == 'bad':
+        raise ValueError(path)
+
+    return path * 2
+
+def test_process_files_reports_errors_per_file() -> None:
+    paths = ['a', 'bad', 'c', 'd', 'e']
+    results = dict(process_files(_double, paths, workers = 2, chunksize = 2))
+
+    assert results.keys() == set(paths)
+    assert results['a'] == 'aa' and results['e'] == 'ee'
+    assert isinstance(results['bad'], ValueError)
+
+def test_process_files_close_early() -> None:
+    results = process_files(_double, map(str, range(1000)), workers = 2, chunksize = 1)
+    next(results)
+    results.close()
+
+def test_parse_many(tmp_path, osr_bytes: bytes) -> None:
+    paths = []
+    for i in range(5):
+        path = tmp_path / f'{i}.osr'
+        path.write_bytes(osr_bytes)
+        paths.append(str(path))
+
+    corrupt = tmp_path / 'corrupt.osr'
+    corrupt.write_bytes(osr_bytes[:100])
+    paths.append(str(corrupt))
+
+    results = dict(Replay.parse_many(paths, workers = 2, chunksize = 2))
+    assert results.keys() == set(paths)
+    assert isinstance(results.pop(str(corrupt)), Exception)
+
+    expected = frames(Replay.from_content(osr_bytes).frames)
+    for replay in results.values():
+        assert isinstance(replay.frames, FrameArray)
+        assert frames(replay.frames) == expected
+
+@pytest.mark.parametrize('lazy', (False, True))
+def test_from_file_mmap(tmp_path, osr_bytes: bytes, lazy: bool) -> None:
+    path = tmp_path / 'replay.osr'
+    path.write_bytes(osr_bytes)
+    replay = Replay.from_file(str(path), columnar = True, lazy = lazy, mmap = True)
+
+    # only lazy replays keep the file mapped, to decode it later
+    assert (replay._data == b'') != lazy
+    assert header(replay) == header(Replay.from_content(osr_bytes))
+    assert frames(replay.frames) == frames(Replay.from_content(osr_bytes).frames)
+
+def bars(replay: Replay) -> list[tuple]:
+    return [(b.delta_time, b.current_hp) for b in replay.bar_graph]
+
+@pytest.mark.parametrize('columnar', (False, True))
+def test_build_round_trip(osr_bytes: bytes, columnar: bool) -> None:
+    replay = Replay.from_content(osr_bytes, columnar = columnar)
+    assert bars(replay) == [(0, 1.0), (100, 1.0), (200, 0.9), (300, 0.95)]
+
+    rebuilt = Replay.from_content(replay.build(), columnar = columnar)
+    assert header(rebuilt) == header(replay)
+    assert frames(rebuilt.frames) == frames(replay.frames)
+    assert bars(rebuilt) == bars(replay)
+
+    # the life bar string is written back exactly as osu! wrote it
+    again = Replay.from_content(rebuilt.build(), lazy = True)
+    assert again._raw_bar_graph == Replay.from_content(osr_bytes, lazy = True)._raw_bar_graph
+
+def test_lazy_build_is_byte_identical(osr_bytes: bytes) -> None:
+    replay = Replay.from_content(osr_bytes, lazy = True)
+    assert replay.build() == osr_bytes
+
+    replay.player_name = 'other'
+    rebuilt = Replay.from_content(replay.build())
+    assert rebuilt.player_name == 'other'
+    assert frames(rebuilt.frames) == frames(Replay.from_content(osr_bytes).frames)
+
+@pytest.mark.parametrize('lazy', (False, True))
+def test_build_keeps_in_place_edits(osr_bytes: bytes, lazy: bool) -> None:
+    replay = Replay.from_content(osr_bytes, columnar = True, lazy = lazy)
+    replay.frames[3].x = 1.0
+    replay.bar_graph[0].current_hp = 0.25
+
+    rebuilt = Replay.from_content(replay.build(), columnar = True)
+    assert rebuilt.frames[3].x == 1.0
+    assert bars(rebuilt) == [(0, 0.25), (100, 1.0), (200, 0.9), (300, 0.95)]
+
+@pytest.mark.parametrize('mmap', (False, True))
+def test_cache_round_trip(tmp_path, osr_bytes: bytes, mmap: bool) -> None:
+    path = tmp_path / 'replay.brc'
+    Replay.from_content(osr_bytes, lazy = True).save_cache(str(path))
+    cached = Replay.load_cache(str(path), mmap = mmap)
+    replay = Replay.from_content(osr_bytes, columnar = True)
+
+    assert isinstance(cached.frames, FrameArray)
+    assert header(cached) == header(replay)
+    # the seed frame's keys don't fit in the one byte keys are stored in
+    assert frames(cached.frames) == frames(replay.frames)
+    assert frames(cached.iter_frames()) == frames(replay.frames)
+    assert cached.build() == osr_bytes
+
+def test_cache_keeps_edits(tmp_path, osr_bytes: bytes) -> None:
+    path = tmp_path / 'replay.brc'
+    Replay.from_content(osr_bytes, lazy = True).save_cache(str(path))
+    cached = Replay.load_cache(str(path))
+    cached.frames[3].x = 1.5
+    cached.player_name = 'other'
+
+    rebuilt = Replay.from_content(cached.build(), columnar = True)
+    assert rebuilt.player_name == 'other'
+    assert frames(rebuilt.frames) == frames(cached.frames)
+
+    # edited frames are cached as they are now
+    cached.save_cache(str(path))
+    assert Replay.load_cache(str(path)).build() == cached.build()
+
+def replay_of(frames: list[tuple], columnar: bool) -> Replay:
+    return Replay.from_content(make_osr(frames = frames), columnar = columnar)
+
+@pytest.mark.parametrize('columnar', (False, True))
+def test_time_index(columnar: bool) -> None:
+    # the two leading `256|-500` frames (the second one is at -1ms) aren't played
+    replay = replay_of([(10, 100, 100, 0), (10, 200, 100, 1), (20, 200, 300, 0)], columnar)
+
+    assert len(replay.time_index) == 3
+    assert replay.frame_at(8) is None
+    assert replay.frame_at(9).x == 100
+    assert replay.frame_at(18.9).x == 100
+    assert replay.frame_at(19).x == 200
+    # the RNG seed frame at the end has a negative delta and isn't played either
+    assert replay.frame_at(10 ** 6).y == 300
+
+    assert [f.x for f in replay.frames_between(9, 19)] == [100, 200]
+    assert replay.frames_between(40, 50) == []
+
+    assert replay.position_at(14) == (150, 100)
+    assert replay.position_at(29) == (200, 200)
+    assert replay.position_at(0) == (100, 100)
+    assert replay.position_at(100) == (200, 300)
+
+@pytest.mark.parametrize('columnar', (False, True))
+def test_key_events(columnar: bool) -> None:
+    replay = replay_of([
+        (10, 0, 0, Key.M1 | Key.K1), (10, 0, 0, Key.M1 | Key.K1), (10, 0, 0, 0),
+        (10, 0, 0, Key.M2 | Key.K2), (10, 0, 0, Key.M1 | Key.M2 | Key.K2), (10, 0, 0, 0),
+        (10, 0, 0, Key.Smoke), (10, 0, 0, Key.Smoke)
+    ], columnar)
+
+    # `K1` presses come with `M1` set, they're one `K1` event
+    assert [(e.key, e.press_time, e.release_time) for e in replay.key_events()] == [
+        (Key.K1, 9, 29), (Key.K2, 39, 59), (Key.M1, 49, 59), (Key.Smoke, 69, 79)
+    ]
+    assert replay.key_events()[0].duration == 20
+
+def test_resolve_keys() -> None:
+    assert resolve_keys(Key.M1 | Key.K1) == Key.K1
+    assert resolve_keys(Key.M2 | Key.K2 | Key.M1) == Key.K2 | Key.M1
+    assert resolve_keys(Key.M1 | Key.Smoke) == Key.M1 | Key.Smoke
@@ -0,0 +1,68 @@
+import random
+import pytest
+from synthetic import make_osr
+from borgor.replay import Mods
+from borgor.replay import Replay
+from borgor.similarity import Fingerprint
+from borgor.similarity import SimilarityIndex
+
+def path(seed: int) -> list[tuple]:
+    r = random.Random(seed)
+    return [(16, r.uniform(0, 512), r.uniform(0, 384), 1) for _ in range(300)]
+
+def replay_of(frames: list[tuple], seed: int, mods: int = 0) -> Replay:
+    return Replay.from_content(make_osr(frames = frames, seed = seed, mods = mods), columnar = True)
+
+@pytest.fixture(scope = 'module')
+def index() -> SimilarityIndex:
+    index = SimilarityIndex()
+    for seed in range(50):
+        index.add(replay_of(path(seed), seed))
+
+    return index
+
+def test_shifted_copy_is_the_top_match(index: SimilarityIndex) -> None:
+    stolen = replay_of([(w, x + 1.5, y, z) for w, x, y, z in path(17)], 100)
+    match, = index.query(stolen, k = 1)
+
+    assert match.key == f'{17:032x}'
+    assert match.distance == pytest.approx(1.5)
+    assert not match.flipped
+
+    # within `max_distance` only
+    assert index.query(stolen, max_distance = 1.0) == []
+
+def test_flipped_copies(index: SimilarityIndex) -> None:
+    flipped = [(w, x, 384 - y, z) for w, x, y, z in path(23)]
+
+    match, = index.query(replay_of(flipped, 100), k = 1)
+    assert match.key == f'{23:032x}' and match.flipped
+
+    # HR replays are flipped back before they're compared
+    match, = index.query(replay_of(flipped, 100, Mods.HARDROCK), k = 1)
+    assert match.key == f'{23:032x}' and not match.flipped
+    assert match.distance == pytest.approx(0.0)
+
+def test_add_remove_exclude(index: SimilarityIndex) -> None:
+    replay = replay_of(path(5), 5)
+    assert len(index) == 50
+    assert index.query(replay, k = 1)[0].key == replay.replay_md5
+    assert all(m.key != replay.replay_md5 for m in index.query(replay, exclude = replay.replay_md5))
+
+    index.remove(replay.beatmap_md5, replay.replay_md5)
+    assert len(index) == 49
+    assert index.query(replay) == []
+
+    index.add(replay)
+    replay.beatmap_md5 = 'b' * 32
+    assert index.query(replay) == []
+
+def test_fingerprint_distance() -> None:
+    a = Fingerprint.from_replay(replay_of(path(1), 1), samples = 64)
+    b = Fingerprint.from_replay(replay_of([(w, x, y + 3, z) for w, x, y, z in path(1)], 2), samples = 64)
+
+    assert len(a.x) == 64
+    assert a.distance(b) == pytest.approx(3.0)
+    assert a.distance(a) == 0.0
+    assert a.flipped().distance(a.flipped()) == 0.0
+    assert a.flipped().flipped().distance(a) == pytest.approx(0.0)
@@ -0,0 +1,61 @@
+import pytest
+from borgor.beatmap import Beatmap
+
+def make_map(timing_points: list[str], hit_objects: list[str], version: int = 14) -> bytes:
+    lines = [
+        f'osu file format v{version}', '',
+        '[General]', 'StackLeniency: 0.7', 'Mode: 0', '',
+        '[Difficulty]', 'HPDrainRate:5', 'CircleSize:4', 'OverallDifficulty:8',
+        'ApproachRate:9', 'SliderMultiplier:1', 'SliderTickRate:1', '',
+        '[TimingPoints]', *timing_points, '',
+        '[HitObjects]', *hit_objects
+    ]
+    return '\r\n'.join(lines).encode()
+
+# 120bpm, 100 osu!px per beat: 0.2 osu!px/ms and a tick every 100 osu!px
+RED_LINE = '0,500,4,2,0,60,1,0'
+SLIDER = '100,100,0,2,0,L|350:100,2,250'
+
+def test_slider_with_repeats_and_ticks() -> None:
+    beatmap = Beatmap(make_map([RED_LINE], [SLIDER, '100,100,3000,1,0', '256,192,4000,12,0,5000']))
+    timing = beatmap.slider_timings[0]
+
+    assert timing.velocity == 0.2
+    assert timing.span_duration == 1250
+    assert timing.end_time == 2500
+    assert timing.repeat_times == [1250]
+    # the second span runs backwards
+    assert timing.tick_times == [500, 1000, 1500, 2000]
+    assert timing.tick_progress == [0.4, 0.8, 0.8, 0.4]
+    assert timing.combo == 7
+
+    # the slider's head, 4 ticks, repeat and tail, the circle and the spinner
+    assert beatmap.max_combo == 9
+    assert Beatmap(make_map([RED_LINE], [SLIDER]), columnar = True).max_combo == 7
+
+def test_slider_velocity() -> None:
+    beatmap = Beatmap(make_map([RED_LINE, '0,-50,4,2,0,60,0,0'], [SLIDER]))
+    timing = beatmap.slider_timings[0]
+
+    assert timing.velocity == 0.4
+    assert timing.end_time == 1250
+    # ticks are spaced by the slider velocity too
+    assert timing.tick_times == [500, 750]
+    assert beatmap.max_combo == 5
+
+    # except before v8
+    old = Beatmap(make_map([RED_LINE, '0,-50,4,2,0,60,0,0'], [SLIDER], version = 7))
+    assert old.slider_timings[0].tick_times == [250, 500, 750, 1000]
+
+def test_ticks_near_the_end_are_dropped() -> None:
+    # the 200 osu!px tick is 10ms from the end, osu! leaves it out
+    beatmap = Beatmap(make_map([RED_LINE], ['100,100,0,2,0,L|350:100,1,202']))
+    assert beatmap.slider_timings[0].tick_times == [500]
+
+def test_synthetic_max_combo(osu_bytes: bytes) -> None:
+    beatmap = Beatmap(osu_bytes)
+    assert beatmap.max_combo == 325
+    assert Beatmap(osu_bytes, columnar = True).max_combo == 325
+    for timing in beatmap.slider_timings.values():
+        assert timing.tick_times == sorted(timing.tick_times)
+        assert timing.end_time == pytest.approx(timing.start_time + timing.span_duration * (len(timing.repeat_times) + 1))
@@ -0,0 +1,161 @@
+import random
+import pytest
+from math import hypot
+from array import array
+from borgor.beatmap import Beatmap
+from borgor.stacking import OBJECT_CIRCLE
+from borgor.stacking import OBJECT_SLIDER
+from borgor.stacking import OBJECT_SPINNER
+from borgor.stacking import STACK_DISTANCE
+from borgor.stacking import stack_heights
+from borgor.stacking import stack_heights_old
+
+def near(x1: float, y1: float, x2: float, y2: float) -> bool:
+    return hypot(x1 - x2, y1 - y2) < STACK_DISTANCE
+
+def reference_heights(kinds, start, end, x, y, end_x, end_y, threshold) -> list[int]:
+    """osu!'s version 6+ stacking, walking back over every object."""
+    heights = [0] * len(kinds)
+    for i in range(len(kinds) - 1, 0, -1):
+        if heights[i] != 0 or kinds[i] == OBJECT_SPINNER:
+            continue
+
+        current = i
+        for n in range(i - 1, -1, -1):
+            if kinds[n] == OBJECT_SPINNER:
+                continue
+
+            if kinds[i] == OBJECT_CIRCLE:
+                if start[current] - threshold > end[n]:
+                    break
+
+                if kinds[n] == OBJECT_SLIDER and near(end_x[n], end_y[n], x[current], y[current]):
+                    offset = heights[current] - heights[n] + 1
+                    for j in range(n + 1, i + 1):
+                        # spinners never stack
+                        if kinds[j] != OBJECT_SPINNER and near(end_x[n], end_y[n], x[j], y[j]):
+                            heights[j] -= offset
+                    break
+
+                if near(x[n], y[n], x[current], y[current]):
+                    heights[n] = heights[current] + 1
+                    current = n
+            else:
+                if start[current] - threshold > start[n]:
+                    break
+
+                if near(end_x[n], end_y[n], x[current], y[current]):
+                    heights[n] = heights[current] + 1
+                    current = n
+
+    return heights
+
+def reference_heights_old(kinds, start, end, x, y, end_x, end_y, threshold) -> list[int]:
+    """osu!'s stacking for versions before 6."""
+    heights = [0] * len(kinds)
+    for i in range(len(kinds)):
+        if heights[i] != 0 and kinds[i] != OBJECT_SLIDER:
+            continue
+
+        time = end[i]
+        slider_stack = 0
+        for j in range(i + 1, len(kinds)):
+            if start[j] - threshold > time:
+                break
+
+            if near(x[j], y[j], x[i], y[i]):
+                heights[i] += 1
+                time = end[j]
+            elif near(x[j], y[j], end_x[i], end_y[i]):
+                slider_stack += 1
+                heights[j] -= slider_stack
+                time = end[j]
+
+    return heights
+
+def make_objects(count: int, seed: int, spread: int, spacing: int) -> tuple[array, ...]:
+    """
+    `count` circles, sliders and spinners `spacing` ms apart on average with
+    every position within `spread` osu!px, so most of them stack on something.
+    """
+    r = random.Random(seed)
+    kinds = array('b')
+    start = array('d')
+    end = array('d')
+    x = array('d')
+    y = array('d')
+    end_x = array('d')
+    end_y = array('d')
+
+    time = 0
+    for _ in range(count):
+        time += r.randint(0, 2 * spacing)
+        kind = r.choices((OBJECT_CIRCLE, OBJECT_SLIDER, OBJECT_SPINNER), (70, 25, 5))[0]
+        kinds.append(kind)
+        start.append(time)
+        if kind == OBJECT_SPINNER:
+            x.append(256)
+            y.append(192)
+        else:
+            x.append(r.randint(0, spread))
+            y.append(r.randint(0, spread))
+
+        if kind == OBJECT_SLIDER:
+            end.append(time + r.randint(50, 20 * spacing))
+            end_x.append(r.randint(0, spread))
+            end_y.append(r.randint(0, spread))
+        else:
+            end.append(time + (r.randint(500, 2000) if kind == OBJECT_SPINNER else 0))
+            end_x.append(x[-1])
+            end_y.append(y[-1])
+
+    return kinds, start, end, x, y, end_x, end_y
+
+# dense streams with a long window go through the grid, sparse ones are walked
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('spread, spacing, threshold', (
+    (4, 10, 1260), (8, 5, 1260), (6, 40, 420), (2, 100, 100), (12, 8, 2000)
+))
+def test_stack_heights(seed: int, spread: int, spacing: int, threshold: float) -> None:
+    objects = make_objects(600, seed, spread, spacing)
+
+    assert list(stack_heights(*objects, threshold)) == reference_heights(*objects, threshold)
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('spread, spacing, threshold', ((4, 10, 1260), (6, 40, 420), (2, 100, 100)))
+def test_stack_heights_old(seed: int, spread: int, spacing: int, threshold: float) -> None:
+    objects = make_objects(300, seed, spread, spacing)
+
+    assert list(stack_heights_old(*objects, threshold)) == reference_heights_old(*objects, threshold)
+
+def make_map(hit_objects: list[str], version: int) -> bytes:
+    lines = [
+        f'osu file format v{version}', '',
+        '[General]', 'StackLeniency: 0.7', 'Mode: 0', '',
+        '[Difficulty]', 'HPDrainRate:5', 'CircleSize:5', 'OverallDifficulty:8',
+        'SliderMultiplier:1', 'SliderTickRate:1', '',
+        '[TimingPoints]', '0,500,4,2,0,60,1,0', '',
+        '[HitObjects]', *hit_objects
+    ]
+    return '\r\n'.join(lines).encode()
+
+@pytest.mark.parametrize('version', (5, 14))
+def test_beatmap_stacking(version: int) -> None:
+    beatmap = Beatmap(make_map([
+        '100,100,0,1,0', '100,100,100,1,0', '101,100,200,1,0',
+        # a 500ms slider ending at 200,300 and a circle on its end
+        '100,300,1000,2,0,L|200:300,1,100', '200,300,1600,1,0',
+        '256,192,3000,12,0,4000'
+    ], version))
+    stacking = beatmap.stacking()
+
+    # there's no ApproachRate, OD8 is used
+    assert beatmap.approach_rate == 8
+    assert list(stacking.heights) == [2, 1, 0, 0, -1, 0]
+    # CS5 moves a stack 3.2 osu!px per height
+    assert stacking.offset == pytest.approx(-3.2)
+    assert stacking.x[0] == pytest.approx(100 - 6.4)
+    assert stacking.y[4] == pytest.approx(300 + 3.2)
+    assert beatmap.stacking() is stacking
+    assert list(beatmap.stacking(8, 10).heights) == [2, 1, 0, 0, -1, 0]
+    assert beatmap.stacking(8, 10).offset == pytest.approx(-0.96)
@@ -0,0 +1,52 @@
+import pytest
+from borgor.beatmap import Beatmap
+from borgor.beatmap import TimingPoint
+from borgor.beatmap import TimingIndex
+
+def point(time: int, beat_length: float, uninherited: bool, effects: int = 0) -> TimingPoint:
+    return TimingPoint(time, beat_length, 4, 2, 0, 60, uninherited, effects)
+
+INDEX = TimingIndex([
+    point(3000, -200, False),
+    point(1000, 500, True),
+    point(2000, -50, False, 1),
+    point(3000, 400, True),
+    point(4000, float('nan'), False)
+])
+
+def test_timing_at() -> None:
+    assert len(INDEX) == 4
+
+    # before the first point the first red line applies
+    assert INDEX.timing_at(0).bpm == 120
+    assert INDEX.timing_at(1500).slider_velocity == 1.0
+    assert INDEX.timing_at(2000).slider_velocity == 2.0
+    assert INDEX.timing_at(2000).kiai
+
+    # the green line at the same time as a red line applies on top of it
+    state = INDEX.timing_at(3500)
+    assert state.beat_length == 400 and state.slider_velocity == 0.5
+    assert not state.kiai
+
+    # NaN green lines are 1x
+    assert INDEX.timing_at(10 ** 6).slider_velocity == 1.0
+
+def test_timings_at() -> None:
+    times = [0, 2500, 1000, 3000, 3000, 2999, 5000, 1999]
+    assert INDEX.timings_at(times) == [INDEX.timing_at(time) for time in times]
+
+def test_no_red_lines() -> None:
+    index = TimingIndex([point(1000, -50, False)])
+    assert index.timing_at(1000) is None
+    assert index.timings_at([0, 1]) == [None, None]
+
+def test_beatmap_timing(osu_bytes: bytes) -> None:
+    beatmap = Beatmap(osu_bytes)
+    assert beatmap.timing_at(0).bpm == pytest.approx(180)
+    assert beatmap.timing_index is beatmap.timing_index
+    assert beatmap.hit_object_timings() == [
+        beatmap.timing_at(obj.time_when_object_hit) for obj in beatmap.hit_objects
+    ]
+
+    beatmap.timing_points = [point(0, 250, True)]
+    assert beatmap.timing_at(0).bpm == 240